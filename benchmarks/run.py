@@ -0,0 +1,206 @@
+"""
+Ingest and query benchmarks for `ELKConnector`.
+
+Usage:
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --output new.json --baseline bench.json
+    python -m benchmarks.run --host https://localhost:9200 --user elastic --password password
+
+Without --host the benchmarks run against the in-process stub cluster, which measures the
+client overhead alone.
+"""
+import argparse
+import datetime
+import json
+import platform
+import resource
+import time
+
+from demo import ELKConnector, DataGenerator
+from demo import search_queries, search_filters, aggregations, sortings, index_mappings_example
+
+from .stub_cluster import start_stub_cluster
+
+BENCHMARK_INDEX = "benchmark_index"
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(operation, repeat=1, items_per_call=1):
+    """
+    Call `operation` `repeat` times and report latency percentiles, throughput and client resources.
+
+    Returns:
+        dict: Calls, items, seconds, throughput, p50/p95/p99 latency in ms, CPU seconds and peak RSS.
+    """
+    latencies = []
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+    return {
+        "calls": repeat,
+        "items": repeat * items_per_call,
+        "seconds": round(elapsed, 4),
+        "items_per_sec": round(repeat * items_per_call / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "client_cpu_seconds": round(time.process_time() - cpu_started, 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def search_cases():
+    """Return (name, search kwargs) pairs built from the canned queries in `demo/general.py`."""
+    cases = []
+    for query_name, query in search_queries.items():
+        cases.append((f"query:{query_name}", {"query": query}))
+        for sort_name, sort in sortings.items():
+            cases.append((f"query:{query_name}+{sort_name}", {"query": query, "sort": sort}))
+    for filter_name, filters in search_filters.items():
+        if isinstance(filters, list):
+            cases.append((f"filters:{filter_name}", {"filters": filters}))
+    for aggregation_name, aggregation in aggregations.items():
+        cases.append((f"aggs:{aggregation_name}", {"aggregations": aggregation, "aggregations_only": True}))
+    cases.append(("projection:no_attributes", {"source_excludes": ["metadata.attributes"], "track_total_hits": False}))
+    cases.append(("projection:count_only", {"source_includes": False, "filter_path": "hits.total"}))
+    return cases
+
+
+def run_benchmarks(connector, documents=10000, single_documents=500, searches=20, page_size=100):
+    """
+    Run every benchmark scenario against a connected `ELKConnector`.
+
+    Returns:
+        dict: Results per scenario.
+    """
+    generator = DataGenerator(seed=42)
+    batch = generator.generate_batch(documents)
+    results = {}
+
+    if connector.client.indices.exists(index=BENCHMARK_INDEX):
+        connector.delete_index(BENCHMARK_INDEX)
+    connector.create_index(BENCHMARK_INDEX, index_mappings_example)
+
+    single = iter(batch[:single_documents])
+    results["index_document"] = measure(lambda: connector.index_document(BENCHMARK_INDEX, next(single)),
+                                        repeat=single_documents)
+    results["bulk_index"] = measure(lambda: connector.bulk_index(BENCHMARK_INDEX, batch, id_field="id"),
+                                    items_per_call=documents)
+    def bulk_load():
+        with connector.bulk_load_mode(BENCHMARK_INDEX):
+            connector.bulk_index(BENCHMARK_INDEX, batch, id_field="id")
+
+    results["bulk_index[bulk_load_mode]"] = measure(bulk_load, items_per_call=documents)
+    results["parallel_bulk_index"] = measure(
+        lambda: connector.parallel_bulk_index(BENCHMARK_INDEX, batch, workers=4, id_field="id"),
+        items_per_call=documents)
+
+    for name, arguments in search_cases():
+        results[f"search[{name}]"] = measure(lambda: connector.search(BENCHMARK_INDEX, **arguments), repeat=searches)
+
+    window = min(documents, 10000)
+    results["offset_pagination"] = measure(
+        lambda: [connector.search(BENCHMARK_INDEX, limit=page_size, offset=offset) for offset in range(0, window, page_size)],
+        items_per_call=window)
+    results["iter_search"] = measure(lambda: sum(1 for _ in connector.iter_search(BENCHMARK_INDEX, page_size=page_size)),
+                                     items_per_call=connector.get_index_total_docs(BENCHMARK_INDEX))
+    results["get_index_info"] = measure(lambda: connector.get_index_info(BENCHMARK_INDEX), repeat=searches)
+    results["get_indices_info"] = measure(lambda: connector.get_indices_info(["benchmark_*"]), repeat=searches)
+
+    connector.delete_index(BENCHMARK_INDEX)
+    return results
+
+
+def compare(baseline, current):
+    """
+    Compare two benchmark runs.
+
+    Returns:
+        list: (scenario, p50 change %, throughput change %) for the scenarios present in both runs.
+    """
+    rows = []
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        p50 = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+        throughput = (result["items_per_sec"] - before["items_per_sec"]) / before["items_per_sec"] * 100 \
+            if before["items_per_sec"] else 0.0
+        rows.append((name, round(p50, 1), round(throughput, 1)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ELKConnector ingest and query benchmarks")
+    parser.add_argument("--host", help="Elasticsearch URL; the stub cluster is started when omitted")
+    parser.add_argument("--user", default="elastic")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--compression", choices=("gzip", "deflate"), help="Compress request bodies")
+    parser.add_argument("--compression-level", type=int, default=6)
+    parser.add_argument("--nodes", type=int, default=1, help="Nodes of the stub cluster, discovered by sniffing")
+    parser.add_argument("--node-selector", default="round_robin", choices=("round_robin", "random", "least_latency"))
+    parser.add_argument("--shard-aware-bulk", action="store_true", help="Send bulk requests to primary shard nodes")
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--single-documents", type=int, default=500)
+    parser.add_argument("--searches", type=int, default=20, help="Repetitions of each search case")
+    parser.add_argument("--output", help="Write the results as JSON to this path")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    stub = None
+    host = args.host
+    if host is None:
+        host, stub = start_stub_cluster(nodes=args.nodes)
+    try:
+        connector = ELKConnector(host=host, user=args.user, cert=None, compression=args.compression,
+                                 compression_level=args.compression_level, node_selector=args.node_selector,
+                                 sniff=args.nodes > 1, shard_aware_bulk=args.shard_aware_bulk,
+                                 **{"pass": args.password})
+        connector.connect()
+        scenarios = run_benchmarks(connector, args.documents, args.single_documents, args.searches)
+        compression = connector.compression_stats()
+        nodes = connector.node_stats()
+        connector.close()
+    finally:
+        if stub is not None:
+            stub.terminate()
+
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "target": "stub" if stub is not None else host,
+        "python": platform.python_version(),
+        "documents": args.documents,
+        "compression": compression,
+        "nodes": nodes,
+        "scenarios": scenarios,
+    }
+    print(f"{'scenario':48} {'items/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'cpu s':>8}")
+    for name, result in scenarios.items():
+        print(f"{name:48} {result['items_per_sec']:>12} {result['p50_ms']:>10} {result['p95_ms']:>10} "
+              f"{result['p99_ms']:>10} {result['client_cpu_seconds']:>8}")
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        print(f"\n{'scenario':48} {'p50 change %':>14} {'items/s change %':>18}")
+        for name, p50, throughput in compare(baseline, report):
+            print(f"{name:48} {p50:>14} {throughput:>18}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
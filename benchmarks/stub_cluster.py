@@ -0,0 +1,508 @@
+"""
+Local stand-in for the Elasticsearch REST endpoints used by `ELKConnector`.
+
+It keeps documents in memory and answers with canned but well-formed responses, so the
+benchmarks measure client-side overhead without a real cluster. Queries are not evaluated:
+searches page through the stored documents in insertion order.
+
+Tests inject failures with `PUT /_stub/faults`: {"bulk_statuses": [429, 503]} answers the next
+bulk requests with those statuses, one each, and {"bulk_item_rejections": 3} rejects the next
+three bulk items with 429. {"bulk_item_statuses": [400, 503]} fails the next bulk items with
+those statuses, one each, and {"health_timeouts": 1} answers the next cluster health request
+with "timed_out": true. `GET /_stub` reports the open points in time, the refreshes per
+index and the compressed request bodies per Content-Encoding, and `DELETE /_stub` drops
+every index, alias, point in time and pending fault.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import fnmatch
+import gzip
+import itertools
+import json
+import multiprocessing
+import socket
+import threading
+import time
+import zlib
+
+
+# Store size counted for each document.
+DOCUMENT_BYTES = 300
+
+
+class StubState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.indices = {}
+        self.aliases = {}
+        self.alias_options = {}
+        self.pits = {}
+        self.pit_ids = itertools.count()
+        self.nodes = {}
+        self.bulk_statuses = []
+        self.bulk_item_rejections = 0
+        self.bulk_item_statuses = []
+        self.health_timeouts = 0
+        self.request_encodings = {}
+
+    def resolve(self, expression):
+        """Return the index names matched by a comma separated list of names, aliases and wildcards."""
+        names = []
+        for part in expression.split(","):
+            part = self.aliases.get(part, part)
+            names.extend(name for name in self.indices if fnmatch.fnmatchcase(name, part) and name not in names)
+        return names
+
+    def create(self, index_name, body=None):
+        """Add an empty index, registering the aliases of its body. Call with the lock held."""
+        body = body or {}
+        self.indices[index_name] = {"docs": [], "body": body, "created": int(time.time() * 1000)}
+        for alias, options in body.get("aliases", {}).items():
+            self.aliases[alias] = index_name
+            self.alias_options[alias] = options
+        return self.indices[index_name]
+
+    def shard_sizes(self, index_name):
+        """Return the store size of each primary shard; documents are routed by the CRC32 of their _id."""
+        index = self.indices[index_name]
+        shards = int(flat_settings(index["body"].get("settings", {})).get("index.number_of_shards", 1))
+        routing = {position: zlib.crc32(doc_id.encode()) for doc_id, position in index.get("ids", {}).items()}
+        sizes = [0] * shards
+        for position in range(len(index["docs"])):
+            sizes[routing.get(position, position) % shards] += DOCUMENT_BYTES
+        return sizes
+
+    def aliases_of(self, index_name):
+        return {alias: self.alias_options.get(alias, {}) for alias, target in self.aliases.items() if target == index_name}
+
+    def documents(self, index_name):
+        index_name = self.aliases.get(index_name, index_name)
+        return self.indices.get(index_name, {}).get("docs", [])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+    node_id = "stub-node-0"
+
+    def setup(self):
+        super().setup()
+        # Headers and body are written separately; without TCP_NODELAY every response waits for a delayed ACK.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        path = urlsplit(self.path).path.strip("/")
+        if path.startswith("_alias/"):
+            path = path.split("/", 1)[1]
+        found = not path or path in self.state.indices or path in self.state.aliases
+        self.send_response(200 if found else 404)
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        if len(payload) > 1024 and "gzip" in self.headers.get("Accept-Encoding", ""):
+            payload = gzip.compress(payload, compresslevel=1)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        encoding = self.headers.get("Content-Encoding")
+        if encoding == "gzip":
+            raw = gzip.decompress(raw)
+        elif encoding == "deflate":
+            raw = zlib.decompress(raw)
+        state = self.state
+        if encoding:
+            with state.lock:
+                state.request_encodings[encoding] = state.request_encodings.get(encoding, 0) + 1
+
+        if not parts:
+            return self.respond(200, {"cluster_name": "stub-cluster", "version": {"number": "8.12.1"},
+                                      "tagline": "You Know, for Search"})
+        if parts[:2] == ["_cluster", "health"]:
+            with state.lock:
+                timed_out = state.health_timeouts > 0
+                state.health_timeouts = max(0, state.health_timeouts - 1)
+            return self.respond(200, {"cluster_name": "stub-cluster", "status": "green", "timed_out": timed_out,
+                                      "number_of_nodes": len(state.nodes),
+                                      "number_of_data_nodes": len(state.nodes), "active_primary_shards": len(state.indices),
+                                      "active_shards": len(state.indices), "relocating_shards": 0,
+                                      "initializing_shards": 0, "unassigned_shards": 0})
+        if parts[0] == "_stub":
+            if method == "GET":
+                return self.respond(200, {"open_pits": len(state.pits), "refreshes": {
+                    name: index.get("refreshes", 0) for name, index in state.indices.items()},
+                    "request_encodings": state.request_encodings})
+            with state.lock:
+                if method == "DELETE":
+                    state.indices.clear()
+                    state.aliases.clear()
+                    state.alias_options.clear()
+                    state.pits.clear()
+                    state.health_timeouts = 0
+                    state.request_encodings = {}
+                    state.bulk_statuses = []
+                    state.bulk_item_rejections = 0
+                    state.bulk_item_statuses = []
+                else:
+                    faults = json.loads(raw)
+                    state.bulk_statuses.extend(faults.get("bulk_statuses", []))
+                    state.bulk_item_rejections += faults.get("bulk_item_rejections", 0)
+                    state.bulk_item_statuses.extend(faults.get("bulk_item_statuses", []))
+                    state.health_timeouts += faults.get("health_timeouts", 0)
+            return self.respond(200, {"acknowledged": True})
+        if parts[0] == "_cat":
+            return self.respond(200, self.cat(parts[1], parts[2] if len(parts) > 2 else "*"))
+        if parts == ["_aliases"]:
+            with state.lock:
+                for action in json.loads(raw)["actions"]:
+                    (kind, arguments), = action.items()
+                    if kind == "add":
+                        state.aliases[arguments["alias"]] = arguments["index"]
+                    elif kind == "remove_index":
+                        state.indices.pop(arguments["index"], None)
+                        for alias in [alias for alias, target in state.aliases.items() if target == arguments["index"]]:
+                            del state.aliases[alias]
+            return self.respond(200, {"acknowledged": True})
+        if parts[0] == "_alias":
+            return self.respond(200, {state.aliases[name]: {"aliases": {name: state.alias_options.get(name, {})}}
+                                      for name in parts[1].split(",") if name in state.aliases})
+        if len(parts) >= 2 and parts[1] == "_rollover":
+            # The conditions are not evaluated: the stub always rolls over.
+            with state.lock:
+                old_index = state.aliases[parts[0]]
+                new_index = parts[2]
+                state.create(new_index, {"settings": state.indices[old_index]["body"].get("settings", {})})
+                state.aliases[parts[0]] = new_index
+            return self.respond(200, {"acknowledged": True, "rolled_over": True, "old_index": old_index,
+                                      "new_index": new_index})
+        if len(parts) == 3 and parts[1] == "_shrink":
+            with state.lock:
+                target = state.create(parts[2], {"settings": json.loads(raw).get("settings", {}) if raw else {}})
+                target["docs"] = list(state.indices[parts[0]]["docs"])
+            return self.respond(200, {"acknowledged": True, "shards_acknowledged": True, "index": parts[2]})
+        if parts[0] == "_nodes":
+            return self.respond(200, {"nodes": {
+                node_id: {"name": node_id, "roles": ["data", "ingest"], "http": {"publish_address": address}}
+                for node_id, address in state.nodes.items()
+            }})
+        if parts[-1] == "_search_shards":
+            # One primary per index, spread over the nodes in index creation order.
+            node_ids = sorted(state.nodes) or [self.node_id]
+            return self.respond(200, {"nodes": {node_id: {"name": node_id} for node_id in node_ids}, "shards": [
+                [{"index": name, "shard": 0, "primary": True, "state": "STARTED",
+                  "node": node_ids[list(state.indices).index(name) % len(node_ids)]}]
+                for name in state.resolve(parts[0])
+            ]})
+        if parts[-1] == "_bulk":
+            with state.lock:
+                status = state.bulk_statuses.pop(0) if state.bulk_statuses else None
+            if status is not None:
+                return self.respond(status, {"error": {"type": "stub_fault", "reason": f"injected {status}"},
+                                             "status": status})
+            return self.respond(200, self.bulk(raw))
+        if parts[-1] == "_msearch":
+            lines = [json.loads(line) for line in raw.splitlines() if line.strip()]
+            responses = [self.search(header.get("index"), body) for header, body in zip(lines[::2], lines[1::2])]
+            return self.respond(200, {"took": 1, "responses": [response for _, response in responses]})
+        if parts[-1] == "_search":
+            body = json.loads(raw) if raw else {}
+            status, response = self.search(parts[0] if len(parts) > 1 else None, body)
+            filter_path = parse_qs(url.query).get("filter_path")
+            if filter_path and status == 200:
+                response = filter_response(response, filter_path[0].split(","))
+            return self.respond(status, response)
+        if parts[-1] == "_pit":
+            if method == "DELETE":
+                freed = state.pits.pop(json.loads(raw)["id"], None) is not None
+                return self.respond(200, {"succeeded": True, "num_freed": int(freed)})
+            pit_id = f"pit-{next(state.pit_ids)}"
+            state.pits[pit_id] = parts[0]
+            return self.respond(200, {"id": pit_id})
+        if parts[-1] == "_count":
+            return self.respond(200, {"count": len(state.documents(parts[0]))})
+        if parts[-1] == "_doc":
+            with state.lock:
+                index_name = state.aliases.get(parts[0], parts[0])
+                index = state.indices.get(index_name) or state.create(index_name)
+                index["docs"].append(json.loads(raw))
+            return self.respond(201, {"_index": parts[0], "result": "created"})
+        if len(parts) >= 2 and parts[1] in ("_alias", "_aliases"):
+            if method == "PUT":
+                state.aliases[parts[-1]] = parts[0]
+                return self.respond(200, {"acknowledged": True})
+            return self.respond(200, {name: {"aliases": state.aliases_of(name)} for name in state.resolve(parts[0])})
+        if parts[-1] == "_forcemerge":
+            max_num_segments = int(parse_qs(url.query).get("max_num_segments", ["1"])[0])
+            with state.lock:
+                for name in state.resolve(parts[0]):
+                    state.indices[name]["segments"] = max_num_segments * len(state.shard_sizes(name))
+            return self.respond(200, {"_shards": {"total": 1, "successful": 1, "failed": 0}})
+        if parts[-1] == "_refresh":
+            with state.lock:
+                for name in state.resolve(parts[0]):
+                    state.indices[name]["refreshes"] = state.indices[name].get("refreshes", 0) + 1
+            return self.respond(200, {"_shards": {"total": 1, "successful": 1, "failed": 0}})
+        if len(parts) == 2 and parts[1] == "_settings" and method == "PUT":
+            with state.lock:
+                settings = state.indices[parts[0]]["body"].setdefault("settings", {})
+                for key, value in json.loads(raw).items():
+                    if value is None:
+                        settings.pop(key, None)
+                    else:
+                        settings[key] = value
+            return self.respond(200, {"acknowledged": True})
+        if len(parts) == 2 and parts[1] in ("_mapping", "_settings"):
+            body = state.indices.get(parts[0], {}).get("body", {})
+            if parts[1] == "_mapping":
+                return self.respond(200, {parts[0]: {"mappings": body.get("mappings", {})}})
+            settings = body.get("settings", {})
+            if parse_qs(url.query).get("flat_settings") == ["true"]:
+                settings = flat_settings(settings)
+            return self.respond(200, {parts[0]: {"settings": settings}})
+        if len(parts) >= 2 and parts[1] == "_stats":
+            docs = len(state.documents(parts[0]))
+            stats = {"docs": {"count": docs}, "refresh": {"total": docs}, "store": {"size_in_bytes": docs * DOCUMENT_BYTES}}
+            indices = {name: {"primaries": {"segments": {"count": state.indices[name].get(
+                           "segments", 10 * len(state.shard_sizes(name)))}}}
+                       for name in state.resolve(parts[0])}
+            return self.respond(200, {"_all": {"primaries": stats, "total": stats}, "indices": indices})
+        if len(parts) == 1 and method == "GET":
+            return self.respond(200, {
+                name: {"aliases": state.aliases_of(name),
+                       "mappings": state.indices[name]["body"].get("mappings", {}),
+                       "settings": state.indices[name]["body"].get("settings", {})}
+                for name in state.resolve(parts[0])
+            })
+        if len(parts) == 1 and method == "PUT":
+            with state.lock:
+                state.create(parts[0], json.loads(raw) if raw else None)
+            return self.respond(200, {"acknowledged": True, "index": parts[0]})
+        if len(parts) == 1 and method == "DELETE":
+            with state.lock:
+                state.indices.pop(parts[0], None)
+                for alias in [alias for alias, target in state.aliases.items() if target == parts[0]]:
+                    del state.aliases[alias]
+            return self.respond(200, {"acknowledged": True})
+        return self.respond(400, {"error": {"type": "unsupported_operation", "reason": f"{method} {url.path}"},
+                                  "status": 400})
+
+    def cat(self, kind, expression):
+        """Rows of `_cat/indices` and `_cat/shards` in their JSON form, with sizes in bytes."""
+        rows = []
+        for name in self.state.resolve(expression):
+            index = self.state.indices[name]
+            settings = flat_settings(index["body"].get("settings", {}))
+            sizes = self.state.shard_sizes(name)
+            if kind == "indices":
+                rows.append({"index": name, "pri": str(len(sizes)), "rep": str(settings.get("index.number_of_replicas", 1)),
+                             "docs.count": str(len(index["docs"])), "pri.store.size": str(sum(sizes)),
+                             "creation.date": str(index["created"]), "status": "open"})
+            else:
+                rows.extend({"index": name, "shard": str(shard), "prirep": "p", "state": "STARTED", "store": str(size),
+                             "node": settings.get("index.routing.allocation.require._name") or self.node_id}
+                            for shard, size in enumerate(sizes))
+        return rows
+
+    def bulk(self, raw):
+        lines = raw.splitlines()
+        items = []
+        with self.state.lock:
+            for action_line, source_line in zip(lines[::2], lines[1::2]):
+                action = json.loads(action_line)["index"]
+                if self.state.bulk_item_rejections:
+                    self.state.bulk_item_rejections -= 1
+                    items.append({"index": {"_index": action["_index"], "status": 429,
+                                            "error": {"type": "es_rejected_execution_exception"}}})
+                    continue
+                if self.state.bulk_item_statuses:
+                    status = self.state.bulk_item_statuses.pop(0)
+                    items.append({"index": {"_index": action["_index"], "status": status,
+                                            "error": {"type": "stub_fault", "reason": f"injected {status}"}}})
+                    continue
+                index_name = self.state.aliases.get(action["_index"], action["_index"])
+                index = self.state.indices.get(index_name) or self.state.create(index_name)
+                ids = index.setdefault("ids", {})
+                if "_id" in action and action["_id"] in ids:
+                    # Indexing an existing _id replaces the document, so a resumed load adds no duplicates.
+                    index["docs"][ids[action["_id"]]] = json.loads(source_line)
+                    items.append({"index": {"_index": action["_index"], "status": 200, "result": "updated"}})
+                    continue
+                if "_id" in action:
+                    ids[action["_id"]] = len(index["docs"])
+                index["docs"].append(json.loads(source_line))
+                items.append({"index": {"_index": action["_index"], "status": 201, "result": "created"}})
+        return {"took": 1, "errors": any(item["index"]["status"] >= 300 for item in items), "items": items}
+
+    def search(self, index_name, body):
+        if "pit" in body:
+            index_name = self.state.pits.get(body["pit"]["id"], index_name)
+        terms = [(name, aggregation["terms"]) for name, aggregation in body.get("aggs", {}).items()
+                 if aggregation.get("terms", {}).get("field") == "_index"]
+        if terms:
+            buckets = [{"key": name, "doc_count": len(self.state.documents(name))}
+                       for name in self.state.resolve(index_name or "*")]
+            return 200, {"took": 1, "timed_out": False, "hits": {"hits": []},
+                         "aggregations": {name: {"buckets": buckets} for name, _ in terms}}
+        if index_name not in self.state.indices and index_name not in self.state.aliases:
+            return 404, {"error": {"type": "index_not_found_exception", "index": index_name}, "status": 404}
+        docs = self.state.documents(index_name)
+        size = body.get("size", 10)
+        start = body["search_after"][-1] + 1 if "search_after" in body else body.get("from", 0)
+        positions = range(start, len(docs))
+        if "slice" in body:
+            positions = (position for position in positions if position % body["slice"]["max"] == body["slice"]["id"])
+        hits = []
+        for position in itertools.islice(positions, size):
+            hit = {"_index": index_name, "_id": str(position), "_score": 1.0, "sort": [position]}
+            if body.get("_source", True) is not False:
+                hit["_source"] = project_source(docs[position], body.get("_source", True))
+            if body.get("docvalue_fields"):
+                flat = flatten(docs[position])
+                hit["fields"] = {field: [flat[field]] for field in body["docvalue_fields"] if field in flat}
+            hits.append(hit)
+        response = {"took": 1, "timed_out": False, "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+                    "hits": {"total": {"value": len(docs), "relation": "eq"}, "max_score": 1.0, "hits": hits}}
+        if body.get("track_total_hits") is False:
+            del response["hits"]["total"]
+        if "pit" in body:
+            response["pit_id"] = body["pit"]["id"]
+        if body.get("profile"):
+            response["profile"] = {"shards": [{
+                "id": f"[{self.node_id}][{index_name}][0]",
+                "searches": [{
+                    "query": [{"type": "BooleanQuery", "description": json.dumps(body.get("query", {})),
+                               "time_in_nanos": 60000 + 10 * len(hits),
+                               "children": [{"type": "TermQuery", "description": "stub", "time_in_nanos": 25000}]}],
+                    "rewrite_time": 3000,
+                    "collector": [{"name": "SimpleTopScoreDocCollector", "reason": "search_top_hits",
+                                   "time_in_nanos": 8000}],
+                }],
+                "aggregations": [{"type": "StringTermsAggregatorFromFilters", "description": name,
+                                  "time_in_nanos": 40000} for name in body.get("aggs", {})],
+                "fetch": {"type": "fetch", "time_in_nanos": 5000 * len(hits)},
+            }]}
+        if "aggs" in body:
+            response["aggregations"] = {
+                name: {"doc_count_error_upper_bound": 0, "sum_other_doc_count": 0,
+                       "buckets": [{"key": key, "doc_count": len(docs) // 10} for key in range(10)]}
+                for name in body["aggs"]
+            }
+        return 200, response
+
+
+def flat_settings(settings):
+    """Return index settings as flat "index."-prefixed keys, as with `flat_settings=true`."""
+    flat = {}
+    for key, value in flatten(settings).items():
+        flat[key if key.startswith("index.") else f"index.{key}"] = value
+    return flat
+
+
+def flatten(document, prefix=""):
+    """Return the leaf values of a document under their dotted paths."""
+    flat = {}
+    for key, value in document.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def project_source(document, spec):
+    """Apply a `_source` includes/excludes spec (True, a list of patterns or a dict) to a document."""
+    if spec is True:
+        return document
+    includes = spec if isinstance(spec, list) else spec.get("includes", [])
+    excludes = [] if isinstance(spec, list) else spec.get("excludes", [])
+
+    def matches(path, patterns):
+        return any(fnmatch.fnmatchcase(path, pattern) or path.startswith(pattern + ".") for pattern in patterns)
+
+    projected = {}
+    for path, value in flatten(document).items():
+        if (includes and not matches(path, includes)) or matches(path, excludes):
+            continue
+        target = projected
+        *parents, leaf = path.split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = value
+    return projected
+
+
+def filter_response(value, paths):
+    """Keep the parts of a response named by `filter_path` patterns, e.g. "hits.hits._source"."""
+    if isinstance(value, list):
+        return [filter_response(item, paths) for item in value]
+    if not isinstance(value, dict):
+        return value
+    filtered = {}
+    for key, item in value.items():
+        rest = [path.split(".", 1)[1] if "." in path else None
+                for path in paths if fnmatch.fnmatchcase(key, path.split(".", 1)[0])]
+        if None in rest:
+            filtered[key] = item
+        elif rest:
+            kept = filter_response(item, rest)
+            if kept or kept == 0:
+                filtered[key] = kept
+    return filtered
+
+
+def serve(port, ready=None, nodes=1):
+    """Run the stub cluster on `port` until the process is terminated, with `nodes` nodes on consecutive free ports."""
+    state = StubState()
+    servers = []
+    for number in range(nodes):
+        handler = type("BoundStubHandler", (StubHandler,), {"state": state, "node_id": f"stub-node-{number}"})
+        server = ThreadingHTTPServer(("127.0.0.1", port if number == 0 else 0), handler)
+        state.nodes[handler.node_id] = f"127.0.0.1:{server.server_port}"
+        servers.append(server)
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    if ready is not None:
+        ready.put([server.server_port for server in servers])
+    servers[0].serve_forever()
+
+
+def start_stub_cluster(port=0, nodes=1):
+    """
+    Start the stub cluster in a separate process, so its CPU time is not counted as client time.
+    With `nodes` > 1 every node serves the same data on its own port, and the nodes are
+    reported by `_nodes/http` for sniffing.
+
+    Returns:
+        tuple: (base URL of the first node, process). Terminate the process to stop the cluster.
+    """
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(port, ready, nodes), daemon=True)
+    process.start()
+    return f"http://127.0.0.1:{ready.get(timeout=10)[0]}", process
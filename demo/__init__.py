@@ -1,5 +1,19 @@
 from .elk_connector import ELKConnector
+from .async_elk_connector import AsyncELKConnector
 from .kibana_client import KibanaClient
 from .data_generator import DataGenerator
+from .search_cache import SearchCache
+from .metadata_cache import MetadataCache
+from .search_coalescer import SearchCoalescer
+from .node_routing import LatencyTrackingNode, LeastLatencySelector
+from .instrumentation import Instrumentation, start_metrics_server
+from .serializers import LazySearchResponse, resolve_serializer
+from .query_compiler import QueryBuilder, canonical_key, compile_query, field_types_from_mapping
+from .query_profiler import QueryProfiler, query_shape
+from .exporter import SearchExporter, flatten_document
+from .lifecycle import IndexLifecycleManager, LifecyclePolicy, parse_index_name
+from .index_advisor import IndexAdvisor
+from .log_shipper import BulkShipper, ElasticsearchLogHandler, FileTailShipper, route_index
+from .log_parser import LogParser, compile_grok, normalize_date
 from .general import search_queries, search_filters, aggregations, sortings
 from .general import index_name_example_1, index_name_example_2, alias_name_example, index_mappings_example
\ No newline at end of file
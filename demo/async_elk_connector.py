@@ -0,0 +1,458 @@
+from elasticsearch import AsyncElasticsearch, NotFoundError
+from elastic_transport import (
+    ApiError,
+    ConnectionError,
+    ConnectionTimeout,
+    TransportError,
+)
+from .bulk import (
+    AdaptiveBatchSizer,
+    backoff_delay,
+    finish_bulk_summary,
+    merge_bulk_summary,
+    new_bulk_summary,
+    next_bulk_retry,
+    record_bulk_error,
+    record_bulk_response,
+    serialize_bulk_item,
+)
+from .elk_connector import build_search_body
+from .serializers import resolve_serializer
+import asyncio
+import logging
+import ssl
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncELKConnector():
+
+    def __init__(self, persistent=False, max_concurrent_searches=10, serializer="json", **elk_credentials):
+        """
+        Initialize the asyncio Elasticsearch connector.
+        :param host: Elasticsearch host URL, or several separated by commas.
+        :param hosts: List of Elasticsearch host URLs, used instead of `host`.
+        :param user: Username for authentication.
+        :param pass: Password for authentication.
+        :param certs: Path to the bundle of certificates for SSL verification.
+        :param max_concurrent_searches: Limit of searches in flight for `search_many`.
+        :param serializer: JSON serializer: "json" (default), "orjson" or "auto" (orjson when installed).
+        """
+        hosts = elk_credentials.get('hosts') or elk_credentials['host']
+        self.hosts = [host.strip() for host in hosts.split(",")] if isinstance(hosts, str) else list(hosts)
+        self.host = self.hosts[0]
+        self.username = elk_credentials['user']
+        self.password = elk_credentials['pass']
+        self.bundle_certs = elk_credentials['cert']
+        self.client = None
+        self.max_retries = 25
+        self.persistent = persistent
+        self.max_concurrent_searches = max_concurrent_searches
+        self.json_dumps, self.json_loads, self.serializers = resolve_serializer(serializer)
+        self.ssl_context = self.create_ssl_context()
+        logger.info("Used Elasticsearch Hosts %s with User %s", ", ".join(self.hosts), self.username)
+
+    def create_ssl_context(self):
+        """
+        Create the SSL context for connecting to Elasticsearch using the CA and client certificates.
+        Returns None when no CA certificate is configured, e.g. for a plain HTTP test cluster.
+        """
+        if not self.bundle_certs or not self.bundle_certs.get('ca_cert'):
+            return None
+        ssl_context = ssl.create_default_context(cafile=self.bundle_certs['ca_cert'])
+        ssl_context.load_cert_chain(certfile=self.bundle_certs['client_cert'], keyfile=self.bundle_certs['client_key'])
+        return ssl_context
+
+    async def connect(self):
+        """
+        Establish a connection to the Elasticsearch cluster.
+
+        Retries with exponential backoff and jitter, awaiting between attempts instead of
+        blocking the event loop, until connected or the maximum retry attempts are reached.
+
+        Returns:
+            AsyncElasticsearch: A connected Elasticsearch client instance.
+
+        Raises:
+            ConnectionError: If the connection cannot be established after retries.
+            TransportError: For other transport-level issues.
+        """
+        self.retry_attempts = 0
+
+        while self.persistent or self.retry_attempts < self.max_retries:
+            try:
+                if self.client is None:
+                    self.client = AsyncElasticsearch(
+                        hosts=self.hosts,
+                        basic_auth=(self.username, self.password),
+                        ssl_context=self.ssl_context,
+                        serializers=self.serializers
+                    )
+                if await self.client.ping():
+                    logger.info("Connected to Elasticsearch Successfully :: hosts %s", ", ".join(self.hosts))
+                    return self.client
+                else:
+                    raise ConnectionError("Elasticsearch client ping failed after connection.")
+
+            except (ConnectionError, ConnectionTimeout) as e:
+                logger.warning("[Attempt %d] Connection issue: %s: %s.", self.retry_attempts + 1, type(e).__name__, e)
+            except TransportError as e:
+                logger.error("Transport Error while connecting to Elasticsearch: %s", e)
+                raise
+            except Exception as e:
+                logger.error("Unexpected error: %s: %s", type(e).__name__, e)
+                raise
+
+            self.retry_attempts += 1
+
+            if self.retry_attempts == self.max_retries and not self.persistent:
+                logger.error("Maximum retries reached. Could not connect to Elasticsearch. Giving up!")
+                raise ConnectionError("Maximum retry attempts reached. Could not connect to Elasticsearch.")
+
+            await asyncio.sleep(backoff_delay(self.retry_attempts))
+
+    async def close(self):
+        """
+        Close the connection to the Elasticsearch cluster.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            await self.client.close()
+            logger.info("Connection closed successfully")
+        except Exception as e:
+            logger.error("Error closing connection: %s", e)
+            raise Exception(f"Error closing connection: {str(e)}")
+
+    async def info(self):
+        """
+        Retrieve information about the Elasticsearch cluster.
+
+        Returns:
+            dict: Information about the cluster.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            info = await self.client.info()
+            logger.info("Cluster Name: %s :: Version: %s", info['cluster_name'], info['version']['number'])
+            return info
+        except Exception as e:
+            logger.error("Error fetching cluster info: %s", e)
+            raise Exception(f"Error fetching cluster info: {str(e)}")
+
+    async def health(self):
+        """
+        Retrieve the health of the Elasticsearch cluster.
+
+        Returns:
+            dict: Health status of the cluster.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            health = await self.client.cluster.health()
+            logger.info("Cluster Name: %s :: Status: %s :: Nodes: %s :: Active Shards: %s", health['cluster_name'],
+                        health['status'], health['number_of_nodes'], health['active_shards'])
+            return health
+        except Exception as e:
+            logger.error("Error fetching cluster health: %s", e)
+            raise Exception(f"Error fetching cluster health: {str(e)}")
+
+    async def create_index(self, index_name, index_body):
+        """
+        Create an index in Elasticsearch.
+
+        Args:
+            index_name (str): Name of the index to be created.
+            index_body (dict): Index settings and mappings.
+
+        Returns:
+            bool: True if the index is created successfully.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        if await self.client.indices.exists(index=index_name):
+            logger.info("Index '%s' already exists.", index_name)
+            return {"acknowledged": "index exists"}
+        try:
+            response = await self.client.indices.create(index=index_name, body=index_body)
+            logger.info("Index '%s' created successfully", index_name)
+            logger.debug("Create index response: %s", response)
+            return True
+        except Exception as e:
+            logger.error("Error creating index: %s", e)
+            raise Exception(f"Error creating index: {str(e)}")
+
+    async def delete_index(self, index_name):
+        """
+        Delete an index from Elasticsearch.
+
+        Args:
+            index_name (str): Name of the index to be deleted.
+
+        Returns:
+            bool: True if the index is deleted successfully.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            response = await self.client.indices.delete(index=index_name)
+            logger.info("Index '%s' deleted successfully", index_name)
+            logger.debug("Delete index response: %s", response)
+            return True
+        except Exception as e:
+            logger.error("Error deleting index: %s", e)
+            raise Exception(f"Error deleting index: {str(e)}")
+
+    async def index_document(self, index_name, document_body):
+        """
+        Index a document in Elasticsearch.
+
+        Args:
+            index_name (str): Name of the index where the document will be indexed.
+            document_body (dict): Document data to be indexed.
+
+        Returns:
+            bool: True if the document is indexed successfully.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            await self.client.index(index=index_name, body=document_body)
+            return True
+        except Exception as e:
+            logger.error("Error indexing document: %s", e)
+            raise Exception(f"Error indexing document: {str(e)}")
+
+    async def put_alias_for_index(self, index_name, alias_name):
+        """
+        Create an alias for an index in Elasticsearch.
+
+        Returns:
+            bool: True if the alias is created successfully.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            response = await self.client.indices.put_alias(index=index_name, name=alias_name)
+            logger.info("Alias '%s' created successfully for index '%s'", alias_name, index_name)
+            logger.debug("Put alias response: %s", response)
+            return True
+        except Exception as e:
+            logger.error("Error creating alias: %s", e)
+            raise Exception(f"Error creating alias: {str(e)}")
+
+    async def get_index_total_docs(self, index_name):
+        """
+        Get the total number of documents in an index.
+
+        Returns:
+            int: Total number of documents in the index.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            response = await self.client.count(index=index_name)
+            return response['count']
+        except Exception as e:
+            logger.error("Error getting index total documents: %s", e)
+            raise Exception(f"Error getting index total documents: {str(e)}")
+
+    async def get_index_info(self, index_name):
+        """
+        Get the existence, document count, aliases, mappings and settings of an index.
+
+        The five requests are issued concurrently.
+
+        Returns:
+            dict: Information about the index.
+        """
+        exists, doc_count, aliases, mappings, settings = await asyncio.gather(
+            self.client.indices.exists(index=index_name),
+            self.get_index_total_docs(index_name=index_name),
+            self.client.indices.get_alias(index=index_name),
+            self.client.indices.get_mapping(index=index_name),
+            self.client.indices.get_settings(index=index_name),
+        )
+        return {
+            "name": index_name,
+            "exists": bool(exists),
+            "doc_count": doc_count,
+            "aliases": aliases,
+            "mappings": mappings,
+            "settings": settings
+        }
+
+    async def search(self, index_name, query=None, filters=None, sort=None, limit=10, offset=0, aggregations=None,
+                     source_includes=None, source_excludes=None, docvalue_fields=None, track_total_hits=None,
+                     filter_path=None, aggregations_only=False, field_types=None):
+        """
+        Perform a search query on an Elasticsearch index with optional filters, sorting, pagination, and aggregations.
+
+        Takes the same arguments as `ELKConnector.search`, except `response_format`.
+
+        Returns:
+            dict: The search results or an error response if the query fails.
+        """
+        try:
+            search_body = build_search_body(query, filters, sort, limit, offset, aggregations, source_includes,
+                                            source_excludes, docvalue_fields, track_total_hits, aggregations_only,
+                                            field_types)
+            response = await self.client.search(index=index_name, body=search_body, filter_path=filter_path)
+            return response.body
+        except NotFoundError:
+            logger.warning("Index '%s' does not exist.", index_name)
+            return {"error": "index does not exist"}
+        except Exception as e:
+            logger.error("Failed to execute search on index '%s': %s", index_name, e)
+            return None
+
+    async def search_many(self, searches, max_concurrency=None):
+        """
+        Run many searches concurrently, with at most `max_concurrency` in flight.
+
+        Args:
+            searches (list of dict): Keyword arguments for `search`, one dict per query.
+            max_concurrency (int, optional): Limit of concurrent searches. Default is `max_concurrent_searches`.
+
+        Returns:
+            list: The search results, in the order of `searches`.
+        """
+        limiter = asyncio.Semaphore(max_concurrency or self.max_concurrent_searches)
+
+        async def limited(arguments):
+            async with limiter:
+                return await self.search(**arguments)
+
+        return await asyncio.gather(*(limited(arguments) for arguments in searches))
+
+    async def bulk_index(self, index_name, docs_iterable, id_field=None, initial_batch_docs=500, max_batch_docs=5000,
+                         max_batch_bytes=10 * 1024 * 1024, target_latency=1.0, max_item_retries=3):
+        """
+        Stream documents into an index through the `_bulk` endpoint.
+
+        Takes the same arguments and returns the same summary as `ELKConnector.bulk_index`;
+        `docs_iterable` may also be an async iterable.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        return await self.parallel_bulk_index(index_name, docs_iterable, max_in_flight=1, id_field=id_field,
+                                              initial_batch_docs=initial_batch_docs, max_batch_docs=max_batch_docs,
+                                              max_batch_bytes=max_batch_bytes, target_latency=target_latency,
+                                              max_item_retries=max_item_retries)
+
+    async def parallel_bulk_index(self, index_name, docs_iterable, max_in_flight=4, id_field=None, initial_batch_docs=500,
+                                  max_batch_docs=5000, max_batch_bytes=10 * 1024 * 1024, target_latency=1.0,
+                                  max_item_retries=3):
+        """
+        Stream documents into an index with up to `max_in_flight` bulk requests running concurrently.
+
+        The producer awaits a free slot before cutting the next batch, so memory stays flat on
+        unbounded (async) generators.
+
+        Returns:
+            dict: The `ELKConnector.parallel_bulk_index` summary, without per-worker counters.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        sizer = AdaptiveBatchSizer(initial_docs=initial_batch_docs, max_docs=max_batch_docs,
+                                   max_bytes=max_batch_bytes, target_latency=target_latency)
+        summary = new_bulk_summary(index_name)
+        summary["errors"] = []
+        slots = asyncio.Semaphore(max_in_flight)
+        tasks = set()
+        started = time.perf_counter()
+
+        async def send(batch):
+            batch_summary = new_bulk_summary(index_name)
+            try:
+                await self._flush_bulk_batch(batch, sizer, batch_summary, max_item_retries)
+            except Exception as e:
+                summary["errors"].append(str(e))
+            finally:
+                merge_bulk_summary(summary, batch_summary)
+                slots.release()
+
+        async def dispatch(batch):
+            await slots.acquire()
+            task = asyncio.create_task(send(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        total = 0
+        dispatched = 0
+        batch = []
+        batch_bytes = 0
+        async for document in _aiterate(docs_iterable):
+            if summary["errors"]:
+                break
+            item = serialize_bulk_item(index_name, document, id_field, self.json_dumps)
+            batch.append((total, item))
+            batch_bytes += len(item)
+            total += 1
+            if sizer.is_full(len(batch), batch_bytes):
+                await dispatch(batch)
+                dispatched = total
+                batch = []
+                batch_bytes = 0
+        if batch and not summary["errors"]:
+            await dispatch(batch)
+            dispatched = total
+        if tasks:
+            await asyncio.gather(*tasks)
+
+        summary["total"] = total
+        summary["aborted"] = bool(summary["errors"])
+        finish_bulk_summary(summary, time.perf_counter() - started)
+        summary["resume_position"] = summary["failures"][0]["position"] if summary["failures"] else dispatched
+        logger.info("Bulk indexed %d/%d documents into '%s' (%s docs/s, %d failed)",
+                    summary['indexed'], total, index_name, summary['docs_per_sec'], summary['failed'])
+        return summary
+
+    async def _flush_bulk_batch(self, batch, sizer, summary, max_item_retries):
+        """
+        Send one bulk batch, retrying rejected items with non-blocking backoff. The outcome is
+        recorded by the same `demo.bulk` helpers as in `ELKConnector._flush_bulk_batch`.
+        """
+        pending = batch
+        attempt = 0
+        while pending:
+            body = b"".join(item for _, item in pending)
+            started = time.perf_counter()
+            try:
+                response = await self.client.options(retry_on_status=()).bulk(operations=body)
+                items = response["items"]
+            except (ApiError, TransportError) as e:
+                if not record_bulk_error(summary, pending, e):
+                    raise Exception(f"Error bulk indexing documents: {str(e)}") from e
+                items = None
+            latency = time.perf_counter() - started
+
+            retry = record_bulk_response(summary, pending, items, len(body))
+            sizer.record(latency, rejected=bool(retry))
+            if retry:
+                attempt += 1
+                delay = next_bulk_retry(summary, retry, attempt, max_item_retries)
+                if delay is None:
+                    return
+                await asyncio.sleep(delay)
+            pending = retry
+
+
+async def _aiterate(iterable):
+    """Iterate over a sync or async iterable from a coroutine."""
+    if hasattr(iterable, "__aiter__"):
+        async for item in iterable:
+            yield item
+    else:
+        for item in iterable:
+            yield item
@@ -0,0 +1,190 @@
+from elastic_transport import ApiError
+from .serializers import stdlib_dumps
+import random
+import threading
+
+
+RETRYABLE_STATUSES = (429,)
+
+
+class AdaptiveBatchSizer:
+    def __init__(self, initial_docs=500, min_docs=50, max_docs=5000, max_bytes=10 * 1024 * 1024, target_latency=1.0):
+        """
+        Track the size of the next bulk batch and adapt it to the cluster.
+        :param initial_docs: Number of documents in the first batch.
+        :param min_docs: Lower bound for the batch document count.
+        :param max_docs: Upper bound for the batch document count.
+        :param max_bytes: Upper bound for the batch body size in bytes.
+        :param target_latency: Bulk round trip time (seconds) the sizer aims for.
+        """
+        self.min_docs = min_docs
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self.target_latency = target_latency
+        self.batch_docs = max(min_docs, min(initial_docs, max_docs))
+        self._lock = threading.Lock()
+
+    def is_full(self, docs, size):
+        """Return True when a batch with `docs` documents and `size` bytes should be flushed."""
+        return docs >= self.batch_docs or size >= self.max_bytes
+
+    def record(self, latency, rejected=False):
+        """
+        Adjust the batch size after a bulk request.
+
+        Args:
+            latency (float): Seconds the bulk request took.
+            rejected (bool): True if the cluster answered with 429 for the request or any of its items.
+        """
+        with self._lock:
+            if rejected:
+                self.batch_docs = max(self.min_docs, self.batch_docs // 2)
+            elif latency > self.target_latency * 1.5:
+                self.batch_docs = max(self.min_docs, int(self.batch_docs * 0.75))
+            elif latency < self.target_latency * 0.5:
+                self.batch_docs = min(self.max_docs, int(self.batch_docs * 1.5) + 1)
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter for the given retry attempt (starting at 1)."""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+def serialize_bulk_item(index_name, document, id_field=None, dumps=stdlib_dumps):
+    """
+    Serialize one document into its `_bulk` action and source lines.
+
+    Args:
+        index_name (str): Target index of the document.
+        document (dict): Document body.
+        id_field (str, optional): Document field used as `_id`, making retries idempotent.
+        dumps (callable, optional): Function serializing a dict to JSON bytes.
+
+    Returns:
+        bytes: The NDJSON action and source lines, newline terminated.
+    """
+    action = {"index": {"_index": index_name}}
+    if id_field and id_field in document:
+        action["index"]["_id"] = str(document[id_field])
+    return dumps(action) + b"\n" + dumps(document) + b"\n"
+
+
+def serialize_bulk_batch(index_name, documents, id_field=None, dumps=stdlib_dumps):
+    """Serialize a list of documents into bulk items; module level so it can run in a process pool."""
+    return [serialize_bulk_item(index_name, document, id_field, dumps) for document in documents]
+
+
+def new_bulk_summary(index_name):
+    """Return an empty summary dictionary for a bulk load into `index_name`."""
+    return {
+        "index": index_name,
+        "total": 0,
+        "indexed": 0,
+        "failed": 0,
+        "retried": 0,
+        "rejections": 0,
+        "batches": 0,
+        "bytes": 0,
+        "elapsed": 0.0,
+        "docs_per_sec": 0.0,
+        "mb_per_sec": 0.0,
+        "failures": [],
+    }
+
+
+def record_bulk_failures(summary, items, status, error):
+    """Report every (position, item) pair in `items` as failed in `summary`."""
+    for position, _ in items:
+        summary["failures"].append({"position": position, "status": status, "error": error})
+
+
+def record_bulk_error(summary, pending, error):
+    """
+    Handle a bulk request that failed as a whole.
+
+    Args:
+        summary (dict): Bulk summary updated in place.
+        pending (list of tuple): (position, serialized item) pairs of the request.
+        error (Exception): The ApiError or TransportError raised by the request.
+
+    Returns:
+        bool: True when the cluster rejected the request with a retryable status, so every item
+        should be retried; otherwise the items are recorded as failed.
+    """
+    status = error.meta.status if isinstance(error, ApiError) else None
+    if status in RETRYABLE_STATUSES:
+        return True
+    record_bulk_failures(summary, pending, status, str(error))
+    return False
+
+
+def record_bulk_response(summary, pending, items, body_bytes):
+    """
+    Record the per-item outcome of one bulk request in `summary`.
+
+    Args:
+        summary (dict): Bulk summary updated in place.
+        pending (list of tuple): (position, serialized item) pairs of the request, in order.
+        items (list or None): The `items` of the response, None when the whole request was
+            rejected with a retryable status.
+        body_bytes (int): Size of the uncompressed request body.
+
+    Returns:
+        list: The (position, serialized item) pairs rejected with a retryable status.
+    """
+    summary["batches"] += 1
+    summary["bytes"] += body_bytes
+    if items is None:
+        return list(pending)
+    retry = []
+    for (position, item), result in zip(pending, items):
+        outcome = next(iter(result.values()))
+        status = outcome.get("status", 500)
+        if status < 300:
+            summary["indexed"] += 1
+        elif status in RETRYABLE_STATUSES:
+            retry.append((position, item))
+        else:
+            summary["failures"].append({"position": position, "status": status, "error": outcome.get("error")})
+    return retry
+
+
+def next_bulk_retry(summary, retry, attempt, max_item_retries):
+    """
+    Account for the items a bulk request had rejected before retrying them.
+
+    Args:
+        summary (dict): Bulk summary updated in place.
+        retry (list of tuple): The rejected (position, serialized item) pairs.
+        attempt (int): Retry attempt about to be made, starting at 1.
+        max_item_retries (int): Retries allowed before the items are reported as failed.
+
+    Returns:
+        float or None: Seconds to wait before the retry, or None when the retries are exhausted
+        and the items were recorded as failed.
+    """
+    summary["rejections"] += 1
+    if attempt > max_item_retries:
+        record_bulk_failures(summary, retry, 429, "rejected, retries exhausted")
+        return None
+    summary["retried"] += len(retry)
+    return backoff_delay(attempt)
+
+
+def merge_bulk_summary(summary, batch_summary):
+    """Add the counters and failures of a single batch summary into `summary`."""
+    for key in ("indexed", "retried", "rejections", "batches", "bytes"):
+        summary[key] += batch_summary[key]
+    summary["failures"].extend(batch_summary["failures"])
+    return summary
+
+
+def finish_bulk_summary(summary, elapsed):
+    """Fill in the elapsed time and throughput figures of a bulk summary."""
+    summary["elapsed"] = round(elapsed, 3)
+    if elapsed > 0:
+        summary["docs_per_sec"] = round(summary["indexed"] / elapsed, 1)
+        summary["mb_per_sec"] = round(summary["bytes"] / elapsed / (1024 * 1024), 3)
+    summary["failures"].sort(key=lambda failure: failure["position"])
+    summary["failed"] = len(summary["failures"])
+    return summary
@@ -1,10 +1,23 @@
 import random
 import string
 import datetime
-from typing import Any, Dict
+import gc
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+ALPHABET = np.frombuffer((string.ascii_letters + string.digits).encode(), dtype=np.uint8)
+DOCUMENT_TEMPLATE = (
+    '{"id":"%s","name":"%s","age":%d,"email":"%s@%s.com","score":%.2f,"active":%s,"created_at":"%s",'
+    '"metadata":{"name":"%s","attributes":{"name":"%s","attributes":{"value":"%s"}}}}'
+)
+
 
 class DataGenerator:
     def __init__(self, seed: int = None):
+        self.seed = seed
         if seed is not None:
             random.seed(seed)
     
@@ -59,3 +72,226 @@ class DataGenerator:
             "metadata": self.generate_nested_object(2)
         }
 
+    def generate_batch(self, count: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Generate `count` documents shaped like `generate_random_data` with vectorized NumPy sampling.
+
+        The same seed always yields the same documents. Defaults to the generator seed.
+        """
+        columns = _sample_columns(np.random.default_rng(self.seed if seed is None else seed), count)
+        # Building millions of small dicts triggers repeated, useless cyclic GC passes.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return [
+                {
+                    "id": doc_id,
+                    "name": name,
+                    "age": age,
+                    "email": f"{user}@{domain}.com",
+                    "score": score,
+                    "active": active,
+                    "created_at": created_at,
+                    "metadata": {"name": meta_name, "attributes": {"name": attr_name, "attributes": {"value": value}}},
+                }
+                for doc_id, name, age, user, domain, score, active, created_at, meta_name, attr_name, value in zip(*columns)
+            ]
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    def generate_bulk_ndjson(self, count: int, index_name: str, seed: Optional[int] = None) -> bytes:
+        """
+        Generate `count` documents directly as a pre-serialized `_bulk` NDJSON body.
+
+        Every generated string is alphanumeric, so documents are formatted without JSON escaping.
+        """
+        return _bulk_ndjson(index_name, _sample_columns(np.random.default_rng(self.seed if seed is None else seed), count))
+
+    def generate_bulk_files(self, count: int, index_name: str, output_dir: str, chunk_size: int = 1_000_000,
+                            workers: Optional[int] = None) -> List[str]:
+        """
+        Write `count` documents as NDJSON bulk bodies, one file per chunk, using a process pool.
+
+        Each chunk gets its own child seed of the generator seed, so the output does not depend
+        on the number of workers.
+
+        Returns:
+            list: Paths of the written files, in chunk order.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        seeds = np.random.SeedSequence(self.seed).spawn((count + chunk_size - 1) // chunk_size)
+        tasks = []
+        for chunk, chunk_seed in enumerate(seeds):
+            path = os.path.join(output_dir, f"{index_name}-{chunk:05d}.ndjson")
+            tasks.append((path, index_name, min(chunk_size, count - chunk * chunk_size), chunk_seed))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_write_bulk_file, *zip(*tasks))) if tasks else []
+
+    def generate_from_mappings(self, mappings: Dict[str, Any], count: int,
+                               field_specs: Optional[Dict[str, Dict[str, Any]]] = None,
+                               seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Generate `count` documents following an index mapping, such as `index_mappings_example`.
+
+        Supports nested `properties` and the keyword, text, date, integer (long, short, byte),
+        float (double, half_float, scaled_float) and boolean types. Each leaf field can be tuned
+        through `field_specs`, keyed by its dotted path (e.g. "metadata.attributes.name"):
+
+            cardinality (int): Number of distinct values; None draws fresh values for every document.
+            distribution (str): "uniform", "zipf" (a few values dominate) or "time_skewed"
+                (later values, e.g. recent dates, are more frequent). Default is "uniform".
+            skew (float): Zipf exponent or time skew strength. Default is 1.2 for zipf, 4.0 for time_skewed.
+            sparsity (float): Fraction of documents in which the field is missing. Default is 0.
+            min / max: Value range for integer and float fields.
+            start / end (str): ISO date range for date fields. Default is 2010-01-01 to 2025-12-31.
+            length (int): Length of keyword values and of the words of text values. Default is 10.
+            words (int): Number of words in text values. Default is 1.
+
+        Returns:
+            list: Generated documents.
+
+        Raises:
+            ValueError: If the mapping uses an unsupported field type or distribution.
+        """
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+        field_specs = field_specs or {}
+        columns = []
+        for path, field_mapping in _mapping_leaves(mappings):
+            spec = field_specs.get(".".join(path), {})
+            values = _sample_field(rng, field_mapping, spec, count)
+            present = (rng.random(count) >= spec.get("sparsity", 0.0)).tolist()
+            columns.append((path, values, present))
+
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            documents = []
+            for row in range(count):
+                document = {}
+                for path, values, present in columns:
+                    if not present[row]:
+                        continue
+                    target = document
+                    for key in path[:-1]:
+                        target = target.setdefault(key, {})
+                    target[path[-1]] = values[row]
+                documents.append(document)
+            return documents
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+
+def _mapping_leaves(mappings, prefix=()):
+    """Yield (path, field mapping) for every leaf field of a mapping, index body or properties dict."""
+    if "mappings" in mappings:
+        mappings = mappings["mappings"]
+    properties = mappings.get("properties", mappings)
+    for name, field_mapping in properties.items():
+        if "properties" in field_mapping:
+            yield from _mapping_leaves(field_mapping, prefix + (name,))
+        else:
+            yield prefix + (name,), field_mapping
+
+
+def _value_indices(rng, cardinality, count, spec):
+    """Pick `count` positions in a vocabulary of `cardinality` values following the spec distribution."""
+    distribution = spec.get("distribution", "uniform")
+    if distribution == "uniform":
+        return rng.integers(0, cardinality, size=count)
+    if distribution == "zipf":
+        weights = 1.0 / np.arange(1, cardinality + 1) ** spec.get("skew", 1.2)
+    elif distribution == "time_skewed":
+        weights = np.exp(np.linspace(0.0, spec.get("skew", 4.0), cardinality))
+    else:
+        raise ValueError(f"Unsupported distribution '{distribution}'")
+    return rng.choice(cardinality, size=count, p=weights / weights.sum())
+
+
+def _sample_field(rng, field_mapping, spec, count):
+    """Return `count` values for one leaf field, drawn from a vocabulary when a cardinality is set."""
+    field_type = field_mapping.get("type", "object")
+    cardinality = spec.get("cardinality")
+    size = cardinality or count
+
+    if field_type == "keyword":
+        vocabulary = _random_strings(rng, size, spec.get("length", 10))
+    elif field_type == "text":
+        words = spec.get("words", 1)
+        tokens = _random_strings(rng, size * words, spec.get("length", 10))
+        vocabulary = [" ".join(tokens[start:start + words]) for start in range(0, len(tokens), words)]
+    elif field_type in ("integer", "long", "short", "byte"):
+        vocabulary = _sample_range(rng, spec.get("min", 0), spec.get("max", 100), size, cardinality).tolist()
+    elif field_type in ("float", "double", "half_float", "scaled_float"):
+        vocabulary = np.round(rng.uniform(spec.get("min", 0.0), spec.get("max", 100.0), size=size), 2).tolist()
+    elif field_type == "boolean":
+        vocabulary = [False, True] if cardinality is None or cardinality > 1 else [True]
+        cardinality = len(vocabulary)
+    elif field_type == "date":
+        unit = "s" if "HH" in field_mapping.get("format", "yyyy-MM-dd'T'HH") else "D"
+        start = np.datetime64(spec.get("start", "2010-01-01"), unit)
+        end = np.datetime64(spec.get("end", "2025-12-31"), unit)
+        offsets = _sample_range(rng, 0, int((end - start) / np.timedelta64(1, unit)), size, cardinality)
+        vocabulary = (start + offsets.astype(f"timedelta64[{unit}]")).astype(str).tolist()
+    else:
+        raise ValueError(f"Unsupported field type '{field_type}'")
+
+    if spec.get("distribution") == "time_skewed":
+        vocabulary.sort()
+    if cardinality is None and field_type != "boolean":
+        if spec.get("distribution", "uniform") == "uniform":
+            return vocabulary
+        cardinality = size
+    indices = _value_indices(rng, cardinality, count, spec).tolist()
+    return [vocabulary[index] for index in indices]
+
+
+def _sample_range(rng, low, high, size, cardinality):
+    """Sample `size` integers in [low, high], all distinct when a cardinality is requested and the range allows it."""
+    if cardinality is not None and cardinality <= high - low + 1:
+        return low + rng.choice(high - low + 1, size=size, replace=False)
+    return rng.integers(low, high + 1, size=size)
+
+
+def _random_strings(rng, count, length):
+    """Return `count` random alphanumeric strings of `length` characters."""
+    characters = ALPHABET[rng.integers(0, len(ALPHABET), size=(count, length), dtype=np.uint8)].tobytes().decode()
+    return [characters[start:start + length] for start in range(0, len(characters), length)]
+
+
+def _sample_columns(rng, count):
+    """Sample every field of `count` documents column by column."""
+    days = (datetime.date(2025, 12, 31) - datetime.date(2010, 1, 1)).days
+    created_at = np.datetime64("2010-01-01") + rng.integers(0, days + 1, size=count)
+    return (
+        _random_strings(rng, count, 8),
+        _random_strings(rng, count, 12),
+        rng.integers(18, 66, size=count).tolist(),
+        _random_strings(rng, count, 8),
+        _random_strings(rng, count, 6),
+        np.round(rng.uniform(0.0, 100.0, size=count), 2).tolist(),
+        (rng.random(count) < 0.5).tolist(),
+        created_at.astype(str).tolist(),
+        _random_strings(rng, count, 10),
+        _random_strings(rng, count, 10),
+        _random_strings(rng, count, 10),
+    )
+
+
+def _bulk_ndjson(index_name, columns):
+    """Format sampled columns as `_bulk` index actions and documents."""
+    action = '{"index":{"_index":"%s"}}\n' % index_name
+    lines = [
+        action + DOCUMENT_TEMPLATE % (doc_id, name, age, user, domain, score, "true" if active else "false",
+                                      created_at, meta_name, attr_name, value)
+        for doc_id, name, age, user, domain, score, active, created_at, meta_name, attr_name, value in zip(*columns)
+    ]
+    return ("\n".join(lines) + "\n").encode() if lines else b""
+
+
+def _write_bulk_file(path, index_name, count, seed):
+    """Generate one chunk of documents and write it as an NDJSON bulk body; runs in a worker process."""
+    with open(path, "wb") as output:
+        output.write(_bulk_ndjson(index_name, _sample_columns(np.random.default_rng(seed), count)))
+    return path
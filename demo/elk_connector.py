@@ -3,41 +3,199 @@ from elastic_transport import (
     ApiError,
     ConnectionError,
     ConnectionTimeout,
+    HttpHeaders,
     TransportError,
 )
+from .node_routing import (
+    NODE_SELECTORS,
+    LatencyTrackingNode,
+    LeastLatencySelector,
+    live_node_configs,
+    node_address,
+    node_stats,
+)
+from .query_compiler import compile_query, sort_uses_score
+from .search_coalescer import SearchCoalescer
+from .serializers import LazySearchResponse, RequestCompressor, resolve_serializer
+from .bulk import (
+    AdaptiveBatchSizer,
+    backoff_delay,
+    finish_bulk_summary,
+    merge_bulk_summary,
+    new_bulk_summary,
+    next_bulk_retry,
+    record_bulk_error,
+    record_bulk_failures,
+    record_bulk_response,
+    serialize_bulk_batch,
+    serialize_bulk_item,
+)
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import quote
+import itertools
+import json
+import logging
+import queue
 import ssl
+import threading
 import time
 
+logger = logging.getLogger(__name__)
+
+# Index settings applied for the duration of a bulk load: no periodic refresh, no replicas to
+# copy every document to, and translog fsyncs in the background rather than on every request.
+BULK_LOAD_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.number_of_replicas": 0,
+    "index.translog.durability": "async",
+}
+
+
+def build_search_body(query=None, filters=None, sort=None, limit=10, offset=0, aggregations=None,
+                      source_includes=None, source_excludes=None, docvalue_fields=None, track_total_hits=None,
+                      aggregations_only=False, field_types=None):
+    """
+    Build a search request body from the `ELKConnector.search` arguments. The query and filters
+    are combined by `compile_query`; the caller's dicts are not modified.
+
+    Returns:
+        dict: The body to send to the `_search` endpoint.
+    """
+    search_body = {
+        "from": 0 if aggregations_only else offset,
+        "size": 0 if aggregations_only else limit,
+    }
+
+    if query or filters:
+        scoring = search_body["size"] != 0 and sort_uses_score(sort)
+        search_body["query"] = compile_query(query, filters, field_types, scoring)
+
+    if sort:
+        search_body["sort"] = sort
+
+    if aggregations:
+        search_body["aggs"] = aggregations
+
+    if source_includes is False:
+        search_body["_source"] = False
+    elif source_includes or source_excludes:
+        search_body["_source"] = {}
+        if source_includes:
+            search_body["_source"]["includes"] = list(source_includes)
+        if source_excludes:
+            search_body["_source"]["excludes"] = list(source_excludes)
+
+    if docvalue_fields:
+        search_body["docvalue_fields"] = list(docvalue_fields)
+
+    if track_total_hits is not None:
+        search_body["track_total_hits"] = track_total_hits
+    return search_body
+
 
 class ELKConnector():
     
-    def __init__(self, persistent=False, **elk_credentials):
+    def __init__(self, persistent=False, pool_size=10, keep_alive=300, search_cache=None, coalesce_window_ms=None,
+                 instrumentation=None, serializer="json", metadata_cache=None, compression=None, compression_level=6,
+                 compression_min_bytes=1024, node_selector="round_robin", sniff=False, dead_node_backoff=1.0,
+                 max_dead_node_backoff=30.0, shard_aware_bulk=False, profiler=None, **elk_credentials):
         """
         Initialize the Elasticsearch connector.
-        :param host: Elasticsearch host URL.
+        :param host: Elasticsearch host URL, or several separated by commas.
+        :param hosts: List of Elasticsearch host URLs, used instead of `host`.
         :param user: Username for authentication.
         :param pass: Password for authentication.
         :param certs: Path to the bundle of certificates for SSL verification.
+        :param pool_size: Number of pooled HTTP connections kept per node by the client.
+        :param keep_alive: Seconds the pooled client may stay idle before it is closed and
+            lazily rebuilt on next use. None keeps it open until `close`.
+        :param search_cache: Optional SearchCache for `search` results, invalidated on writes made through the connector.
+        :param coalesce_window_ms: When set, concurrent `search` calls arriving within this many
+            milliseconds are sent together as one `_msearch` request.
+        :param instrumentation: Optional Instrumentation collecting latencies, byte counts and counters.
+        :param serializer: JSON serializer for requests and responses: "json" (default), "orjson"
+            or "auto" (orjson when installed). orjson is faster but writes datetimes in ISO 8601,
+            NaN as null and refuses integers beyond 64 bits, so it is opt-in.
+        :param metadata_cache: Optional MetadataCache of index existence and metadata, consulted by
+            `create_index`, `search` and `get_indices_info` instead of their own lookups.
+        :param compression: "gzip" or "deflate" to compress bulk, msearch and raw search request bodies
+            and accept compressed responses. None (default) sends everything uncompressed.
+        :param compression_level: Compression level from 1 (fastest) to 9 (smallest).
+        :param compression_min_bytes: Bodies smaller than this are sent uncompressed.
+        :param node_selector: How requests are spread over the live nodes: "round_robin", "random",
+            "least_latency" (the faster of two random nodes) or a NodeSelector subclass.
+        :param sniff: Discover the cluster nodes on connect and after a node failure, and refresh
+            them every `sniff_interval` seconds. Dedicated master nodes are left out.
+        :param dead_node_backoff: Seconds a failed node is taken out of rotation, doubled on each
+            consecutive failure. A successful request to the node after the timeout closes it again.
+        :param max_dead_node_backoff: Upper bound of the dead node timeout.
+        :param shard_aware_bulk: Send bulk requests to the nodes holding the primary shards of the
+            target index, rather than to any node.
+        :param profiler: Optional QueryProfiler. `search` then times serialization, network and
+            decoding separately, runs the `profile` API on sampled searches and bypasses the coalescer.
         """
-        self.host = elk_credentials['host']
+        if isinstance(node_selector, str) and node_selector not in NODE_SELECTORS:
+            raise ValueError(f"Unknown node selector '{node_selector}', expected one of {', '.join(NODE_SELECTORS)}")
+        hosts = elk_credentials.get('hosts') or elk_credentials['host']
+        self.hosts = [host.strip() for host in hosts.split(",")] if isinstance(hosts, str) else list(hosts)
+        self.host = self.hosts[0]
         self.username = elk_credentials['user']
         self.password = elk_credentials['pass']
         self.bundle_certs = elk_credentials['cert']
         self.client = None
         self.connected = 0
         self.max_retries = 25
+        self.connect_backoff_base = 0.5
+        self.connect_backoff_max = 10.0
         self.persistent = persistent
         self.retrieve_retries = 4
         self.update_retries = 4
         self.append_retries = 4
         self.get_client_timeout = 25
+        self.force_merge_timeout = 3600
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.last_used = None
+        self.client_lock = threading.Lock()
+        self.connection_counters = {"connects": 0, "reuses": 0, "verifications": 0, "connect_seconds": 0.0}
+        self.search_cache = search_cache
+        self.metadata_cache = metadata_cache
+        self.search_coalescer = SearchCoalescer(self._msearch, window_ms=coalesce_window_ms) if coalesce_window_ms else None
+        self.json_dumps, self.json_loads, self.serializers = resolve_serializer(serializer)
+        self.compressor = RequestCompressor(compression, compression_level, compression_min_bytes) if compression else None
+        self.node_selector = LeastLatencySelector if node_selector == "least_latency" else node_selector
+        self.sniff = sniff
+        self.sniff_interval = 60.0
+        self.dead_node_backoff = dead_node_backoff
+        self.max_dead_node_backoff = max_dead_node_backoff
+        self.shard_aware_bulk = shard_aware_bulk
+        self.shard_routing_ttl = 30.0
+        self.primary_nodes = {}
+        self.primary_nodes_lock = threading.Lock()
+        self.profiler = profiler
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.add_collector("connection", self.connection_stats)
+            instrumentation.add_collector("nodes", self.node_stats)
+            if search_cache is not None:
+                instrumentation.add_collector("search_cache", search_cache.stats)
+            if metadata_cache is not None:
+                instrumentation.add_collector("metadata_cache", metadata_cache.stats)
+            if self.compressor is not None:
+                instrumentation.add_collector("compression", self.compressor.stats)
+            if profiler is not None:
+                instrumentation.add_collector("profiler", profiler.stats)
         self.ssl_context = self.create_ssl_context()
-        print(f"Used Elasticsearch Host {self.host} with User {self.username}")
+        logger.info("Used Elasticsearch Hosts %s with User %s", ", ".join(self.hosts), self.username)
     
     def create_ssl_context(self):
         """
         Create the SSL context for connecting to Elasticsearch using the CA and client certificates.
+        Returns None when no CA certificate is configured, e.g. for a plain HTTP test cluster.
         """
+        if not self.bundle_certs or not self.bundle_certs.get('ca_cert'):
+            return None
         ssl_context = ssl.create_default_context(cafile=self.bundle_certs['ca_cert'])
         ssl_context.load_cert_chain(certfile=self.bundle_certs['client_cert'], keyfile=self.bundle_certs['client_key'])
         return ssl_context
@@ -56,15 +214,17 @@ class ELKConnector():
         Raises:
             ConnectionError: If the Elasticsearch client is not alive.
         """
-        if not self.is_alive():
-            self.client = self.connect()
+        with self.client_lock:
+            if not self.is_alive():
+                self.client = self.connect()
 
     def connect(self):
         """
         Establish a connection to the Elasticsearch cluster.
 
-        This method will attempt to connect to Elasticsearch repeatedly with a delay
-        until the connection is established or maximum retry attempts are reached.
+        This method will attempt to connect to Elasticsearch repeatedly, with exponential backoff
+        and jitter between attempts, until the connection is established or maximum retry attempts
+        are reached. With several hosts, any live one is enough.
 
         Returns:
             Elasticsearch: A connected Elasticsearch client instance.
@@ -78,37 +238,302 @@ class ELKConnector():
 
         while self.persistent or self.retry_attempts < self.max_retries:
             try:
+                started = time.perf_counter()
+                sniffing = {
+                    "sniff_on_start": True,
+                    "sniff_on_node_failure": True,
+                    "min_delay_between_sniffing": self.sniff_interval,
+                } if self.sniff else {}
                 self.client = Elasticsearch(
-                    hosts=[self.host],
+                    hosts=self.hosts,
                     basic_auth=(self.username, self.password),
-                    ssl_context=self.ssl_context
+                    ssl_context=self.ssl_context,
+                    connections_per_node=self.pool_size,
+                    serializers=self.serializers,
+                    headers={"accept-encoding": "gzip, deflate"} if self.compressor is not None else None,
+                    node_class=LatencyTrackingNode,
+                    node_selector_class=self.node_selector,
+                    dead_node_backoff_factor=self.dead_node_backoff,
+                    max_dead_node_backoff=self.max_dead_node_backoff,
+                    **sniffing
                 )
                 if self.client.ping():
-                    print(f"Connected to Elasticsearch Successfully :: host {self.host}")
+                    self.connection_counters["connects"] += 1
+                    self.connection_counters["connect_seconds"] += time.perf_counter() - started
+                    self.last_used = time.monotonic()
+                    self._observe("connect", started)
+                    logger.info("Connected to Elasticsearch Successfully :: hosts %s", ", ".join(self.hosts))
                     return self.client
                 else:
                     raise ConnectionError("Elasticsearch client ping failed after connection.")
 
             except (ConnectionError, ConnectionTimeout) as e:
-                print(ConnectionError)
-                print(f"[Attempt {self.retry_attempts+1}] Connection issue: {type(e).__name__}: {str(e)}. Retrying in 3 seconds...")
+                logger.warning("[Attempt %d] Connection issue: %s: %s. Retrying...",
+                               self.retry_attempts + 1, type(e).__name__, e)
             except TransportError as e:
-                print(f"Transport Error while connecting to Elasticsearch: {str(e)}")
+                logger.error("Transport Error while connecting to Elasticsearch: %s", e)
                 raise
             except Exception as e:
-                print(f"Unexpected error: {type(e).__name__}: {str(e)}")
+                logger.error("Unexpected error: %s: %s", type(e).__name__, e)
                 raise
 
             self.retry_attempts += 1
+            if self.instrumentation is not None:
+                self.instrumentation.increment("connect_retries")
 
             if self.retry_attempts == 10:
-                print("Still trying to connect to Elasticsearch after 10 attempts...")
+                logger.warning("Still trying to connect to Elasticsearch after 10 attempts...")
             if self.retry_attempts == self.max_retries and not self.persistent:
-                print("Maximum retries reached. Could not connect to Elasticsearch. Giving up!")
+                logger.error("Maximum retries reached. Could not connect to Elasticsearch. Giving up!")
                 raise ConnectionError("Maximum retry attempts reached. Could not connect to Elasticsearch.")
 
-            time.sleep(3)
+            time.sleep(backoff_delay(min(self.retry_attempts, 16), self.connect_backoff_base, self.connect_backoff_max))
     
+    def get_client(self):
+        """
+        Return the long-lived pooled client, connecting only when there is none yet or it was
+        idle for longer than `keep_alive`. Safe to call from several threads.
+
+        Returns:
+            Elasticsearch: A connected Elasticsearch client instance.
+        """
+        with self.client_lock:
+            now = time.monotonic()
+            if self.client is not None and self.keep_alive is not None and self.last_used is not None \
+                    and now - self.last_used > self.keep_alive:
+                # Not closed: threads that fetched it earlier may still be in a request on it. Its
+                # connections are released once the last of them drops it.
+                self.client = None
+            if self.client is None:
+                return self.connect()
+            self.connection_counters["reuses"] += 1
+            self.last_used = now
+            return self.client
+
+    def _observe(self, operation, started, request_bytes=0, response=None, error=None):
+        """Report one timed call to the instrumentation, if any. `response` is an API response with headers."""
+        if self.instrumentation is None:
+            return
+        response_bytes = int(response.meta.headers.get("content-length", 0)) if response is not None else 0
+        self.instrumentation.observe(operation, time.perf_counter() - started, request_bytes, response_bytes, error)
+
+    def call_with_verification(self, operation):
+        """
+        Run `operation(client)` on the pooled client. The client health is only verified after a
+        transport error, in which case it is reconnected if needed and the operation retried once.
+
+        Args:
+            operation (callable): Function receiving the Elasticsearch client.
+
+        Returns:
+            The return value of `operation`.
+        """
+        client = self.get_client()
+        try:
+            return operation(client)
+        except (ConnectionError, ConnectionTimeout):
+            self.connection_counters["verifications"] += 1
+            self.verify_client_alive()
+            return operation(self.client)
+
+    def _perform_raw(self, method, path, body=None):
+        """
+        Send a request to one node of the pooled client and return the response body undecoded.
+
+        Args:
+            method (str): HTTP method.
+            path (str): Request path, already URL-encoded.
+            body (dict, optional): Request body, serialized with the configured serializer.
+
+        Returns:
+            NodeApiResponse: The response, with `meta` and the raw `body` bytes.
+
+        Raises:
+            NotFoundError: If the node answers 404.
+            ApiError: If the node answers with any other error status.
+        """
+        return self._perform_payload(method, path, self.json_dumps(body) if body is not None else None)
+
+    def _perform_payload(self, method, path, payload):
+        """Send an already serialized request body (or None) like `_perform_raw`, compressing it when enabled."""
+        payload, encoding_headers = self._compress(payload) if payload is not None else (None, {})
+
+        def perform(client):
+            headers = HttpHeaders(client._headers)
+            headers.update({"accept": "application/json", "content-type": "application/json"})
+            headers.update(encoding_headers)
+            return self._perform_on_node(client, client.transport.node_pool.get(), method, path, payload, headers)
+
+        response = self.call_with_verification(perform)
+        if response.meta.status >= 400:
+            error = NotFoundError if response.meta.status == 404 else exceptions.ApiError
+            raise error(message=f"{method} {path} returned {response.meta.status}", meta=response.meta,
+                        body=response.body)
+        return response
+
+    def _perform_on_node(self, client, node, method, path, payload, headers):
+        """
+        Send a request to one given node, marking the node dead in the pool when it cannot be
+        reached and live again when it answers, like the transport does for its own requests.
+        """
+        node_pool = client.transport.node_pool
+        try:
+            response = node.perform_request(method, path, body=payload, headers=headers)
+        except (ConnectionError, ConnectionTimeout):
+            node_pool.mark_dead(node)
+            raise
+        node_pool.mark_live(node)
+        return response
+
+    def node_stats(self):
+        """
+        Report the nodes of the client pool with their health and latency.
+
+        Returns:
+            dict: Live and dead node counts and, per node, its URL, liveness, consecutive failures,
+            moving average latency and request count.
+        """
+        if self.client is None:
+            return {"live_nodes": 0, "dead_nodes": 0, "nodes": []}
+        nodes = node_stats(self.client.transport.node_pool)
+        live = sum(1 for node in nodes if node["alive"])
+        return {"live_nodes": live, "dead_nodes": len(nodes) - live, "nodes": nodes}
+
+    def _bulk_target_node(self, index_name):
+        """
+        Pick the pool node a bulk request for `index_name` is sent to when `shard_aware_bulk` is on:
+        in turn, one of the live nodes holding a primary shard of the index.
+
+        Returns:
+            BaseNode: The node, or None to let the pool choose (routing off, or no primary on a live node).
+        """
+        if not self.shard_aware_bulk or index_name is None:
+            return None
+        node_pool = self.client.transport.node_pool
+        with self.primary_nodes_lock:
+            entry = self.primary_nodes.get(index_name)
+        if entry is None or entry[0] < time.monotonic():
+            try:
+                addresses = self._primary_node_addresses(index_name)
+            except (ApiError, TransportError) as e:
+                logger.warning("Could not resolve the primary shards of '%s': %s", index_name, e)
+                addresses = set()
+            entry = (time.monotonic() + self.shard_routing_ttl, addresses, itertools.count())
+            with self.primary_nodes_lock:
+                self.primary_nodes[index_name] = entry
+        _, addresses, turns = entry
+        alive = live_node_configs(node_pool)
+        candidates = [node for node in node_pool.all()
+                      if (node.config.host, node.config.port) in addresses and node.config in alive]
+        if not candidates:
+            return None
+        return candidates[next(turns) % len(candidates)]
+
+    def _primary_node_addresses(self, index_name):
+        """Return the HTTP (host, port) pairs of the nodes holding started primary shards of an index."""
+        nodes = self.client.nodes.info(node_id="_all", metric="http")["nodes"]
+        shards = self.client.search_shards(index=index_name)["shards"]
+        primary_node_ids = {copy["node"] for copies in shards for copy in copies
+                            if copy.get("primary") and copy.get("state") == "STARTED"}
+        addresses = set()
+        for node_id in primary_node_ids:
+            publish_address = nodes.get(node_id, {}).get("http", {}).get("publish_address")
+            if publish_address:
+                addresses |= node_address(publish_address)
+        return addresses
+
+    def _compress(self, body):
+        """Return (payload, extra headers) for a serialized request body, compressed when enabled."""
+        if self.compressor is None:
+            return body, {}
+        return self.compressor.compress(body)
+
+    def compression_stats(self):
+        """
+        Report the request compression savings.
+
+        Returns:
+            dict: The RequestCompressor counters, or {"enabled": False} without compression.
+        """
+        if self.compressor is None:
+            return {"enabled": False}
+        return dict(self.compressor.stats(), enabled=True)
+
+    def connection_stats(self):
+        """
+        Report how often the pooled client was reused instead of building a new connection.
+
+        Returns:
+            dict: Connect and reuse counts, handshakes avoided and the estimated connection setup time saved.
+        """
+        counters = self.connection_counters
+        average = counters["connect_seconds"] / counters["connects"] if counters["connects"] else 0.0
+        return {
+            "pool_size": self.pool_size,
+            "keep_alive": self.keep_alive,
+            "connects": counters["connects"],
+            "reuses": counters["reuses"],
+            "verifications": counters["verifications"],
+            "handshakes_avoided": counters["reuses"],
+            "avg_connect_seconds": round(average, 6),
+            "estimated_seconds_saved": round(average * counters["reuses"], 6),
+        }
+
+    def invalidate_search_cache(self, index_name=None, aliases_changed=False):
+        """
+        Drop cached search results touching `index_name` (all of them when None), including the
+        searches made through an alias of it.
+
+        Args:
+            index_name (str, optional): Index, alias or pattern written to.
+            aliases_changed (bool, optional): True after creating or deleting indices or changing
+                aliases, so the indices behind aliases are resolved again.
+        """
+        if self.search_cache is not None:
+            if aliases_changed:
+                self.search_cache.forget_aliases()
+            self.search_cache.invalidate(index_name, resolve=self.resolve_indices)
+
+    def resolve_indices(self, index_name):
+        """
+        Return the concrete indices an index name, alias or pattern points to.
+
+        Returns:
+            list: Index names; empty when nothing matches or the lookup fails.
+        """
+        try:
+            return list(self.get_client().indices.get_alias(index=index_name, ignore_unavailable=True).body)
+        except Exception as e:
+            logger.debug("Could not resolve the indices of '%s': %s", index_name, e)
+            return []
+
+    def invalidate_metadata_cache(self, index_name=None):
+        """Drop cached index metadata matching `index_name` (all of it when None)."""
+        if self.metadata_cache is not None:
+            self.metadata_cache.invalidate(index_name)
+
+    def index_exists(self, index_name):
+        """
+        Check whether an index or alias exists, answering from the metadata cache when possible.
+
+        Returns:
+            bool: True if it exists.
+        """
+        exists = self.metadata_cache.exists(index_name) if self.metadata_cache is not None else None
+        if exists is None:
+            exists = bool(self.get_client().indices.exists(index=index_name))
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(index_name, exists)
+        return exists
+
+    def refresh_generation(self, index_name):
+        """
+        Return the refresh generation of an index: the total refresh count of its primaries.
+        It changes whenever new writes become visible to searches.
+        """
+        stats = self.get_client().indices.stats(index=index_name, metric="refresh")
+        return stats["_all"]["primaries"]["refresh"]["total"]
+
     def close(self):
         """
         Close the connection to the Elasticsearch cluster.
@@ -120,9 +545,10 @@ class ELKConnector():
             raise ConnectionError("Not connected to Elasticsearch")
         try:
             self.client.close()
-            print("Connection closed successfully")
+            self.client = None
+            logger.info("Connection closed successfully")
         except Exception as e:
-            print(f"Error closing connection: {str(e)}")
+            logger.error("Error closing connection: %s", e)
             raise Exception(f"Error closing connection: {str(e)}")
 
     def info(self):
@@ -139,12 +565,11 @@ class ELKConnector():
             raise ConnectionError("Not connected to Elasticsearch")
         try:
             info = self.client.info()
-            print(f"Cluster Name: {info['cluster_name']}")
-            print(f"Version: {info['version']['number']}")
-            print(f"Tagline: {info['tagline']}")
+            logger.info("Cluster Name: %s :: Version: %s :: Tagline: %s",
+                        info['cluster_name'], info['version']['number'], info['tagline'])
             return info
         except Exception as e:
-            print(f"Error fetching cluster info: {str(e)}")
+            logger.error("Error fetching cluster info: %s", e)
             raise Exception(f"Error fetching cluster info: {str(e)}")
 
     def health(self):
@@ -161,20 +586,14 @@ class ELKConnector():
             raise ConnectionError("Not connected to Elasticsearch")
         try:
             health = self.client.cluster.health()
-            print(f"======================================================")
-            print(f"Cluster Name: {health['cluster_name']}")
-            print(f"Status: {health['status']}")
-            print(f"Number of Nodes: {health['number_of_nodes']}")
-            print(f"Number of Data Nodes: {health['number_of_data_nodes']}")
-            print(f"Active Primary Shards: {health['active_primary_shards']}")
-            print(f"Active Shards: {health['active_shards']}")
-            print(f"Relocating Shards: {health['relocating_shards']}")
-            print(f"Initializing Shards: {health['initializing_shards']}")
-            print(f"Unassigned Shards: {health['unassigned_shards']}")
-            print(f"======================================================")
+            logger.info("Cluster Name: %s :: Status: %s :: Nodes: %s :: Data Nodes: %s :: Active Primary Shards: %s :: "
+                        "Active Shards: %s :: Relocating Shards: %s :: Initializing Shards: %s :: Unassigned Shards: %s",
+                        health['cluster_name'], health['status'], health['number_of_nodes'],
+                        health['number_of_data_nodes'], health['active_primary_shards'], health['active_shards'],
+                        health['relocating_shards'], health['initializing_shards'], health['unassigned_shards'])
             return health
         except Exception as e:
-            print(f"Error fetching cluster health: {str(e)}")
+            logger.error("Error fetching cluster health: %s", e)
             raise Exception(f"Error fetching cluster health: {str(e)}")
     
     def create_index(self, index_name, index_body):
@@ -191,18 +610,22 @@ class ELKConnector():
         Raises:
             ConnectionError: If not connected to Elasticsearch.
         """
-        if self.client.indices.exists(index=index_name):
-            print(f"Index '{index_name}' already exists.")
-            return {"acknowledged": "index exists"}
-        
         if not self.client:
             raise ConnectionError("Not connected to Elasticsearch")
+
+        if self.index_exists(index_name):
+            logger.info("Index '%s' already exists.", index_name)
+            return {"acknowledged": "index exists"}
+
         try:
             response = self.client.indices.create(index=index_name, body=index_body)
-            print(f"Index created successfully: {response}")
+            self.invalidate_search_cache(index_name, aliases_changed=True)
+            self.invalidate_metadata_cache(index_name)
+            logger.info("Index '%s' created successfully", index_name)
+            logger.debug("Create index response: %s", response)
             return True
         except Exception as e:
-            print(f"Error creating index: {str(e)}")
+            logger.error("Error creating index: %s", e)
             raise Exception(f"Error creating index: {str(e)}")
     
     def delete_index(self, index_name):
@@ -222,12 +645,87 @@ class ELKConnector():
             raise ConnectionError("Not connected to Elasticsearch")
         try:
             response = self.client.indices.delete(index=index_name)
-            print(f"Index deleted successfully: {response}")
+            self.invalidate_search_cache(index_name, aliases_changed=True)
+            self.invalidate_metadata_cache(index_name)
+            logger.info("Index '%s' deleted successfully", index_name)
+            logger.debug("Delete index response: %s", response)
             return True
         except Exception as e:
-            print(f"Error deleting index: {str(e)}")
+            logger.error("Error deleting index: %s", e)
             raise Exception(f"Error deleting index: {str(e)}")
         
+    @contextmanager
+    def bulk_load_mode(self, index_name, index_body=None, force_merge=False, max_num_segments=1):
+        """
+        Tune an index for a bulk load and restore it afterwards.
+
+        Refresh, replicas and per-request translog fsyncs are turned off (`BULK_LOAD_SETTINGS`) while
+        the block runs. On exit, also after a failed load, the original settings are restored and the
+        index refreshed once. The force-merge only runs after a successful load.
+
+        Args:
+            index_name (str): Index (or alias) to load. Created from `index_body` if it does not exist.
+            index_body (dict, optional): Settings and mappings used when the index is created; its
+                replica count, refresh interval and durability are the values restored at the end.
+            force_merge (bool, optional): Force-merge the index after a successful load, waiting up to
+                `force_merge_timeout` seconds. A merge that fails or times out is logged, not raised.
+            max_num_segments (int, optional): Segments per shard of the force-merge. Default is 1.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        client = self.get_client()
+        if not client:
+            raise ConnectionError("Not connected to Elasticsearch")
+
+        if not self.index_exists(index_name):
+            index_body = dict(index_body or {})
+            settings = dict(index_body.get("settings", {}))
+            nested = dict(settings.pop("index", {}))
+            originals = {}
+            for key in BULK_LOAD_SETTINGS:
+                short = key[len("index."):]
+                originals[key] = settings.pop(short, nested.pop(short, settings.pop(key, None)))
+            if nested:
+                settings["index"] = nested
+            index_body["settings"] = dict(settings, **BULK_LOAD_SETTINGS)
+            self.create_index(index_name, index_body)
+            originals = {index_name: originals}
+        else:
+            current = client.indices.get_settings(index=index_name, flat_settings=True)
+            originals = {name: {key: body["settings"].get(key) for key in BULK_LOAD_SETTINGS}
+                         for name, body in current.body.items()}
+            client.indices.put_settings(index=index_name, settings=BULK_LOAD_SETTINGS)
+        logger.info("Bulk load mode enabled on '%s'", index_name)
+
+        succeeded = False
+        try:
+            yield
+            succeeded = True
+        finally:
+            try:
+                for name, settings in originals.items():
+                    # None resets a setting that was not set explicitly to the cluster default.
+                    self.call_with_verification(lambda client: client.indices.put_settings(index=name, settings=settings))
+                self.call_with_verification(lambda client: client.indices.refresh(index=index_name))
+                self.invalidate_search_cache(index_name)
+                logger.info("Bulk load mode disabled on '%s', settings restored", index_name)
+            except Exception as e:
+                logger.error("Error restoring the settings of '%s' after a bulk load, expected %s: %s",
+                             index_name, originals, e)
+                if succeeded:
+                    raise Exception(f"Error restoring index settings: {str(e)}")
+            if succeeded and force_merge:
+                try:
+                    # A force-merge takes minutes on a freshly loaded index, far beyond the default request
+                    # timeout. It is not retried on a timeout, which would only queue a second merge.
+                    self.get_client().options(request_timeout=self.force_merge_timeout).indices.forcemerge(
+                        index=index_name, max_num_segments=max_num_segments)
+                    logger.info("Force-merged '%s' to %d segments per shard", index_name, max_num_segments)
+                except Exception as e:
+                    # The documents are loaded either way, and a timed out merge keeps running on the cluster.
+                    logger.warning("Force-merge of '%s' did not complete: %s", index_name, e)
+
     def index_document(self, index_name, document_body):
         """
         Index a document in Elasticsearch.
@@ -245,14 +743,278 @@ class ELKConnector():
         """
         if not self.client:
             raise ConnectionError("Not connected to Elasticsearch")
+        started = time.perf_counter()
         try:
             response = self.client.index(index=index_name,  body=document_body)
-            print(f"Document indexed successfully: {response}")
+            self._observe("index_document", started, response=response)
+            self.invalidate_search_cache(index_name)
+            # The write may have created the index, so a cached "does not exist" is stale.
+            self.invalidate_metadata_cache(index_name)
+            logger.debug("Document indexed successfully: %s", response)
             return True
         except Exception as e:
-            print(f"Error indexing document: {str(e)}")
+            self._observe("index_document", started, error=type(e).__name__)
+            logger.error("Error indexing document: %s", e)
             raise Exception(f"Error indexing document: {str(e)}")
     
+    def bulk_index(self, index_name, docs_iterable, id_field=None, initial_batch_docs=500, max_batch_docs=5000,
+                   max_batch_bytes=10 * 1024 * 1024, target_latency=1.0, max_item_retries=3):
+        """
+        Stream documents into an index through the `_bulk` endpoint.
+
+        Batches are cut by document count and body size. The document count adapts to the
+        measured bulk latency and shrinks on 429 rejections; only the rejected items are retried.
+
+        Args:
+            index_name (str): Name of the index where the documents will be indexed.
+            docs_iterable (iterable of dict): Documents to index, consumed lazily.
+            id_field (str, optional): Document field used as `_id` so retries do not create duplicates.
+            initial_batch_docs (int, optional): Document count of the first batch. Default is 500.
+            max_batch_docs (int, optional): Upper bound for the batch document count. Default is 5000.
+            max_batch_bytes (int, optional): Upper bound for the batch body size. Default is 10 MiB.
+            target_latency (float, optional): Bulk round trip time in seconds to aim for. Default is 1.0.
+            max_item_retries (int, optional): Retries for rejected items before they are reported as failed.
+
+        Returns:
+            dict: Summary with document counts, retries, throughput and the per-item failures.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        sizer = AdaptiveBatchSizer(initial_docs=initial_batch_docs, max_docs=max_batch_docs,
+                                   max_bytes=max_batch_bytes, target_latency=target_latency)
+        summary = new_bulk_summary(index_name)
+        started = time.perf_counter()
+
+        batch = []
+        batch_bytes = 0
+        try:
+            for position, document in enumerate(docs_iterable):
+                item = serialize_bulk_item(index_name, document, id_field, self.json_dumps)
+                batch.append((position, item))
+                batch_bytes += len(item)
+                summary["total"] += 1
+                if sizer.is_full(len(batch), batch_bytes):
+                    self._flush_bulk_batch(batch, sizer, summary, max_item_retries, index_name)
+                    batch = []
+                    batch_bytes = 0
+            if batch:
+                self._flush_bulk_batch(batch, sizer, summary, max_item_retries, index_name)
+        finally:
+            # Earlier batches may have been written, and may have created the index, before a failure.
+            self.invalidate_search_cache(index_name)
+            self.invalidate_metadata_cache(index_name)
+
+        finish_bulk_summary(summary, time.perf_counter() - started)
+        self._count_bulk_items(summary)
+        logger.info("Bulk indexed %d/%d documents into '%s' (%s docs/s, %d failed)",
+                    summary['indexed'], summary['total'], index_name, summary['docs_per_sec'], summary['failed'])
+        return summary
+
+    def _count_bulk_items(self, summary):
+        """Add the item counts of a finished bulk summary to the instrumentation counters."""
+        if self.instrumentation is None:
+            return
+        for counter, key in (("bulk_items_indexed", "indexed"), ("bulk_items_failed", "failed"),
+                             ("bulk_items_retried", "retried"), ("bulk_rejections", "rejections")):
+            self.instrumentation.increment(counter, summary[key])
+
+    def _flush_bulk_batch(self, batch, sizer, summary, max_item_retries, index_name=None):
+        """
+        Send one bulk batch, retrying rejected items with backoff and recording the outcome in `summary`.
+
+        Args:
+            batch (list of tuple): (position, serialized item) pairs.
+            sizer (AdaptiveBatchSizer): Sizer updated with the measured latency and rejections.
+            summary (dict): Bulk summary updated in place.
+            max_item_retries (int): Retries for rejected items before they are reported as failed.
+            index_name (str, optional): Target index, used to route the request with `shard_aware_bulk`.
+        """
+        pending = batch
+        attempt = 0
+        while pending:
+            body = b"".join(item for _, item in pending)
+            payload, encoding_headers = self._compress(body)
+            started = time.perf_counter()
+            try:
+                response, items = self._send_bulk(index_name, payload, encoding_headers)
+            except (ApiError, TransportError) as e:
+                if not record_bulk_error(summary, pending, e):
+                    self._observe("bulk", started, len(body), error=type(e).__name__)
+                    logger.error("Error bulk indexing documents: %s", e)
+                    raise Exception(f"Error bulk indexing documents: {str(e)}") from e
+                response, items = None, None
+            self._observe("bulk", started, len(body), response=response, error=None if items is not None else "rejected")
+            latency = time.perf_counter() - started
+
+            retry = record_bulk_response(summary, pending, items, len(body))
+            sizer.record(latency, rejected=bool(retry))
+            if retry:
+                attempt += 1
+                delay = next_bulk_retry(summary, retry, attempt, max_item_retries)
+                if delay is None:
+                    return
+                time.sleep(delay)
+            pending = retry
+
+    def _send_bulk(self, index_name, payload, encoding_headers):
+        """
+        Send one bulk body without transport-level status retries, to a primary shard node of
+        `index_name` when shard-aware routing finds one, otherwise to the node the pool selects.
+
+        Returns:
+            tuple: (response, list of item results).
+
+        Raises:
+            ApiError: If the cluster answers with an error status.
+        """
+        node = self._bulk_target_node(index_name)
+        if node is not None:
+            headers = HttpHeaders(self.client._headers)
+            headers.update({"accept": "application/json", "content-type": "application/x-ndjson"})
+            headers.update(encoding_headers)
+            try:
+                response = self._perform_on_node(self.client, node, "POST", "/_bulk", payload, headers)
+            except ConnectionError as e:
+                logger.warning("Primary shard node %s unreachable, sending the bulk request through the pool: %s",
+                               node.base_url, e)
+            else:
+                if response.meta.status >= 400:
+                    raise exceptions.ApiError(message=f"POST /_bulk returned {response.meta.status}",
+                                              meta=response.meta, body=response.body)
+                return response, self.json_loads(response.body)["items"]
+        response = self.client.options(retry_on_status=(), headers=encoding_headers).bulk(operations=payload)
+        return response, response["items"]
+
+    def parallel_bulk_index(self, index_name, docs_iterable, workers=4, executor="thread", max_in_flight=None,
+                            id_field=None, initial_batch_docs=500, max_batch_docs=5000,
+                            max_batch_bytes=10 * 1024 * 1024, target_latency=1.0, max_item_retries=3):
+        """
+        Stream documents into an index with bulk batches sent concurrently by a worker pool.
+
+        At most `max_in_flight` batches are queued or being sent at any time; the producer blocks
+        until a slot frees up, so memory stays flat on unbounded generators. With
+        `executor="process"` documents are serialized in a process pool and batches are cut by
+        document count only.
+
+        Args:
+            index_name (str): Name of the index where the documents will be indexed.
+            docs_iterable (iterable of dict): Documents to index, consumed lazily.
+            workers (int, optional): Number of sending threads (and serializing processes). Default is 4.
+            executor (str, optional): "thread" or "process", where serialization happens. Default is "thread".
+            max_in_flight (int, optional): Bound on queued plus running batches. Default is 2 * workers.
+            id_field (str, optional): Document field used as `_id` so a resumed load does not create duplicates.
+            initial_batch_docs, max_batch_docs, max_batch_bytes, target_latency, max_item_retries:
+                Batch sizing and retry options, as for `bulk_index`.
+
+        Returns:
+            dict: The `bulk_index` summary plus per-worker counters under "workers", "aborted" and
+            "errors" for requests that failed outright, and "resume_position": every document
+            before that position was indexed.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+            ValueError: If `executor` is not "thread" or "process".
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor '{executor}', expected 'thread' or 'process'")
+        max_in_flight = max_in_flight or workers * 2
+        sizer = AdaptiveBatchSizer(initial_docs=initial_batch_docs, max_docs=max_batch_docs,
+                                   max_bytes=max_batch_bytes, target_latency=target_latency)
+        summary = new_bulk_summary(index_name)
+        summary["workers"] = {}
+        summary["errors"] = []
+        lock = threading.Lock()
+        slots = threading.BoundedSemaphore(max_in_flight)
+        senders = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bulk-worker")
+        serializers = ProcessPoolExecutor(max_workers=workers) if executor == "process" else None
+        started = time.perf_counter()
+
+        def send(batch):
+            batch_summary = new_bulk_summary(index_name)
+            send_started = time.perf_counter()
+            try:
+                self._flush_bulk_batch(batch, sizer, batch_summary, max_item_retries, index_name)
+            finally:
+                with lock:
+                    merge_bulk_summary(summary, batch_summary)
+                    worker = summary["workers"].setdefault(threading.current_thread().name, {
+                        "batches": 0, "indexed": 0, "failed": 0, "bytes": 0, "busy_seconds": 0.0})
+                    worker["batches"] += 1
+                    worker["indexed"] += batch_summary["indexed"]
+                    worker["failed"] += len(batch_summary["failures"])
+                    worker["bytes"] += batch_summary["bytes"]
+                    worker["busy_seconds"] = round(worker["busy_seconds"] + time.perf_counter() - send_started, 3)
+
+        def release(future):
+            slots.release()
+            if future.exception() is not None:
+                with lock:
+                    summary["errors"].append(str(future.exception()))
+
+        def submit_serialized(first_position, count, future):
+            if future.exception() is not None:
+                with lock:
+                    record_bulk_failures(summary, [(position, None) for position in range(first_position, first_position + count)],
+                                               None, str(future.exception()))
+                release(future)
+                return
+            batch = list(enumerate(future.result(), first_position))
+            senders.submit(send, batch).add_done_callback(release)
+
+        def dispatch(first_position, batch):
+            slots.acquire()
+            if serializers:
+                future = serializers.submit(serialize_bulk_batch, index_name, batch, id_field, self.json_dumps)
+                future.add_done_callback(lambda done: submit_serialized(first_position, len(batch), done))
+            else:
+                senders.submit(send, batch).add_done_callback(release)
+
+        total = 0
+        dispatched = 0
+        batch = []
+        batch_bytes = 0
+        try:
+            for position, document in enumerate(docs_iterable):
+                if summary["errors"]:
+                    break
+                total += 1
+                if serializers:
+                    batch.append(document)
+                    full = len(batch) >= sizer.batch_docs
+                else:
+                    item = serialize_bulk_item(index_name, document, id_field, self.json_dumps)
+                    batch.append((position, item))
+                    batch_bytes += len(item)
+                    full = sizer.is_full(len(batch), batch_bytes)
+                if full:
+                    dispatch(dispatched, batch)
+                    dispatched = total
+                    batch = []
+                    batch_bytes = 0
+            if batch and not summary["errors"]:
+                dispatch(dispatched, batch)
+                dispatched = total
+        finally:
+            if serializers:
+                serializers.shutdown(wait=True)
+            senders.shutdown(wait=True)
+            self.invalidate_search_cache(index_name)
+            self.invalidate_metadata_cache(index_name)
+
+        summary["total"] = total
+        summary["aborted"] = bool(summary["errors"])
+        finish_bulk_summary(summary, time.perf_counter() - started)
+        self._count_bulk_items(summary)
+        summary["resume_position"] = summary["failures"][0]["position"] if summary["failures"] else dispatched
+        logger.info("Parallel bulk indexed %d/%d documents into '%s' with %d workers (%s docs/s, %d failed)",
+                    summary['indexed'], total, index_name, workers, summary['docs_per_sec'], summary['failed'])
+        return summary
+
     def put_alias_for_index(self, index_name, alias_name):
         """
         Create an alias for an index in Elasticsearch.
@@ -271,10 +1033,14 @@ class ELKConnector():
             raise ConnectionError("Not connected to Elasticsearch")
         try:
             response = self.client.indices.put_alias(index=index_name, name=alias_name)
-            print(f"Alias created successfully: {response}")
+            self.invalidate_search_cache(alias_name, aliases_changed=True)
+            self.invalidate_metadata_cache(index_name)
+            self.invalidate_metadata_cache(alias_name)
+            logger.info("Alias '%s' created successfully for index '%s'", alias_name, index_name)
+            logger.debug("Put alias response: %s", response)
             return True
         except Exception as e:
-            print(f"Error creating alias: {str(e)}")
+            logger.error("Error creating alias: %s", e)
             raise Exception(f"Error creating alias: {str(e)}")
     
     def get_index_total_docs(self, index_name):
@@ -296,11 +1062,81 @@ class ELKConnector():
             response = self.client.count(index=index_name)
             return response['count']
         except Exception as e:
-            print(f"Error getting index total documents: {str(e)}")
+            logger.error("Error getting index total documents: %s", e)
             raise Exception(f"Error getting index total documents: {str(e)}")
         
     
+    def get_indices_info(self, patterns):
+        """
+        Get the metadata of every index matching one or more index patterns in two parallel calls:
+        a wildcard `GET <patterns>` for aliases, mappings and settings, and one size-0 search with
+        a terms aggregation on `_index` for the document counts.
+
+        Args:
+            patterns (str or list of str): Index names or wildcard patterns, e.g. ["logstash-2024.*"].
+
+        Returns:
+            dict: Index name -> the same info as `get_index_info`. Patterns matching nothing are left out.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if self.metadata_cache is not None and not any("*" in pattern or "," in pattern for pattern in patterns):
+            cached = {pattern: self.metadata_cache.info(pattern) for pattern in patterns}
+            if all(info is not None for info in cached.values()):
+                return cached
+
+        client = self.get_client()
+        if not client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        expression = ",".join(patterns)
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                indices_future = executor.submit(client.indices.get, index=expression, ignore_unavailable=True,
+                                                 allow_no_indices=True)
+                # Unlike `_cat/indices` docs.count, this counts top-level documents only, as `_count` does.
+                counts_future = executor.submit(
+                    client.search, index=expression, size=0, track_total_hits=False, ignore_unavailable=True,
+                    allow_no_indices=True, aggs={"indices": {"terms": {"field": "_index", "size": 65536}}})
+                indices, counts = indices_future.result(), counts_future.result()
+        except Exception as e:
+            logger.error("Error getting indices info: %s", e)
+            raise Exception(f"Error getting indices info: {str(e)}")
+
+        doc_counts = {bucket["key"]: bucket["doc_count"]
+                      for bucket in counts.body.get("aggregations", {}).get("indices", {}).get("buckets", [])}
+        infos = {}
+        for index_name, body in indices.body.items():
+            infos[index_name] = {
+                "name": index_name,
+                "exists": True,
+                "doc_count": doc_counts.get(index_name, 0),
+                "aliases": {index_name: {"aliases": body.get("aliases", {})}},
+                "mappings": {index_name: {"mappings": body.get("mappings", {})}},
+                "settings": {index_name: {"settings": body.get("settings", {})}},
+            }
+
+        if self.metadata_cache is not None:
+            for index_name, info in infos.items():
+                self.metadata_cache.put(index_name, True, info)
+                for alias in info["aliases"][index_name]["aliases"]:
+                    self.metadata_cache.put(alias, True)
+            for pattern in patterns:
+                if "*" not in pattern and self.metadata_cache.exists(pattern) is None:
+                    self.metadata_cache.put(pattern, False)
+        return infos
+
     def get_index_info(self, index_name):
+        """
+        Get the existence, document count, aliases, mappings and settings of an index.
+
+        Concrete indices are looked up with `get_indices_info`; aliases fall back to one call per item.
+        """
+        info = self.get_indices_info([index_name]).get(index_name)
+        if info is not None:
+            return info
         return {
             "name": index_name,
             "exists": self.client.indices.exists(index=index_name),
@@ -310,7 +1146,9 @@ class ELKConnector():
             "settings": self.client.indices.get_settings(index=index_name)
         }
 
-    def search(self, index_name, query=None, filters=None, sort=None, limit=10, offset=0, aggregations=None):
+    def search(self, index_name, query=None, filters=None, sort=None, limit=10, offset=0, aggregations=None,
+               source_includes=None, source_excludes=None, docvalue_fields=None, track_total_hits=None,
+               filter_path=None, aggregations_only=False, response_format="dict", field_types=None):
         """
         Perform a search query on an Elasticsearch index with optional filters, sorting, pagination, and aggregations.
 
@@ -322,52 +1160,309 @@ class ELKConnector():
             limit (int, optional): The maximum number of results to return. Default is 10.
             offset (int, optional): The starting offset for results (used for pagination). Default is 0.
             aggregations (dict, optional): Aggregation definitions for grouped results.
+            source_includes (list of str, optional): `_source` fields to return (wildcards allowed), or
+                False to return no `_source` at all.
+            source_excludes (list of str, optional): `_source` fields to leave out, e.g. ["metadata.attributes"].
+            docvalue_fields (list, optional): Fields to return from doc values instead of `_source`.
+            track_total_hits (bool or int, optional): False skips counting the hits, an int counts
+                accurately up to that number. Default is the cluster default (10,000).
+            filter_path (str or list of str, optional): Response paths to keep, e.g.
+                "hits.hits._source,aggregations". Everything else is dropped by the cluster.
+            aggregations_only (bool, optional): Return no hits (size=0), only the aggregations and totals.
+            response_format (str, optional): "dict" for the decoded response, "raw" for the undecoded
+                JSON bytes, or "lazy" for a LazySearchResponse decoded on first access. Raw and lazy
+                responses bypass the search cache and the coalescer.
+            field_types (dict, optional): Field path -> mapping type of the index (see
+                `field_types_from_mapping`), letting `match` queries on exact-value fields be
+                rewritten into cacheable `term` filters.
 
         Returns:
-            dict: The search results or an error response if the query fails.
+            dict: The search results or an error response if the query fails. Results served from the
+            search cache are shared between callers and must not be modified.
         """
+        started = time.perf_counter()
         try:
-            self.connect()
-
-            params = {
-                "index": index_name,
-                "query": query,
-                "filters": filters,
-                "sort": sort,
-                "limit": limit,
-                "offset": offset,
-                "aggregations": aggregations
-            }
-            print(f"Received parameter: {params}")
-            
-            if not self.client.indices.exists(index=index_name):
-                print(f"Index '{index_name}' does not exist.")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received parameter: %s", {
+                    "index": index_name,
+                    "query": query,
+                    "filters": filters,
+                    "sort": sort,
+                    "limit": limit,
+                    "offset": offset,
+                    "aggregations": aggregations
+                })
+
+            if self.metadata_cache is not None and self.metadata_cache.exists(index_name) is False:
+                logger.warning("Index '%s' does not exist.", index_name)
                 return {"error": "index does not exist"}
-            
 
-            search_body = {
-                "from": offset,
-                "size": limit,
-            }
+            search_body = build_search_body(query, filters, sort, limit, offset, aggregations, source_includes,
+                                            source_excludes, docvalue_fields, track_total_hits, aggregations_only,
+                                            field_types)
+            if isinstance(filter_path, (list, tuple)):
+                filter_path = ",".join(filter_path)
 
-            if query:
-                search_body["query"] = query
-            
-            if filters:
-                search_body.setdefault("query", {"bool": {}})
-                search_body["query"]["bool"].setdefault("filter", []).extend(filters)
-            
-            if sort:
-                search_body["sort"] = sort
-            
-            if aggregations:
-                search_body["aggs"] = aggregations
+            if response_format != "dict":
+                path = f"/{quote(index_name, safe=',*')}/_search"
+                if filter_path:
+                    path += f"?filter_path={quote(filter_path, safe=',*')}"
+                raw_response = self._perform_raw("POST", path, search_body)
+                self._observe("search", started, response=raw_response)
+                if response_format == "raw":
+                    return raw_response.body
+                return LazySearchResponse(raw_response.body, self.json_loads)
+
+            # The cached response depends on filter_path, which is a URL parameter rather than part of the body.
+            cache_body = dict(search_body, filter_path=filter_path) if filter_path else search_body
+            if self.search_cache is not None:
+                cached = self.search_cache.get(index_name, cache_body, refresh_probe=self.refresh_generation)
+                if cached is not None:
+                    logger.debug("Search query served from cache for index '%s'", index_name)
+                    return cached
 
-            response = self.client.search(index=index_name, body=search_body)
+            if self.profiler is not None:
+                response = self._profiled_search(index_name, search_body, filter_path)
+                self._observe("search", started)
+            elif self.search_coalescer is not None and not filter_path:
+                response = self.search_coalescer.submit((index_name, search_body))
+                if "error" in response and response.get("status") == 404:
+                    if self.metadata_cache is not None:
+                        self.metadata_cache.put(index_name, False)
+                    logger.warning("Index '%s' does not exist.", index_name)
+                    return {"error": "index does not exist"}
+                if "error" in response:
+                    raise Exception(response["error"])
+                self._observe("search", started)
+            else:
+                # Encoded once here, so the request byte count comes from the body actually sent;
+                # the transport passes bytes bodies through unchanged.
+                payload = self.json_dumps(search_body)
+                api_response = self.call_with_verification(lambda client: client.perform_request(
+                    "POST", f"/{quote(index_name, safe=',*')}/_search",
+                    params={"filter_path": filter_path} if filter_path else None,
+                    headers={"accept": "application/json", "content-type": "application/json"}, body=payload))
+                self._observe("search", started, len(payload), api_response)
+                response = api_response.body
             
-            print(f"Search query executed successfully on index '{index_name}'")
-            return response.body
-        
+            logger.debug("Search query executed successfully on index '%s'", index_name)
+            if self.search_cache is not None:
+                self.search_cache.put(index_name, cache_body, response, resolve=self.resolve_indices)
+            return response
+
+        except NotFoundError:
+            self._observe("search", started, error="NotFoundError")
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(index_name, False)
+            logger.warning("Index '%s' does not exist.", index_name)
+            return {"error": "index does not exist"}
         except Exception as e:
-            print(f"Failed to execute search on index '{index_name}': {e}" )
-            return None
\ No newline at end of file
+            self._observe("search", started, error=type(e).__name__)
+            logger.error("Failed to execute search on index '%s': %s", index_name, e)
+            return None
+
+    def _profiled_search(self, index_name, search_body, filter_path=None):
+        """
+        Run a search with each client-side step timed, adding `"profile": true` when the profiler
+        samples it, and record it in the profiler.
+
+        Returns:
+            dict: The search response, without the `profile` section.
+
+        Raises:
+            NotFoundError: If the index does not exist.
+        """
+        sampled = self.profiler.should_profile()
+        body = dict(search_body, profile=True) if sampled else search_body
+        path = f"/{quote(index_name, safe=',*')}/_search"
+        if filter_path:
+            path += f"?filter_path={quote(filter_path + (',took,profile' if sampled else ',took'), safe=',*')}"
+
+        serialize_started = time.perf_counter()
+        payload = self.json_dumps(body)
+        request_started = time.perf_counter()
+        raw_response = self._perform_payload("POST", path, payload)
+        decode_started = time.perf_counter()
+        response = self.json_loads(raw_response.body)
+        decoded = time.perf_counter()
+
+        profile = response.pop("profile", None)
+        self.profiler.record(index_name, search_body, request_started - serialize_started,
+                             decode_started - request_started, decoded - decode_started,
+                             took=response.get("took"), profile=profile)
+        if filter_path and "took" not in filter_path.split(","):
+            response.pop("took", None)
+        return response
+
+    def multi_search(self, searches):
+        """
+        Run several searches in a single `_msearch` request.
+
+        Args:
+            searches (list of dict): Keyword arguments for `search` (index_name, query, filters,
+                sort, limit, offset, aggregations and the projection options except filter_path),
+                one dict per query.
+
+        Returns:
+            list: The search results in the order of `searches`. A failed query yields
+            {"error": ..., "status": ...} in its slot without affecting the others.
+        """
+        requests = []
+        for spec in searches:
+            arguments = dict(spec)
+            index_name = arguments.pop("index_name")
+            requests.append((index_name, build_search_body(**arguments)))
+
+        results = [None] * len(requests)
+        misses = []
+        for position, (index_name, search_body) in enumerate(requests):
+            cached = self.search_cache.get(index_name, search_body) if self.search_cache is not None else None
+            if cached is not None:
+                results[position] = cached
+            else:
+                misses.append(position)
+
+        if misses:
+            responses = self._msearch([requests[position] for position in misses])
+            for position, response in zip(misses, responses):
+                results[position] = response
+                if self.search_cache is not None and "error" not in response:
+                    self.search_cache.put(*requests[position], response, resolve=self.resolve_indices)
+        logger.info("Multi search executed %d of %d queries, %d failed",
+                    len(misses), len(requests), sum('error' in result for result in results))
+        return results
+
+    def _msearch(self, requests):
+        """
+        Send (index_name, search_body) pairs as one `_msearch` request.
+
+        Returns:
+            list: One response or {"error": ..., "status": ...} per request, in order.
+        """
+        operations = []
+        for index_name, search_body in requests:
+            operations.append(self.json_dumps({"index": index_name}))
+            operations.append(self.json_dumps(search_body))
+        payload, encoding_headers = self._compress(b"\n".join(operations) + b"\n")
+        started = time.perf_counter()
+        try:
+            response = self.call_with_verification(
+                lambda client: client.options(headers=encoding_headers).msearch(searches=payload))
+            self._observe("msearch", started, response=response)
+        except Exception as e:
+            self._observe("msearch", started, error=type(e).__name__)
+            logger.error("Failed to execute multi search: %s", e)
+            return [{"error": str(e), "status": getattr(e, "status_code", None)} for _ in requests]
+        return [
+            {"error": item["error"], "status": item.get("status")} if "error" in item else item
+            for item in response["responses"]
+        ]
+
+    def iter_search(self, index_name, query=None, filters=None, sort=None, page_size=1000, keep_alive="1m", slices=None,
+                    source_includes=None):
+        """
+        Lazily iterate over every hit matching a query, page by page, using a point in time and `search_after`.
+
+        Unlike `search`, the cost per page stays constant and is not limited by `index.max_result_window`.
+
+        Args:
+            index_name (str): The name of the Elasticsearch index to search.
+            query (dict, optional): The main search query, as for `search`.
+            filters (list of dict, optional): A list of filter clauses, as for `search`.
+            sort (list of dict, optional): Sorting conditions; `_shard_doc` is appended as tiebreaker.
+            page_size (int, optional): Number of hits fetched per request. Default is 1000.
+            keep_alive (str, optional): How long the point in time is kept between pages. Default is "1m".
+            slices (int, optional): Number of sliced readers draining the point in time in parallel threads.
+                Hits from different slices are interleaved.
+            source_includes (list of str, optional): `_source` fields to return, as for `search`.
+
+        Yields:
+            dict: Search hits.
+        """
+        client = self.get_client()
+        pit = {"id": client.open_point_in_time(index=index_name, keep_alive=keep_alive)["id"], "keep_alive": keep_alive}
+        try:
+            if slices and slices > 1:
+                yield from self._iter_sliced_pages(pit, query, filters, sort, page_size, slices, source_includes)
+            else:
+                for page in self._iter_pit_pages(pit, query, filters, sort, page_size, source_includes=source_includes):
+                    yield from page
+        finally:
+            try:
+                client.close_point_in_time(id=pit["id"])
+            except Exception as e:
+                logger.error("Error closing point in time: %s", e)
+
+    def _iter_pit_pages(self, pit, query, filters, sort, page_size, slice_spec=None, source_includes=None):
+        """
+        Yield the pages of hits of a point-in-time search, following `search_after`.
+
+        Args:
+            pit (dict): Point in time with "id" and "keep_alive"; the id is updated as the cluster returns new ones.
+            slice_spec (dict, optional): {"id": n, "max": m} to read only one slice.
+            source_includes (list of str, optional): `_source` fields to return.
+        """
+        search_body = build_search_body(query, filters, list(sort or []) + [{"_shard_doc": "asc"}], page_size, 0, None,
+                                        source_includes)
+        search_body.pop("from")
+        search_body["track_total_hits"] = False
+        if slice_spec:
+            search_body["slice"] = slice_spec
+
+        while True:
+            search_body["pit"] = {"id": pit["id"], "keep_alive": pit["keep_alive"]}
+            started = time.perf_counter()
+            response = self.call_with_verification(lambda client: client.search(body=search_body))
+            self._observe("iter_search_page", started, response=response)
+            pit["id"] = response.get("pit_id", pit["id"])
+            hits = response["hits"]["hits"]
+            if not hits:
+                return
+            yield hits
+            if len(hits) < page_size:
+                return
+            search_body["search_after"] = hits[-1]["sort"]
+
+    def _iter_sliced_pages(self, pit, query, filters, sort, page_size, slices, source_includes=None):
+        """Drain a point in time with one reader thread per slice, yielding hits as pages arrive."""
+        pages = queue.Queue(maxsize=slices * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read_slice(slice_id):
+            try:
+                slice_spec = {"id": slice_id, "max": slices}
+                for page in self._iter_pit_pages(dict(pit), query, filters, sort, page_size, slice_spec, source_includes):
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+            finally:
+                put(done)
+
+        readers = [threading.Thread(target=read_slice, args=(slice_id,), daemon=True) for slice_id in range(slices)]
+        for reader in readers:
+            reader.start()
+        try:
+            finished = 0
+            while finished < slices:
+                item = pages.get()
+                if item is done:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield from item
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
@@ -0,0 +1,254 @@
+import csv
+import gzip
+import json
+import logging
+import os
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = {".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv", ".parquet": "parquet"}
+# Parquet column type of each Elasticsearch field type; every other type is exported as a string.
+ARROW_TYPES = {
+    "long": "int64", "integer": "int64", "short": "int64", "byte": "int64",
+    "double": "float64", "float": "float64", "half_float": "float64", "scaled_float": "float64",
+    "boolean": "bool_",
+}
+
+
+def flatten_document(document, prefix=""):
+    """
+    Flatten nested objects into dotted keys, e.g. {"metadata": {"name": "x"}} -> {"metadata.name": "x"}.
+    Lists are kept as they are.
+    """
+    flat = {}
+    for key, value in document.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten_document(value, f"{path}."))
+        else:
+            flat[path] = value
+    return flat
+
+
+def mapping_columns(mappings, prefix=""):
+    """
+    Return the leaf fields of a mapping, in mapping order, as the columns of a flat export.
+
+    Returns:
+        list of tuple: (dotted field path, Elasticsearch field type). Multi-fields are left out,
+        as they are not part of `_source`.
+    """
+    columns = []
+    for name, field_mapping in mappings.get("properties", {}).items():
+        if "properties" in field_mapping:
+            columns.extend(mapping_columns(field_mapping, f"{prefix}{name}."))
+        else:
+            columns.append((f"{prefix}{name}", field_mapping.get("type", "object")))
+    return columns
+
+
+class SearchExporter:
+    def __init__(self, connector, page_size=1000, slices=None, chunk_rows=5000, keep_alive="2m"):
+        """
+        Stream the hits of a search to NDJSON, CSV or Parquet files, reading them with
+        `ELKConnector.iter_search` so memory stays bounded whatever the index size.
+        :param connector: Connected ELKConnector.
+        :param page_size: Hits fetched per request.
+        :param slices: Number of sliced readers draining the search in parallel threads. Rows of
+            different slices are interleaved in the output.
+        :param chunk_rows: Rows buffered before each write (and per Parquet row group).
+        :param keep_alive: How long the point in time is kept between pages.
+        """
+        self.connector = connector
+        self.page_size = page_size
+        self.slices = slices
+        self.chunk_rows = chunk_rows
+        self.keep_alive = keep_alive
+
+    def export(self, index_name, path, export_format=None, query=None, filters=None, fields=None, include_id=True):
+        """
+        Export every hit matching a query to a file.
+
+        Args:
+            index_name (str): Index, alias or pattern to export.
+            path (str): Output file. A ".gz" suffix gzips NDJSON and CSV output.
+            export_format (str, optional): "ndjson", "csv" or "parquet". Default is guessed from
+                the extension of `path`.
+            query (dict, optional): The main search query, as for `search`.
+            filters (list of dict, optional): Filter clauses, as for `search`.
+            fields (list of str, optional): Dotted fields to export. Default is every mapped field
+                for CSV and Parquet, and the whole `_source` for NDJSON.
+            include_id (bool, optional): Add the document `_id` as the first field.
+
+        Returns:
+            dict: Index, path, format, rows, bytes written, seconds, rows per second, the exported
+            columns and, for CSV and Parquet, the number of unmapped fields left out and of values
+            that did not fit their column type.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+            ValueError: If the format is unknown.
+            ImportError: If Parquet is requested without pyarrow installed.
+        """
+        if not self.connector.client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        export_format = export_format or self.guess_format(path)
+        if export_format not in EXPORT_FORMATS.values():
+            raise ValueError(f"Unknown export format '{export_format}', expected ndjson, csv or parquet")
+        if export_format == "parquet" and pyarrow is None:
+            raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+        columns = self.columns(index_name, fields) if export_format != "ndjson" or fields else None
+        if columns is not None and include_id:
+            columns = [("_id", "keyword")] + [column for column in columns if column[0] != "_id"]
+        hits = self.connector.iter_search(index_name, query, filters, page_size=self.page_size,
+                                          keep_alive=self.keep_alive, slices=self.slices, source_includes=fields)
+        started = time.perf_counter()
+        counters = {"rows": 0, "unmapped_fields": 0, "coerced_values": 0}
+        try:
+            if export_format == "ndjson":
+                self._write_ndjson(hits, path, columns, include_id, counters)
+            elif export_format == "csv":
+                self._write_csv(hits, path, columns, counters)
+            else:
+                self._write_parquet(hits, path, columns, counters)
+        finally:
+            # Closes the point in time now rather than at garbage collection when a write fails.
+            hits.close()
+        seconds = time.perf_counter() - started
+
+        summary = dict(counters, index=index_name, path=path, format=export_format, bytes=os.path.getsize(path),
+                       seconds=round(seconds, 3), rows_per_sec=round(counters["rows"] / seconds, 1) if seconds else 0.0,
+                       columns=[name for name, _ in columns] if columns is not None else None)
+        if counters["unmapped_fields"]:
+            logger.warning("%d values of fields outside the exported columns were left out", counters["unmapped_fields"])
+        logger.info("Exported %d hits of '%s' to %s (%s, %d bytes, %s rows/s)", summary["rows"], index_name, path,
+                    export_format, summary["bytes"], summary["rows_per_sec"])
+        return summary
+
+    @staticmethod
+    def guess_format(path):
+        """Return the export format matching the extension of `path`, ignoring a ".gz" suffix."""
+        _, extension = os.path.splitext(path[:-3] if path.endswith(".gz") else path)
+        if extension not in EXPORT_FORMATS:
+            raise ValueError(f"Cannot guess the export format of '{path}', pass export_format")
+        return EXPORT_FORMATS[extension]
+
+    def columns(self, index_name, fields=None):
+        """
+        Return the (field, type) columns of an export: the mapped leaf fields of every index
+        matching `index_name`, or only `fields` when given.
+        """
+        mappings = self.connector.get_client().indices.get_mapping(index=index_name)
+        types = {}
+        for index_mappings in mappings.values():
+            for name, field_type in mapping_columns(index_mappings.get("mappings", {})):
+                types.setdefault(name, field_type)
+        if fields:
+            return [(name, types.get(name, "keyword")) for name in fields]
+        return list(types.items())
+
+    def _rows(self, hits, names, counters):
+        """Yield each hit as a list of values in column order, flattening nested objects."""
+        known = set(names)
+        for hit in hits:
+            flat = flatten_document(hit.get("_source", {}))
+            flat["_id"] = hit["_id"]
+            counters["rows"] += 1
+            counters["unmapped_fields"] += sum(1 for name in flat if name not in known and name != "_id")
+            yield [flat.get(name) for name in names]
+
+    def _chunks(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _write_ndjson(self, hits, path, columns, include_id, counters):
+        dumps = self.connector.json_dumps
+        names = [name for name, _ in columns] if columns is not None else None
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wb") as output:
+            lines = []
+            for hit in hits:
+                document = hit.get("_source", {})
+                if names is not None:
+                    flat = flatten_document(document)
+                    flat["_id"] = hit["_id"]
+                    document = {name: flat.get(name) for name in names}
+                elif include_id:
+                    document = dict(document, _id=hit["_id"])
+                lines.append(dumps(document))
+                counters["rows"] += 1
+                if len(lines) >= self.chunk_rows:
+                    output.write(b"\n".join(lines) + b"\n")
+                    lines = []
+            if lines:
+                output.write(b"\n".join(lines) + b"\n")
+
+    def _write_csv(self, hits, path, columns, counters):
+        names = [name for name, _ in columns]
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "wt", newline="", encoding="utf-8") as output:
+            writer = csv.writer(output)
+            writer.writerow(names)
+            for chunk in self._chunks(self._rows(hits, names, counters)):
+                writer.writerows([_csv_cell(value) for value in row] for row in chunk)
+
+    def _write_parquet(self, hits, path, columns, counters):
+        names = [name for name, _ in columns]
+        arrow_types = [ARROW_TYPES.get(field_type, "string") for _, field_type in columns]
+        schema = pyarrow.schema([(name, getattr(pyarrow, arrow_type)()) for name, arrow_type in zip(names, arrow_types)])
+        with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+            for chunk in self._chunks(self._rows(hits, names, counters)):
+                arrays = [
+                    pyarrow.array([_arrow_value(row[position], arrow_type, counters) for row in chunk],
+                                  type=schema.field(position).type)
+                    for position, arrow_type in enumerate(arrow_types)
+                ]
+                writer.write_table(pyarrow.Table.from_arrays(arrays, schema=schema))
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=str)
+    return value
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if value in ("true", "false"):
+        return value == "true"
+    raise ValueError(value)
+
+
+CONVERTERS = {"int64": int, "float64": float, "bool_": _to_bool}
+
+
+def _arrow_value(value, arrow_type, counters):
+    """Convert a value to its Parquet column type; values that do not fit become null and are counted."""
+    if value is None:
+        return None
+    if arrow_type == "string":
+        return json.dumps(value, default=str) if isinstance(value, (list, dict)) else str(value)
+    try:
+        if isinstance(value, (list, dict)):
+            raise TypeError(value)
+        return CONVERTERS[arrow_type](value)
+    except (TypeError, ValueError):
+        counters["coerced_values"] += 1
+        return None
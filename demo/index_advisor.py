@@ -0,0 +1,284 @@
+from .mappings import mapping_fields
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Rules of thumb used for the savings estimates; real figures depend on the version and the data.
+TARGET_SHARD_BYTES = 30 * 1024 ** 3     # Aim for 10-50GB per primary shard.
+MAX_SHARD_BYTES = 50 * 1024 ** 3
+SHARD_HEAP_BYTES = 1024 ** 2            # Fixed data node heap per shard copy.
+FIELD_HEAP_BYTES = 1024                 # Data node heap per mapped field, counted per shard copy.
+FIELDS_WARNING_RATIO = 0.8              # Share of index.mapping.total_fields.limit that triggers a warning.
+CONTAINER_TYPES = ("object", "nested")
+
+
+def merge_field_usage(shards):
+    """Sum the per-shard `_field_usage_stats` of an index into one usage dict per field."""
+    usage = {}
+    for shard in shards:
+        for field, stats in shard.get("stats", {}).get("fields", {}).items():
+            total = usage.setdefault(field, {"any": 0, "inverted_index": {}, "doc_values": 0, "norms": 0,
+                                             "stored_fields": 0, "points": 0})
+            for key, value in stats.items():
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        total["inverted_index"][sub_key] = total["inverted_index"].get(sub_key, 0) + sub_value
+                else:
+                    total[key] = total.get(key, 0) + value
+    return usage
+
+
+class IndexAdvisor:
+    def __init__(self, connector, target_shard_size=TARGET_SHARD_BYTES, max_workers=8, chunk_size=50,
+                 analyze_disk_usage=False, disk_usage_timeout=1800):
+        """
+        Inspect indices and recommend shard counts and mapping changes with estimated savings.
+        :param connector: A connected ELKConnector.
+        :param target_shard_size: Primary shard size in bytes the shard recommendations aim for.
+        :param max_workers: Parallel requests when gathering stats.
+        :param chunk_size: Indices per stats request, which keeps the request line short.
+        :param analyze_disk_usage: Also run the `_disk_usage` analysis for exact per-field sizes.
+            It reads every shard, so it is expensive on large indices.
+        :param disk_usage_timeout: Request timeout in seconds of each `_disk_usage` call, which
+            takes minutes on large indices.
+        """
+        self.connector = connector
+        self.target_shard_size = target_shard_size
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.analyze_disk_usage = analyze_disk_usage
+        self.disk_usage_timeout = disk_usage_timeout
+
+    def gather(self, pattern="*"):
+        """
+        Collect sizes, mappings, settings and field usage of every index matching `pattern`.
+
+        One `_cat/indices` call lists the indices; the other APIs are then called for chunks of
+        `chunk_size` indices at a time, with up to `max_workers` requests in flight.
+
+        Returns:
+            dict: Per index name: primaries, replicas, docs, primary_bytes, mappings, settings,
+            field_usage and, when enabled, disk_usage.
+        """
+        client = self.connector.get_client()
+        if not client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        rows = client.cat.indices(index=pattern, format="json", bytes="b", expand_wildcards="open",
+                                  h="index,pri,rep,docs.count,pri.store.size")
+        indices = {
+            row["index"]: {
+                "primaries": int(row["pri"]),
+                "replicas": int(row["rep"]),
+                "docs": int(row["docs.count"] or 0),
+                "primary_bytes": int(row["pri.store.size"] or 0),
+            }
+            for row in rows.body if not row["index"].startswith(".")
+        }
+        names = sorted(indices)
+        chunks = [",".join(names[start:start + self.chunk_size]) for start in range(0, len(names), self.chunk_size)]
+
+        calls = [
+            ("mappings", lambda chunk: client.indices.get_mapping(index=chunk)),
+            ("settings", lambda chunk: client.indices.get_settings(index=chunk, flat_settings=True,
+                                                                    include_defaults=True)),
+            ("field_usage", lambda chunk: client.indices.field_usage_stats(index=chunk)),
+        ]
+        if self.analyze_disk_usage:
+            slow_client = client.options(request_timeout=self.disk_usage_timeout)
+            calls.append(("disk_usage", lambda chunk: slow_client.indices.disk_usage(index=chunk,
+                                                                                     run_expensive_tasks=True)))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [(key, executor.submit(call, chunk)) for key, call in calls for chunk in chunks]
+            for key, future in futures:
+                try:
+                    response = future.result().body
+                except Exception as e:
+                    logger.warning("Could not gather %s: %s", key, e)
+                    continue
+                for index_name, body in response.items():
+                    if index_name not in indices:
+                        continue
+                    if key == "mappings":
+                        indices[index_name]["mappings"] = body.get("mappings", {})
+                    elif key == "settings":
+                        indices[index_name]["settings"] = dict(body.get("defaults", {}), **body.get("settings", {}))
+                    elif key == "field_usage":
+                        indices[index_name]["field_usage"] = merge_field_usage(body.get("shards", []))
+                    else:
+                        indices[index_name]["disk_usage"] = body.get("fields", {})
+        return indices
+
+    def analyze(self, pattern="*"):
+        """
+        Recommend shard counts and mapping changes for every index matching `pattern`.
+
+        Field usage counters are kept since each shard started, so a field reported as unused may
+        still be needed by rare queries; review the mapping recommendations before applying them.
+
+        Returns:
+            list: One report per index, with its sizes, field count and a list of recommendations
+            holding "kind", "field" (when it applies to one), "message" and the estimated
+            "heap_savings_bytes" and "disk_savings_bytes" (None when unknown).
+        """
+        reports = []
+        for index_name, state in sorted(self.gather(pattern).items()):
+            fields = mapping_fields(state.get("mappings", {}))
+            report = {
+                "index": index_name,
+                "primaries": state["primaries"],
+                "replicas": state["replicas"],
+                "docs": state["docs"],
+                "primary_bytes": state["primary_bytes"],
+                "avg_shard_bytes": state["primary_bytes"] // max(state["primaries"], 1),
+                "fields": sum(1 for mapping in fields.values() if mapping.get("type") not in CONTAINER_TYPES),
+                "recommendations": self._shard_recommendations(state) + self._mapping_recommendations(state, fields),
+            }
+            reports.append(report)
+        return reports
+
+    def summarize(self, reports):
+        """
+        Total the estimated savings of `analyze` reports.
+
+        Returns:
+            dict: Indices, shard copies, recommendations per kind and total heap and disk savings.
+        """
+        kinds = {}
+        heap = disk = 0
+        for report in reports:
+            for recommendation in report["recommendations"]:
+                kinds[recommendation["kind"]] = kinds.get(recommendation["kind"], 0) + 1
+                heap += recommendation["heap_savings_bytes"] or 0
+                disk += recommendation["disk_savings_bytes"] or 0
+        return {
+            "indices": len(reports),
+            "shard_copies": sum(report["primaries"] * (1 + report["replicas"]) for report in reports),
+            "recommendations": kinds,
+            "heap_savings_bytes": heap,
+            "disk_savings_bytes": disk,
+        }
+
+    def _shard_recommendations(self, state):
+        primaries, copies = state["primaries"], 1 + state["replicas"]
+        recommended = max(1, math.ceil(state["primary_bytes"] / self.target_shard_size))
+        if recommended == primaries:
+            return []
+        average = state["primary_bytes"] // max(primaries, 1)
+        if recommended < primaries:
+            if average * primaries / recommended > MAX_SHARD_BYTES:
+                return []
+            return [{
+                "kind": "reduce_shards",
+                "message": f"{primaries} primaries average {average} bytes; {recommended} would do "
+                           f"(shrink the index or lower number_of_shards for new indices).",
+                "heap_savings_bytes": (primaries - recommended) * copies * SHARD_HEAP_BYTES,
+                "disk_savings_bytes": None,
+            }]
+        if average > MAX_SHARD_BYTES:
+            return [{
+                "kind": "increase_shards",
+                "message": f"{primaries} primaries average {average} bytes, above {MAX_SHARD_BYTES}; "
+                           f"use {recommended} (split the index or roll over by size).",
+                "heap_savings_bytes": None,
+                "disk_savings_bytes": None,
+            }]
+        return []
+
+    def _mapping_recommendations(self, state, fields):
+        usage = state.get("field_usage")
+        disk = state.get("disk_usage", {})
+        settings = state.get("settings", {})
+        copies = state["primaries"] * (1 + state["replicas"])
+        recommendations = []
+
+        limit = int(settings.get("index.mapping.total_fields.limit", 1000))
+        leaves = [path for path, mapping in fields.items() if mapping.get("type") not in CONTAINER_TYPES]
+        if len(leaves) > FIELDS_WARNING_RATIO * limit:
+            recommendations.append({
+                "kind": "field_count",
+                "message": f"{len(leaves)} mapped fields of a {limit} limit; map open-ended objects as "
+                           f"'flattened' or set 'dynamic': false.",
+                "heap_savings_bytes": None,
+                "disk_savings_bytes": None,
+            })
+        if usage is None:
+            return recommendations
+
+        unused_objects = [
+            path for path, mapping in fields.items()
+            if mapping.get("type") == "object" and mapping.get("enabled", True)
+            and any(leaf.startswith(f"{path}.") for leaf in leaves)
+            and all(not usage.get(leaf, {}).get("any") for leaf in leaves if leaf.startswith(f"{path}."))
+        ]
+        # Only keep the outermost unused objects; their leaves are covered by the object recommendation.
+        unused_objects = [path for path in unused_objects
+                          if not any(path.startswith(f"{other}.") for other in unused_objects)]
+        for path in unused_objects:
+            object_leaves = [leaf for leaf in leaves if leaf.startswith(f"{path}.")]
+            recommendations.append({
+                "kind": "disable_object",
+                "field": path,
+                "message": f"None of the {len(object_leaves)} fields under '{path}' is searched or aggregated; "
+                           f"set 'enabled': false to keep it in _source only.",
+                "heap_savings_bytes": len(object_leaves) * FIELD_HEAP_BYTES * copies,
+                "disk_savings_bytes": self._field_bytes(disk, object_leaves, ("total_in_bytes",)),
+            })
+
+        for path in leaves:
+            if any(path.startswith(f"{parent}.") for parent in unused_objects):
+                continue
+            mapping, field_usage = fields[path], usage.get(path, {})
+            field_type = mapping.get("type")
+            inverted = field_usage.get("inverted_index", {})
+
+            if not field_usage.get("any"):
+                recommendations.append({
+                    "kind": "unused_field",
+                    "field": path,
+                    "message": f"'{path}' ({field_type}) is never searched, sorted or aggregated; "
+                               f"remove it or set 'index': false and 'doc_values': false.",
+                    "heap_savings_bytes": FIELD_HEAP_BYTES * copies,
+                    "disk_savings_bytes": self._field_bytes(disk, [path], ("inverted_index.total_in_bytes",
+                                                                           "doc_values_in_bytes", "points_in_bytes",
+                                                                           "norms_in_bytes")),
+                })
+            elif field_type == "text" and not field_usage.get("norms") and not inverted.get("positions") \
+                    and not inverted.get("proximity") and not inverted.get("term_frequencies"):
+                norms = self._field_bytes(disk, [path], ("norms_in_bytes",))
+                recommendations.append({
+                    "kind": "text_to_keyword",
+                    "field": path,
+                    "message": f"'{path}' is text but only used for exact term filters; map it as keyword.",
+                    "heap_savings_bytes": None,
+                    # Text fields store one norm byte per document and shard copy, which keyword fields drop.
+                    "disk_savings_bytes": norms if norms is not None else state["docs"] * (1 + state["replicas"]),
+                })
+            elif field_type in ("keyword", "long", "integer", "short", "byte", "double", "float", "date", "boolean") \
+                    and mapping.get("doc_values", True) and not field_usage.get("doc_values") \
+                    and (inverted.get("terms") or field_usage.get("points")):
+                recommendations.append({
+                    "kind": "disable_doc_values",
+                    "field": path,
+                    "message": f"'{path}' is filtered on but never sorted, aggregated or scripted; "
+                               f"set 'doc_values': false.",
+                    "heap_savings_bytes": None,
+                    "disk_savings_bytes": self._field_bytes(disk, [path], ("doc_values_in_bytes",)),
+                })
+        return recommendations
+
+    @staticmethod
+    def _field_bytes(disk, paths, keys):
+        """Sum `keys` (dotted) of the `_disk_usage` entries of `paths`, or None without disk analysis."""
+        if not disk:
+            return None
+        total = 0
+        for path in paths:
+            for key in keys:
+                value = disk.get(path, {})
+                for part in key.split("."):
+                    value = value.get(part, 0) if isinstance(value, dict) else 0
+                total += value
+        return total
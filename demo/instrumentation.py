@@ -0,0 +1,174 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import threading
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        Cumulative histogram with fixed upper bounds, as exported by Prometheus.
+        :param buckets: Sorted bucket upper bounds; an implicit +Inf bucket is added.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """Return (upper bound, cumulative count) pairs, ending with ("+Inf", total)."""
+        pairs = []
+        running = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+    def quantile(self, fraction):
+        """Estimate a quantile as the upper bound of the bucket holding it."""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        for bound, running in self.cumulative():
+            if running >= target:
+                return bound if bound != "+Inf" else self.buckets[-1]
+        return self.buckets[-1]
+
+
+class Instrumentation:
+    def __init__(self, namespace="elk_connector", buckets=LATENCY_BUCKETS):
+        """
+        Collect per-operation latency histograms, byte counts and counters.
+        :param namespace: Prefix of the exported metric names.
+        :param buckets: Latency histogram bucket upper bounds in seconds.
+        """
+        self.namespace = namespace
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.request_bytes = {}
+        self.response_bytes = {}
+        self.errors = {}
+        self.counters = {}
+        self.collectors = []
+        self.hooks = []
+
+    def add_hook(self, callback):
+        """Call `callback(event)` after every observed operation, with the event as a dict."""
+        self.hooks.append(callback)
+
+    def add_collector(self, name, collector):
+        """Export the numeric values of the dict returned by `collector()` as gauges prefixed with `name`."""
+        self.collectors.append((name, collector))
+
+    def observe(self, operation, seconds, request_bytes=0, response_bytes=0, error=None):
+        """Record one call of `operation`."""
+        with self.lock:
+            histogram = self.latencies.get(operation)
+            if histogram is None:
+                histogram = self.latencies[operation] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            self.request_bytes[operation] = self.request_bytes.get(operation, 0) + request_bytes
+            self.response_bytes[operation] = self.response_bytes.get(operation, 0) + response_bytes
+            if error is not None:
+                self.errors[operation] = self.errors.get(operation, 0) + 1
+        if self.hooks:
+            event = {"operation": operation, "seconds": seconds, "request_bytes": request_bytes,
+                     "response_bytes": response_bytes, "error": error}
+            for hook in self.hooks:
+                hook(event)
+
+    def increment(self, counter, value=1):
+        """Add `value` to a named counter, such as "connect_retries" or "bulk_items_failed"."""
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def snapshot(self):
+        """
+        Return the current metrics.
+
+        Returns:
+            dict: Per-operation count, error count, latency sum and estimated p50/p95/p99,
+            request and response bytes, plus the counters and collected gauges.
+        """
+        with self.lock:
+            operations = {
+                operation: {
+                    "count": histogram.count,
+                    "errors": self.errors.get(operation, 0),
+                    "seconds_sum": round(histogram.sum, 6),
+                    "p50_seconds": histogram.quantile(0.50),
+                    "p95_seconds": histogram.quantile(0.95),
+                    "p99_seconds": histogram.quantile(0.99),
+                    "request_bytes": self.request_bytes.get(operation, 0),
+                    "response_bytes": self.response_bytes.get(operation, 0),
+                }
+                for operation, histogram in self.latencies.items()
+            }
+            counters = dict(self.counters)
+        return {"operations": operations, "counters": counters, "gauges": self._collect()}
+
+    def export_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        prefix = self.namespace
+        lines = [f"# TYPE {prefix}_operation_seconds histogram"]
+        with self.lock:
+            for operation, histogram in sorted(self.latencies.items()):
+                for bound, running in histogram.cumulative():
+                    lines.append(f'{prefix}_operation_seconds_bucket{{operation="{operation}",le="{bound}"}} {running}')
+                lines.append(f'{prefix}_operation_seconds_sum{{operation="{operation}"}} {histogram.sum}')
+                lines.append(f'{prefix}_operation_seconds_count{{operation="{operation}"}} {histogram.count}')
+            for name, values in (("request_bytes", self.request_bytes), ("response_bytes", self.response_bytes),
+                                 ("operation_errors", self.errors)):
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                for operation, value in sorted(values.items()):
+                    lines.append(f'{prefix}_{name}_total{{operation="{operation}"}} {value}')
+            for counter, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {prefix}_{counter}_total counter")
+                lines.append(f"{prefix}_{counter}_total {value}")
+        for gauge, value in sorted(self._collect().items()):
+            lines.append(f"# TYPE {prefix}_{gauge} gauge")
+            lines.append(f"{prefix}_{gauge} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _collect(self):
+        gauges = {}
+        for name, collector in self.collectors:
+            for key, value in collector().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"{name}_{key}"] = value
+        return gauges
+
+
+def start_metrics_server(instrumentation, port=9464, host="127.0.0.1"):
+    """
+    Serve `instrumentation.export_prometheus()` on http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: The running server; call `shutdown()` to stop it.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = instrumentation.export_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,18 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
+import logging
+import math
+import threading
+import time
 import requests
 
+logger = logging.getLogger(__name__)
+
+# Kibana answers `_find` only up to page * per_page = 10000, the saved objects index result window.
+MAX_FIND_RESULTS = 10000
+
+
 class KibanaClient:
-    def __init__(self, **elk_credentials):
+    def __init__(self, pool_size=10, max_workers=4, cache_ttl=30.0, page_size=1000, **elk_credentials):
         """
         Initialize the Kibana client connector.
         :param host: Kibana host URL.
         :param user: Username for authentication.
         :param pass: Password for authentication.
+        :param cert: Optional dict with "ca_cert", "client_cert" and "client_key" paths for TLS.
+        :param pool_size: Number of pooled HTTP connections kept by the session.
+        :param max_workers: Number of requests sent concurrently by `get_kibana_data`.
+        :param cache_ttl: Seconds spaces, counts and data views are cached. None or 0 disables the cache.
+        :param page_size: Saved objects fetched per `_find` request.
         """
         self.host = elk_credentials['kibana_host']
         self.username = elk_credentials['user']
         self.password = elk_credentials['pass']
         self.timeout = 10
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.page_size = page_size
+        self.cache = {}
+        self.cache_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update(self._get_auth_header())
+        retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        certs = elk_credentials.get('cert') or {}
+        if certs.get('ca_cert'):
+            self.session.verify = certs['ca_cert']
+        if certs.get('client_cert'):
+            self.session.cert = (certs['client_cert'], certs['client_key'])
 
     def _get_auth_header(self):
         """Generate the Authorization header for Basic Auth."""
@@ -20,38 +54,204 @@ class KibanaClient:
         encoded_auth = base64.b64encode(auth_str.encode()).decode()
         return {"Authorization": f"Basic {encoded_auth}", "kbn-xsrf": "true"}
 
+    def close(self):
+        """Close the pooled session."""
+        self.session.close()
+
+    def invalidate_cache(self):
+        """Drop every cached response."""
+        with self.cache_lock:
+            self.cache.clear()
+
     def get_kibana_data(self):
-        """Retrieve Kibana dashboards, spaces, and data views."""
+        """
+        Retrieve the number of Kibana dashboards, spaces, and data views, counted over all spaces.
+        The per-space counts are fetched concurrently.
+
+        Returns:
+            dict: Totals under "dashboards", "spaces" and "dataViews", and the counts of every
+            space under "per_space". All zero when Kibana cannot be reached.
+        """
         try:
-            headers = self._get_auth_header()
-    
-            dashboards_url = f"{self.host}/api/saved_objects/_find?type=dashboard"
-            dashboards_response = requests.get(dashboards_url, headers=headers, timeout=self.timeout)
-            dashboards_response.raise_for_status()
-            dashboards = len(dashboards_response.json().get("saved_objects", []))
-            
-            spaces_url = f"{self.host}/api/spaces/space"
-            spaces_response = requests.get(spaces_url, headers=headers, timeout=self.timeout)
-            spaces_response.raise_for_status()
-            spaces = len(spaces_response.json())
-            
-            data_views_url = f"{self.host}/api/data_views"
-            data_views_response = requests.get(data_views_url, headers=headers, timeout=self.timeout)
-            data_views_response.raise_for_status()
-            data_views = len(data_views_response.json().get("data_view", []))
-
-            print(f"================================================================================")
-            print(f"Kibana info")
-            print(f"Number of dashboards: {dashboards}")
-            print(f"Number of spaces: {spaces}")
-            print(f"Number of data views: {data_views}")
-            print(f"================================================================================")
-
-            return {
-                "dashboards": dashboards,
-                "spaces": spaces,
-                "dataViews": data_views,
+            spaces = [space["id"] for space in self.get_spaces()]
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                dashboards = executor.map(lambda space: self.count_saved_objects("dashboard", space), spaces)
+                data_views = list(executor.map(self.get_data_views, spaces))
+                per_space = {space: {"dashboards": dashboard_count, "dataViews": len(space_data_views)}
+                             for space, dashboard_count, space_data_views in zip(spaces, dashboards, data_views)}
+
+            data = {
+                "dashboards": sum(counts["dashboards"] for counts in per_space.values()),
+                "spaces": len(spaces),
+                # A data view shared with several spaces is listed in each of them; count it once.
+                "dataViews": len({data_view["id"] for space_data_views in data_views for data_view in space_data_views}),
+                "per_space": per_space,
             }
+            logger.info("Kibana info: %d dashboards, %d spaces, %d data views",
+                        data["dashboards"], data["spaces"], data["dataViews"])
+            return data
         except requests.exceptions.RequestException as e:
-            print(f"Error retrieving Kibana data: {str(e)}")
-            return {"dashboards": 0, "spaces": 0, "dataViews": 0}
+            logger.error("Error retrieving Kibana data: %s", e)
+            return {"dashboards": 0, "spaces": 0, "dataViews": 0, "per_space": {}}
+
+    def get_spaces(self):
+        """Return the Kibana spaces (cached)."""
+        return self._cached(("spaces",), lambda: self._get("/api/spaces/space").json())
+
+    def get_data_views(self, space=None):
+        """Return the data views of a space, the default space when None (cached)."""
+        return self._cached(("data_views", space),
+                            lambda: self._get("/api/data_views", space=space).json().get("data_view", []))
+
+    def count_saved_objects(self, object_type, space=None):
+        """
+        Count the saved objects of a type in a space without fetching them (cached).
+
+        Args:
+            object_type (str): Saved object type, e.g. "dashboard" or "visualization".
+            space (str, optional): Space id, the default space when None.
+
+        Returns:
+            int: The number of saved objects.
+        """
+        return self._cached(("count", object_type, space),
+                            lambda: self._get("/api/saved_objects/_find", space=space,
+                                              params={"type": object_type, "per_page": 0}).json()["total"])
+
+    def iter_saved_objects(self, object_type, space=None, fields=None):
+        """
+        Yield every saved object of a type in a space, one `_find` page at a time.
+
+        Args:
+            object_type (str or list): Saved object type(s).
+            space (str, optional): Space id, the default space when None.
+            fields (list, optional): Attributes to return, to keep pages small.
+
+        Yields:
+            dict: Saved objects. Kibana stops at 10000 objects per query; use
+            `export_saved_objects` to copy more.
+        """
+        params = {"type": object_type}
+        if fields:
+            params["fields"] = fields
+        fetched = 0
+        while True:
+            # The last reachable page is made smaller rather than skipped; it must still start right
+            # after the objects fetched so far, i.e. (page - 1) * per_page == fetched.
+            per_page = min(self.page_size, MAX_FIND_RESULTS - fetched)
+            if fetched % per_page:
+                per_page = math.gcd(per_page, fetched)
+            params.update(per_page=per_page, page=fetched // per_page + 1)
+            page = self._get("/api/saved_objects/_find", space=space, params=params).json()
+            objects = page.get("saved_objects", [])
+            yield from objects
+            fetched += per_page
+            if not objects or fetched >= page.get("total", 0):
+                return
+            if fetched >= MAX_FIND_RESULTS:
+                logger.warning("Stopping after %d of %d saved objects in space '%s': Kibana's _find limit",
+                               fetched, page["total"], space or "default")
+                return
+
+    def iter_all_saved_objects(self, object_type, fields=None):
+        """
+        Yield the saved objects of a type in every space, as (space id, saved object) pairs.
+        """
+        for space in self.get_spaces():
+            for saved_object in self.iter_saved_objects(object_type, space["id"], fields):
+                yield space["id"], saved_object
+
+    def export_saved_objects(self, types=("dashboard",), objects=None, space=None, path=None,
+                             include_references=True):
+        """
+        Export saved objects, with the objects they reference, as NDJSON in one request.
+
+        Args:
+            types (iterable, optional): Types to export entirely. Ignored when `objects` is given.
+            objects (list, optional): {"type": ..., "id": ...} dicts of specific objects to export.
+            space (str, optional): Space id, the default space when None.
+            path (str, optional): File the export is streamed to, instead of being returned.
+            include_references (bool, optional): Also export referenced visualizations, data views, etc.
+
+        Returns:
+            bytes or int: The NDJSON export, or the number of bytes written to `path`.
+
+        Raises:
+            Exception: If the export fails.
+        """
+        body = {"objects": objects} if objects else {"type": list(types)}
+        body["includeReferencesDeep"] = include_references
+        try:
+            response = self.session.post(self._url("/api/saved_objects/_export", space), json=body,
+                                         timeout=self.timeout * 6, stream=path is not None)
+            response.raise_for_status()
+            if path is None:
+                return response.content
+            written = 0
+            with open(path, "wb") as output:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    output.write(chunk)
+                    written += len(chunk)
+            logger.info("Exported saved objects of space '%s' to %s (%d bytes)", space or "default", path, written)
+            return written
+        except requests.exceptions.RequestException as e:
+            logger.error("Error exporting saved objects: %s", e)
+            raise Exception(f"Error exporting saved objects: {str(e)}")
+
+    def import_saved_objects(self, ndjson, space=None, overwrite=True):
+        """
+        Import an NDJSON export of saved objects in one request.
+
+        Args:
+            ndjson (bytes or str): The export, or the path of a file holding it.
+            space (str, optional): Target space id, the default space when None.
+            overwrite (bool, optional): Replace existing objects with the same id.
+
+        Returns:
+            dict: Kibana's import result, with "success", "successCount" and "errors".
+
+        Raises:
+            Exception: If the import fails.
+        """
+        try:
+            if isinstance(ndjson, str):
+                with open(ndjson, "rb") as source:
+                    ndjson = source.read()
+            response = self.session.post(self._url("/api/saved_objects/_import", space),
+                                         params={"overwrite": str(overwrite).lower()},
+                                         files={"file": ("export.ndjson", ndjson, "application/ndjson")},
+                                         timeout=self.timeout * 6)
+            response.raise_for_status()
+            self.invalidate_cache()
+            result = response.json()
+            logger.info("Imported %d saved objects into space '%s' (%d errors)", result.get("successCount", 0),
+                        space or "default", len(result.get("errors", [])))
+            return result
+        except requests.exceptions.RequestException as e:
+            logger.error("Error importing saved objects: %s", e)
+            raise Exception(f"Error importing saved objects: {str(e)}")
+
+    def _url(self, path, space=None):
+        """Return the URL of an API path, in the given space when not the default one."""
+        if space and space != "default":
+            return f"{self.host}/s/{space}{path}"
+        return f"{self.host}{path}"
+
+    def _get(self, path, space=None, params=None):
+        response = self.session.get(self._url(path, space), params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def _cached(self, key, loader):
+        """Return the cached value of `key`, calling `loader()` when it is missing or expired."""
+        if not self.cache_ttl:
+            return loader()
+        now = time.monotonic()
+        with self.cache_lock:
+            entry = self.cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        value = loader()
+        with self.cache_lock:
+            self.cache[key] = (now + self.cache_ttl, value)
+        return value
@@ -0,0 +1,406 @@
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import logging
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Daily indices as written by Filebeat (`access-portal-logs-%{+yyyy.MM.dd}`) and Logstash
+# (`logstash-%{+YYYY.MM.dd}`), optionally followed by a rollover generation and a shrink suffix.
+INDEX_NAME_PATTERN = re.compile(
+    r"^(?P<prefix>.+?)"
+    r"(?:-(?P<date>\d{4}\.\d{2}\.\d{2}))?"
+    r"(?:-(?P<generation>\d{6}))?"
+    r"(?P<shrunk>-shrunk)?$"
+)
+
+# Settings of a shrink source changed for the shrink and restored when it fails.
+SHRINK_SOURCE_SETTINGS = ("index.number_of_replicas", "index.routing.allocation.require._name", "index.blocks.write")
+
+SIZE_UNITS = {"b": 1, "kb": 1024, "mb": 1024 ** 2, "gb": 1024 ** 3, "tb": 1024 ** 4}
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_size(value):
+    """Convert a size such as "50gb" or a number of bytes to bytes. None stays None."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?b)\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid size '{value}'")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_duration(value):
+    """Convert a duration such as "30d" or "12h" or a number of seconds to seconds. None stays None."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd])\s*", value.lower())
+    if not match:
+        raise ValueError(f"Invalid duration '{value}'")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def parse_index_name(index_name):
+    """
+    Split a time-based index name into its parts.
+
+    Args:
+        index_name (str): e.g. "logstash-2024.05.01", "access-portal-logs-2024.05.01-000003"
+            or "access-portal-logs-2024.05.01-000003-shrunk".
+
+    Returns:
+        dict: prefix, date (datetime.date or None), generation (int or None) and shrunk (bool).
+    """
+    match = INDEX_NAME_PATTERN.match(index_name)
+    date = None
+    if match.group("date"):
+        try:
+            date = datetime.datetime.strptime(match.group("date"), "%Y.%m.%d").date()
+        except ValueError:
+            date = None
+    return {
+        "prefix": match.group("prefix"),
+        "date": date,
+        "generation": int(match.group("generation")) if match.group("generation") else None,
+        "shrunk": bool(match.group("shrunk")),
+    }
+
+
+def rollover_index_name(prefix, generation, now=None):
+    """Return the name of the rollover index `generation` of `prefix`, dated today (UTC)."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return f"{prefix}-{now:%Y.%m.%d}-{generation:06d}"
+
+
+class LifecyclePolicy:
+    def __init__(self, write_alias=None, rollover_max_size=None, rollover_max_primary_shard_size="50gb",
+                 rollover_max_age="1d", rollover_max_docs=None, force_merge_after="2d", max_num_segments=1,
+                 shrink_after=None, shrink_shards=1, delete_after="30d"):
+        """
+        Hot/warm/cold/delete phases of a family of time-based indices, in the spirit of an ILM policy.
+        Sizes accept "50gb"-style strings or bytes, durations "30d"-style strings or seconds; None
+        disables a condition or phase.
+        :param write_alias: Alias the writers use; enables rollover of the index behind it.
+        :param rollover_max_size: Roll over when the primaries of the write index reach this size.
+        :param rollover_max_primary_shard_size: Roll over when its largest primary shard reaches this size.
+        :param rollover_max_age: Roll over when the write index is this old.
+        :param rollover_max_docs: Roll over when the write index holds this many documents.
+        :param force_merge_after: Age after which read-only indices are force-merged.
+        :param max_num_segments: Segments per shard after a force-merge.
+        :param shrink_after: Age after which read-only indices are shrunk.
+        :param shrink_shards: Number of primary shards of shrunk indices.
+        :param delete_after: Age after which indices are deleted.
+        """
+        self.write_alias = write_alias
+        self.rollover_max_size = parse_size(rollover_max_size)
+        self.rollover_max_primary_shard_size = parse_size(rollover_max_primary_shard_size)
+        self.rollover_max_age = parse_duration(rollover_max_age)
+        self.rollover_max_docs = rollover_max_docs
+        self.force_merge_after = parse_duration(force_merge_after)
+        self.max_num_segments = max_num_segments
+        self.shrink_after = parse_duration(shrink_after)
+        self.shrink_shards = shrink_shards
+        self.delete_after = parse_duration(delete_after)
+
+    def rollover_conditions(self):
+        """Return the conditions in the form of the `_rollover` API."""
+        conditions = {}
+        if self.rollover_max_size is not None:
+            conditions["max_size"] = f"{self.rollover_max_size}b"
+        if self.rollover_max_primary_shard_size is not None:
+            conditions["max_primary_shard_size"] = f"{self.rollover_max_primary_shard_size}b"
+        if self.rollover_max_age is not None:
+            conditions["max_age"] = f"{int(self.rollover_max_age)}s"
+        if self.rollover_max_docs is not None:
+            conditions["max_docs"] = self.rollover_max_docs
+        return conditions
+
+
+class IndexLifecycleManager:
+    def __init__(self, connector, policies):
+        """
+        Plan and apply rollover, force-merge, shrink and retention for families of time-based indices.
+        :param connector: A connected ELKConnector.
+        :param policies: Dict mapping an index prefix (e.g. "logstash") to its LifecyclePolicy.
+        """
+        self.connector = connector
+        self.policies = policies
+        self.shrink_timeout = 600.0
+        self.shrink_poll_interval = 5.0
+
+    def bootstrap(self, prefix, index_body=None):
+        """
+        Create the first rollover index of `prefix` behind its write alias, unless the alias exists.
+
+        Args:
+            prefix (str): Index prefix with a policy that has a `write_alias`.
+            index_body (dict, optional): Settings and mappings of the index.
+
+        Returns:
+            str: The name of the current write index.
+
+        Raises:
+            ConnectionError: If not connected to Elasticsearch.
+        """
+        alias = self.policies[prefix].write_alias
+        client = self.connector.get_client()
+        if not client:
+            raise ConnectionError("Not connected to Elasticsearch")
+        try:
+            if client.indices.exists_alias(name=alias):
+                return next(iter(client.indices.get_alias(name=alias).body))
+            index_name = rollover_index_name(prefix, 1)
+            body = dict(index_body or {})
+            body["aliases"] = dict(body.get("aliases", {}), **{alias: {"is_write_index": True}})
+            client.indices.create(index=index_name, body=body)
+            self.connector.invalidate_search_cache(alias, aliases_changed=True)
+            self.connector.invalidate_metadata_cache(alias)
+            logger.info("Bootstrapped write alias '%s' on index '%s'", alias, index_name)
+            return index_name
+        except Exception as e:
+            logger.error("Error bootstrapping write alias '%s': %s", alias, e)
+            raise Exception(f"Error bootstrapping write alias: {str(e)}")
+
+    def gather(self, prefix):
+        """
+        Collect the state of every index of `prefix` with four cluster-wide calls made in parallel.
+
+        Returns:
+            dict: Per index name: primary and replica shard counts, documents, primary store bytes,
+            the store bytes of its largest primary shard, creation time, segment count, name parts
+            and whether it is a write index.
+        """
+        client = self.connector.get_client()
+        pattern = f"{prefix}-*"
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            cat_future = executor.submit(client.cat.indices, index=pattern, format="json", bytes="b",
+                                         h="index,pri,rep,docs.count,pri.store.size,creation.date,status")
+            shards_future = executor.submit(client.cat.shards, index=pattern, format="json", bytes="b",
+                                            h="index,shard,prirep,store")
+            alias_future = executor.submit(client.indices.get_alias, index=pattern)
+            segments_future = executor.submit(client.indices.stats, index=pattern, metric="segments",
+                                              filter_path="indices.*.primaries.segments.count")
+            rows, shards = cat_future.result(), shards_future.result()
+            aliases, segments = alias_future.result(), segments_future.result()
+
+        segments = (segments.body or {}).get("indices", {})
+        largest_primary = {}
+        for shard in shards.body:
+            if shard["prirep"] == "p":
+                largest_primary[shard["index"]] = max(largest_primary.get(shard["index"], 0), int(shard["store"] or 0))
+        indices = {}
+        for row in rows.body:
+            parts = parse_index_name(row["index"])
+            if parts["prefix"] != prefix:
+                continue
+            index_aliases = aliases.body.get(row["index"], {}).get("aliases", {})
+            indices[row["index"]] = dict(
+                parts,
+                primaries=int(row["pri"]),
+                replicas=int(row["rep"]),
+                docs=int(row["docs.count"] or 0),
+                primary_bytes=int(row["pri.store.size"] or 0),
+                largest_primary_bytes=largest_primary.get(row["index"], 0),
+                created=datetime.datetime.fromtimestamp(int(row["creation.date"]) / 1000, datetime.timezone.utc),
+                status=row["status"],
+                segments=segments.get(row["index"], {}).get("primaries", {}).get("segments", {}).get("count"),
+                aliases=sorted(index_aliases),
+                write_index=any(alias.get("is_write_index") for alias in index_aliases.values()),
+            )
+        return indices
+
+    def plan(self, prefixes=None, now=None):
+        """
+        Work out the lifecycle actions due now, without changing anything (dry run).
+
+        Indices are aged by the date in their name when they have one, otherwise by creation
+        time. The write index is only ever rolled over; an index past retention is only deleted.
+
+        Args:
+            prefixes (list of str, optional): Prefixes to plan for. Default is every policy.
+            now (datetime, optional): Reference time, UTC. Default is the current time.
+
+        Returns:
+            list: Actions as dicts with "action" (rollover, shrink, force_merge or delete),
+            "index", "reason" and the arguments needed to apply it.
+        """
+        now = now or datetime.datetime.now(datetime.timezone.utc)
+        actions = []
+        for prefix in prefixes or self.policies:
+            policy = self.policies[prefix]
+            for index_name, state in sorted(self.gather(prefix).items()):
+                if state["date"] is not None:
+                    born = datetime.datetime.combine(state["date"], datetime.time(), datetime.timezone.utc)
+                else:
+                    born = state["created"]
+                age = (now - born).total_seconds()
+
+                if state["write_index"]:
+                    reason = self._rollover_reason(policy, state, (now - state["created"]).total_seconds())
+                    if reason and policy.write_alias in state["aliases"]:
+                        next_generation = (state["generation"] or 0) + 1
+                        actions.append({"action": "rollover", "index": index_name, "reason": reason,
+                                        "alias": policy.write_alias, "conditions": policy.rollover_conditions(),
+                                        "new_index": rollover_index_name(prefix, next_generation, now)})
+                    continue
+
+                if policy.delete_after is not None and age >= policy.delete_after:
+                    actions.append({"action": "delete", "index": index_name,
+                                    "reason": f"older than {_format_seconds(policy.delete_after)}"})
+                elif policy.shrink_after is not None and age >= policy.shrink_after and not state["shrunk"] \
+                        and state["primaries"] > policy.shrink_shards:
+                    actions.append({"action": "shrink", "index": index_name, "target": f"{index_name}-shrunk",
+                                    "shards": policy.shrink_shards, "aliases": state["aliases"],
+                                    "reason": f"{state['primaries']} primaries, older than "
+                                              f"{_format_seconds(policy.shrink_after)}"})
+                elif policy.force_merge_after is not None and age >= policy.force_merge_after \
+                        and (state["segments"] is None
+                             or state["segments"] > policy.max_num_segments * state["primaries"]):
+                    actions.append({"action": "force_merge", "index": index_name,
+                                    "max_num_segments": policy.max_num_segments,
+                                    "reason": f"{state['segments']} segments, older than "
+                                              f"{_format_seconds(policy.force_merge_after)}"})
+        return actions
+
+    def apply(self, actions):
+        """
+        Apply planned actions in order. A failed action is reported and does not stop the others.
+
+        Returns:
+            list: The actions, each with "status" ("done" or "failed") and "error" when it failed.
+        """
+        client = self.connector.get_client()
+        handlers = {"rollover": self._rollover, "delete": self._delete, "shrink": self._shrink,
+                    "force_merge": self._force_merge}
+        results = []
+        for action in actions:
+            try:
+                handlers[action["action"]](client, action)
+                logger.info("Lifecycle %s of '%s' done: %s", action["action"], action["index"], action["reason"])
+                results.append(dict(action, status="done"))
+            except Exception as e:
+                logger.error("Lifecycle %s of '%s' failed: %s", action["action"], action["index"], e)
+                results.append(dict(action, status="failed", error=str(e)))
+        return results
+
+    def run(self, prefixes=None, dry_run=True):
+        """
+        Plan the due actions and apply them unless `dry_run`.
+
+        Returns:
+            list: The planned actions, with their outcome when applied.
+        """
+        actions = self.plan(prefixes)
+        if dry_run:
+            for action in actions:
+                logger.info("[dry run] would %s '%s': %s", action["action"], action["index"], action["reason"])
+            return actions
+        return self.apply(actions)
+
+    @staticmethod
+    def _rollover_reason(policy, state, age):
+        if policy.rollover_max_size is not None and state["primary_bytes"] >= policy.rollover_max_size:
+            return f"primaries hold {state['primary_bytes']} bytes"
+        if policy.rollover_max_primary_shard_size is not None \
+                and state["largest_primary_bytes"] >= policy.rollover_max_primary_shard_size:
+            return f"largest primary shard holds {state['largest_primary_bytes']} bytes"
+        if policy.rollover_max_age is not None and age >= policy.rollover_max_age:
+            return f"older than {_format_seconds(policy.rollover_max_age)}"
+        if policy.rollover_max_docs is not None and state["docs"] >= policy.rollover_max_docs:
+            return f"holds {state['docs']} documents"
+        return None
+
+    def _rollover(self, client, action):
+        # The conditions are checked again by the cluster, so a stale plan does not roll over twice.
+        client.indices.rollover(alias=action["alias"], new_index=action["new_index"],
+                                conditions=action.get("conditions"))
+        self.connector.invalidate_search_cache(action["alias"], aliases_changed=True)
+        self.connector.invalidate_metadata_cache(action["alias"])
+
+    def _delete(self, client, action):
+        client.indices.delete(index=action["index"])
+        self.connector.invalidate_search_cache(action["index"], aliases_changed=True)
+        self.connector.invalidate_metadata_cache(action["index"])
+
+    def _force_merge(self, client, action):
+        # Runs as a background task on the cluster; the call returns as soon as it is accepted.
+        client.indices.forcemerge(index=action["index"], max_num_segments=action["max_num_segments"],
+                                  wait_for_completion=False)
+
+    def _shrink(self, client, action):
+        index_name, target = action["index"], action["target"]
+        # Shrinking needs a read-only source with a copy of every shard on a single node. Replicas
+        # are dropped meanwhile, so the node does not need room for two copies of a shard.
+        shards = client.cat.shards(index=index_name, format="json", h="shard,prirep,node")
+        node = next(shard["node"] for shard in shards.body if shard["prirep"] == "p" and shard["node"])
+        current = client.indices.get_settings(index=index_name, flat_settings=True).body[index_name]["settings"]
+        originals = {key: current.get(key) for key in SHRINK_SOURCE_SETTINGS}
+        client.indices.put_settings(index=index_name, settings={
+            "index.number_of_replicas": 0,
+            "index.routing.allocation.require._name": node,
+            "index.blocks.write": True,
+        })
+        shrunk = False
+        try:
+            self._wait_for_shards_on_node(client, index_name, node)
+            target_settings = {
+                "index.number_of_shards": action["shards"],
+                "index.routing.allocation.require._name": None,
+                "index.blocks.write": None,
+            }
+            if originals["index.number_of_replicas"] is not None:
+                target_settings["index.number_of_replicas"] = originals["index.number_of_replicas"]
+            waiting = client.options(request_timeout=self.shrink_timeout + 30)
+            waiting.indices.shrink(index=index_name, target=target, settings=target_settings)
+            health = waiting.cluster.health(index=target, wait_for_status="yellow",
+                                            timeout=f"{int(self.shrink_timeout)}s")
+            if health.body.get("timed_out"):
+                raise Exception(f"Shrunk index '{target}' did not become yellow within {int(self.shrink_timeout)}s")
+            shrunk = True
+        finally:
+            if not shrunk:
+                try:
+                    # A started shrink leaves a half-built target, which would make the next shrink fail.
+                    if client.indices.exists(index=target):
+                        client.indices.delete(index=target)
+                finally:
+                    # None resets the settings that were not set explicitly.
+                    client.indices.put_settings(index=index_name, settings=originals)
+                    logger.warning("Shrink of '%s' failed, its write block, allocation and replicas were restored "
+                                   "and the target '%s' removed", index_name, target)
+        alias_actions = [{"add": {"index": target, "alias": alias}} for alias in action["aliases"]]
+        alias_actions.append({"remove_index": {"index": index_name}})
+        client.indices.update_aliases(actions=alias_actions)
+        self.connector.invalidate_search_cache(index_name, aliases_changed=True)
+        self.connector.invalidate_metadata_cache(index_name)
+        for alias in action["aliases"]:
+            self.connector.invalidate_metadata_cache(alias)
+
+    def _wait_for_shards_on_node(self, client, index_name, node):
+        """
+        Wait until every shard of an index is a started primary on `node`. Unlike
+        `wait_for_no_relocating_shards`, this does not return before the relocations started.
+
+        Raises:
+            Exception: If the shards are not all on the node after `shrink_timeout` seconds.
+        """
+        deadline = time.monotonic() + self.shrink_timeout
+        while True:
+            shards = client.cat.shards(index=index_name, format="json", h="shard,prirep,state,node").body
+            if shards and all(shard["prirep"] == "p" and shard["state"] == "STARTED" and shard["node"] == node
+                              for shard in shards):
+                return
+            if time.monotonic() >= deadline:
+                raise Exception(f"Shards of '{index_name}' did not move to node '{node}' within "
+                                f"{int(self.shrink_timeout)}s")
+            time.sleep(self.shrink_poll_interval)
+
+
+def _format_seconds(seconds):
+    """Render a duration in the largest whole unit, e.g. 172800 -> "2d"."""
+    for unit in ("d", "h", "m"):
+        if seconds >= DURATION_UNITS[unit] and seconds % DURATION_UNITS[unit] == 0:
+            return f"{int(seconds // DURATION_UNITS[unit])}{unit}"
+    return f"{int(seconds)}s"
@@ -0,0 +1,257 @@
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import functools
+import re
+import threading
+import time
+
+# Building blocks in the grok syntax of Logstash: %{PATTERN:field} or %{PATTERN:field:int|float}.
+GROK_PATTERNS = {
+    "WORD": r"\b\w+\b",
+    "NOTSPACE": r"\S+",
+    "SPACE": r"\s*",
+    "DATA": r".*?",
+    "GREEDYDATA": r".*",
+    "INT": r"[+-]?\d+",
+    "POSINT": r"\b[1-9]\d*\b",
+    "NUMBER": r"[+-]?(?:\d+(?:\.\d*)?|\.\d+)",
+    "IPV4": r"(?:\d{1,3}\.){3}\d{1,3}",
+    "IPV6": r"[0-9A-Fa-f:]*:[0-9A-Fa-f:.]+",
+    "IP": r"%{IPV6}|%{IPV4}",
+    "HOSTNAME": r"\b[0-9A-Za-z][0-9A-Za-z-]{0,62}(?:\.[0-9A-Za-z][0-9A-Za-z-]{0,62})*\.?\b",
+    "IPORHOST": r"%{IP}|%{HOSTNAME}",
+    "USER": r"[a-zA-Z0-9._-]+",
+    "LOGLEVEL": r"(?i:trace|debug|info|notice|warn(?:ing)?|error|err|crit(?:ical)?|fatal|severe|alert|emerg(?:ency)?)",
+    "MONTH": r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\b",
+    "HTTPDATE": r"\d{2}/%{MONTH}/\d{4}:\d{2}:\d{2}:\d{2} [+-]\d{4}",
+    "SYSLOGTIMESTAMP": r"%{MONTH} +\d{1,2} \d{2}:\d{2}:\d{2}",
+    "TIMESTAMP_ISO8601": r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?",
+    "URIPATHPARAM": r"/[^\s?#]*(?:\?[^\s#]*)?",
+    "QS": r'"(?:[^"\\]|\\.)*"',
+}
+
+# Line formats of common producers, tried in order by the default parser.
+COMMON_LOG_PATTERNS = [
+    ("combined_access", r'%{IPORHOST:source.address} %{USER:user.ident} %{USER:user.name} \[%{HTTPDATE:timestamp}\] '
+                        r'"%{WORD:http.method} %{NOTSPACE:url.original}(?: HTTP/%{NUMBER:http.version})?" '
+                        r'%{INT:http.status_code:int} (?:%{INT:http.response.bytes:int}|-)'
+                        r'(?: "%{DATA:http.referrer}" "%{DATA:user_agent.original}")?'),
+    ("iso8601_level", r"%{TIMESTAMP_ISO8601:timestamp}\s+\[?%{LOGLEVEL:log.level}\]?\s+%{GREEDYDATA:message}"),
+    ("syslog", r"%{SYSLOGTIMESTAMP:timestamp} %{IPORHOST:host.name} %{DATA:process.name}(?:\[%{POSINT:process.pid:int}\])?: "
+               r"%{GREEDYDATA:message}"),
+]
+
+DATE_FORMATS = ("%d/%b/%Y:%H:%M:%S %z", "%b %d %H:%M:%S", "%Y-%m-%d %H:%M:%S,%f", "%Y-%m-%d %H:%M:%S.%f")
+CONVERTERS = {"int": int, "float": float, "str": str}
+GROK_REFERENCE = re.compile(r"%\{(\w+)(?::([\w.@-]+))?(?::(int|float|str))?\}")
+
+
+@functools.lru_cache(maxsize=256)
+def compile_grok(pattern, custom_patterns=()):
+    """
+    Compile a grok expression into a regular expression. Results are cached per pattern.
+
+    Args:
+        pattern (str): Expression such as "%{IP:client.ip} %{INT:bytes:int}".
+        custom_patterns (tuple, optional): Extra (name, regex) pairs, as a tuple so it can be cached.
+
+    Returns:
+        tuple: (compiled regex, list of (group name, field name, converter)).
+
+    Raises:
+        KeyError: If the expression references an unknown pattern.
+    """
+    library = dict(GROK_PATTERNS, **dict(custom_patterns))
+    fields = []
+
+    def expand(expression, depth=0):
+        if depth > 20:
+            raise ValueError(f"Grok pattern nesting too deep in '{expression}'")
+
+        def replace(match):
+            name, field, type_name = match.groups()
+            body = expand(library[name], depth + 1)
+            if not field:
+                return f"(?:{body})"
+            group = f"g{len(fields)}"
+            fields.append((group, field, CONVERTERS[type_name or "str"]))
+            return f"(?P<{group}>{body})"
+
+        return GROK_REFERENCE.sub(replace, expression)
+
+    return re.compile(expand(pattern)), fields
+
+
+def normalize_date(value, formats=DATE_FORMATS, default_timezone=datetime.timezone.utc):
+    """
+    Convert a date string to ISO 8601 in UTC, or return None when no format matches.
+    ISO 8601 strings and epoch seconds or milliseconds are recognised without a format; dates
+    without a year (syslog) get the current year, and dates without a zone `default_timezone`.
+    """
+    parsed = None
+    if isinstance(value, (int, float)) or (isinstance(value, str) and value.isdigit()):
+        number = float(value)
+        parsed = datetime.datetime.fromtimestamp(number / 1000 if number > 1e11 else number, datetime.timezone.utc)
+    else:
+        try:
+            parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00").replace(",", "."))
+        except ValueError:
+            for date_format in formats:
+                try:
+                    parsed = datetime.datetime.strptime(value, date_format)
+                except ValueError:
+                    continue
+                if "%Y" not in date_format:
+                    parsed = parsed.replace(year=datetime.datetime.now(default_timezone).year)
+                break
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=default_timezone)
+    return parsed.astimezone(datetime.timezone.utc).isoformat()
+
+
+class LogParser:
+    def __init__(self, patterns=None, custom_patterns=None, date_field="timestamp", target_field="@timestamp",
+                 date_formats=DATE_FORMATS, keep_original=True):
+        """
+        Parse log lines into typed fields with grok-style patterns, the first matching pattern winning.
+        The parser is callable, so it can be passed as the `parser` of a FileTailShipper.
+        :param patterns: List of (name, grok expression) pairs. Default is COMMON_LOG_PATTERNS.
+        :param custom_patterns: Dict of extra pattern names usable in the expressions.
+        :param date_field: Extracted field holding the event time; it is normalized into `target_field`.
+        :param target_field: Field receiving the event time as ISO 8601 in UTC.
+        :param date_formats: strptime formats tried for `date_field`, after ISO 8601 and epoch values.
+        :param keep_original: Keep the whole line in `event.original`.
+        """
+        self.patterns = list(patterns or COMMON_LOG_PATTERNS)
+        self.custom_patterns = tuple(sorted((custom_patterns or {}).items()))
+        self.date_field = date_field
+        self.target_field = target_field
+        self.date_formats = tuple(date_formats)
+        self.keep_original = keep_original
+        self.compiled = [(name,) + compile_grok(expression, self.custom_patterns) for name, expression in self.patterns]
+        self.lock = threading.Lock()
+        self.counters = {name: {"matched": 0, "attempts": 0, "seconds": 0.0} for name, _ in self.patterns}
+        self.counters["_unmatched"] = {"matched": 0, "attempts": 0, "seconds": 0.0}
+
+    def __call__(self, line):
+        return self.parse(line)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def parse(self, line):
+        """
+        Parse one line.
+
+        Returns:
+            dict: The extracted fields. Lines matching no pattern get
+            `{"tags": ["_grokparsefailure"]}`, like in Logstash.
+        """
+        totals = {}
+        document = self._parse(line, totals)
+        with self.lock:
+            self._merge(totals)
+        return document
+
+    def parse_lines(self, lines):
+        """Parse many lines, updating the counters once for the whole batch."""
+        totals = {}
+        parsed = [self._parse(line, totals) for line in lines]
+        with self.lock:
+            self._merge(totals)
+        return parsed
+
+    def parse_parallel(self, lines, workers=4, chunk_size=5000):
+        """
+        Parse lines in chunks across `workers` processes, keeping the order of `lines`.
+
+        Returns:
+            list: The parsed fields of every line.
+        """
+        lines = list(lines)
+        chunks = [lines[start:start + chunk_size] for start in range(0, len(lines), chunk_size)]
+        parsed = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk_fields, totals in executor.map(_parse_chunk, [self] * len(chunks), chunks):
+                parsed.extend(chunk_fields)
+                with self.lock:
+                    self._merge(totals)
+        return parsed
+
+    def stats(self):
+        """
+        Return per-pattern counters.
+
+        Returns:
+            dict: Per pattern name: lines matched, regex attempts made for them (failed earlier
+            patterns included), seconds spent and lines per second. `_unmatched` counts the lines
+            no pattern matched.
+        """
+        with self.lock:
+            return {
+                name: dict(counter, lines_per_sec=round(counter["matched"] / counter["seconds"], 1)
+                           if counter["seconds"] else 0.0)
+                for name, counter in self.counters.items()
+            }
+
+    def _parse(self, line, totals):
+        """Parse one line, adding its pattern, attempts and time to `totals`."""
+        started = time.perf_counter()
+        for attempts, (name, regex, fields) in enumerate(self.compiled, 1):
+            match = regex.match(line)
+            if match is None:
+                continue
+            document = {"event": {"original": line}} if self.keep_original else {}
+            for group, field, convert in fields:
+                value = match.group(group)
+                if value is None or value == "-":
+                    continue
+                try:
+                    document[field] = convert(value)
+                except ValueError:
+                    document[field] = value
+            if self.date_field in document:
+                timestamp = _cached_normalize_date(document[self.date_field], self.date_formats)
+                if timestamp is not None:
+                    document[self.target_field] = timestamp
+                    if self.date_field != self.target_field:
+                        del document[self.date_field]
+                else:
+                    document.setdefault("tags", []).append("_dateparsefailure")
+            _record(totals, name, attempts, time.perf_counter() - started)
+            return document
+        _record(totals, "_unmatched", len(self.compiled), time.perf_counter() - started)
+        return {"tags": ["_grokparsefailure"]}
+
+    def _merge(self, totals):
+        for name, total in totals.items():
+            counter = self.counters[name]
+            for key, value in total.items():
+                counter[key] += value
+
+
+# Log lines share their timestamps at second resolution, so most dates are parsed only once.
+_cached_normalize_date = functools.lru_cache(maxsize=4096)(normalize_date)
+
+
+def _record(totals, name, attempts, seconds):
+    total = totals.get(name)
+    if total is None:
+        total = totals[name] = {"matched": 0, "attempts": 0, "seconds": 0.0}
+    total["matched"] += 1
+    total["attempts"] += attempts
+    total["seconds"] += seconds
+
+
+def _parse_chunk(parser, lines):
+    """Parse a chunk of lines in a worker process; returns the fields and the counter increments."""
+    totals = {}
+    return [parser._parse(line, totals) for line in lines], totals
@@ -0,0 +1,470 @@
+import datetime
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import socket
+import threading
+import time
+
+from elastic_transport import ApiError
+from .bulk import RETRYABLE_STATUSES, backoff_delay
+
+logger = logging.getLogger(__name__)
+
+# Index name patterns of configs/filebeat.yml and configs/logstash.conf.
+FILEBEAT_INDEX_PATTERN = "access-portal-logs-%{+yyyy.MM.dd}"
+LOGSTASH_INDEX_PATTERN = "logstash-%{+YYYY.MM.dd}"
+
+# Beats/Logstash (Joda) date tokens and their strftime equivalents.
+DATE_TOKENS = {"yyyy": "%Y", "YYYY": "%Y", "yy": "%y", "MM": "%m", "dd": "%d", "HH": "%H"}
+DATE_PATTERN = re.compile(r"%\{\+([^}]+)\}")
+
+
+def route_index(index_pattern, timestamp=None):
+    """
+    Resolve an index name pattern such as "logstash-%{+YYYY.MM.dd}" for a timestamp, in UTC
+    like Beats and Logstash do.
+
+    Args:
+        index_pattern (str): Index name, optionally with a `%{+<date format>}` part.
+        timestamp (datetime, str or int, optional): Event time; ISO 8601 strings and numbers of
+            milliseconds since the epoch (as in Elasticsearch dates) are accepted. Default is now.
+
+    Returns:
+        str: The daily index name, e.g. "logstash-2024.05.01".
+
+    Raises:
+        ValueError: If the timestamp is a string that is not ISO 8601.
+        TypeError: If the timestamp is of any other type.
+    """
+    if isinstance(timestamp, (int, float)) and not isinstance(timestamp, bool):
+        timestamp = datetime.datetime.fromtimestamp(timestamp / 1000, datetime.timezone.utc)
+    elif isinstance(timestamp, str):
+        timestamp = datetime.datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if timestamp is None:
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
+    elif not isinstance(timestamp, datetime.datetime):
+        raise TypeError(f"Unsupported timestamp {timestamp!r}")
+    elif timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc)
+
+    def format_date(match):
+        date_format = re.sub("|".join(sorted(DATE_TOKENS, key=len, reverse=True)),
+                             lambda token: DATE_TOKENS[token.group(0)], match.group(1))
+        return timestamp.strftime(date_format)
+
+    return DATE_PATTERN.sub(format_date, index_pattern)
+
+
+class BulkShipper:
+    def __init__(self, connector, index_pattern=LOGSTASH_INDEX_PATTERN, spool_dir=None, batch_size=500,
+                 flush_interval=1.0, max_queue=10000, max_spool_bytes=512 * 1024 * 1024, timestamp_field="@timestamp"):
+        """
+        Ship documents to daily indices from a background thread with `ELKConnector.bulk_index`.
+        Batches that cannot be delivered are written to a gzip-compressed on-disk spool and
+        replayed once the cluster accepts writes again, and so are the documents of a sent batch
+        that failed with 429 or a 5xx; delivery is at least once. Batches and documents the
+        cluster refuses with a client error (4xx other than 429) would be refused again: they are
+        written to "dead-letter-*" files of the spool directory instead, and never replayed.
+        :param connector: A connected ELKConnector.
+        :param index_pattern: Destination index name pattern, e.g. LOGSTASH_INDEX_PATTERN.
+        :param spool_dir: Directory of the spool. None drops the batches that cannot be delivered.
+        :param batch_size: Documents sent per bulk request.
+        :param flush_interval: Maximum seconds a document waits in memory before being sent.
+        :param max_queue: Documents buffered in memory; `submit` drops documents beyond it.
+        :param max_spool_bytes: Spool size limit; the oldest segments are dropped beyond it.
+        :param timestamp_field: Document field holding the event time used for index routing.
+            Documents whose time cannot be read are routed to the index of the current time.
+        """
+        self.connector = connector
+        self.index_pattern = index_pattern
+        self.spool_dir = spool_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_spool_bytes = max_spool_bytes
+        self.timestamp_field = timestamp_field
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.counters = {"submitted": 0, "dropped": 0, "indexed": 0, "failed": 0, "spooled": 0, "replayed": 0,
+                         "spool_dropped": 0, "dead_lettered": 0, "unroutable": 0}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.failures = 0
+        self.retry_at = 0.0
+        self.spool_sequence = 0
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="bulk-shipper", daemon=True)
+        self.thread.start()
+
+    def submit(self, document, block=False, timeout=None):
+        """
+        Queue a document for shipping.
+
+        Args:
+            document (dict): The document; its `timestamp_field` selects the daily index.
+            block (bool, optional): Wait for room in the queue instead of dropping the document.
+            timeout (float, optional): Seconds to wait when blocking.
+
+        Returns:
+            bool: True if queued, False if dropped because the queue was full.
+        """
+        try:
+            self.queue.put(document, block=block, timeout=timeout)
+        except queue.Full:
+            self._increment("dropped")
+            return False
+        self._increment("submitted")
+        return True
+
+    def flush(self, timeout=None):
+        """Wait until every queued document was sent or spooled, or the background thread stopped."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks and self.thread.is_alive() \
+                and (deadline is None or time.monotonic() < deadline):
+            time.sleep(0.01)
+
+    def close(self, timeout=10.0):
+        """Send or spool the queued documents and stop the background thread."""
+        self.flush(timeout)
+        self.stopping.set()
+        self.thread.join(timeout)
+
+    def stats(self):
+        """Return the document counters, the queue length and the spool size in bytes."""
+        with self.lock:
+            counters = dict(self.counters)
+        return dict(counters, queued=self.queue.qsize(), spool_bytes=sum(size for _, size in self._spool_segments()))
+
+    def _increment(self, counter, value=1):
+        with self.lock:
+            self.counters[counter] += value
+
+    def _run(self):
+        while not self.stopping.is_set():
+            batch = self._collect()
+            try:
+                if batch:
+                    self._deliver(batch)
+                elif self.spool_dir and time.monotonic() >= self.retry_at:
+                    self._replay_one()
+            except Exception as e:
+                # Keep the thread alive whatever happens to one batch, or `submit` would queue forever.
+                logger.exception("Error shipping a batch of %d documents: %s", len(batch), e)
+                self._increment("failed", len(batch))
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _collect(self):
+        """Take up to `batch_size` documents, waiting at most `flush_interval` after the first."""
+        try:
+            batch = [self.queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, documents):
+        by_index = {}
+        for document in documents:
+            by_index.setdefault(self._route(document), []).append(document)
+
+        for index_name, index_documents in by_index.items():
+            if time.monotonic() < self.retry_at or self._send(index_name, index_documents) is False:
+                self._spool(index_name, index_documents)
+        if self.spool_dir and time.monotonic() >= self.retry_at:
+            self._replay_one()
+
+    def _route(self, document):
+        """Return the index of a document, the one of the current time when its timestamp cannot be read."""
+        try:
+            return route_index(self.index_pattern, document.get(self.timestamp_field))
+        except (TypeError, ValueError, OverflowError, OSError) as e:
+            self._increment("unroutable")
+            logger.warning("Unreadable %s %r, routing the document by the current time: %s",
+                           self.timestamp_field, document.get(self.timestamp_field), e)
+            return route_index(self.index_pattern)
+
+    def _send(self, index_name, documents):
+        """
+        Bulk index documents.
+
+        Returns:
+            bool or None: True when sent, False when the cluster could not be reached and the
+            documents should be retried later, None when the cluster refused the request and the
+            documents were dead-lettered. Documents of a sent request that failed are spooled or
+            dead-lettered here, by their item status.
+        """
+        try:
+            summary = self.connector.bulk_index(index_name, documents, initial_batch_docs=self.batch_size,
+                                                max_batch_docs=self.batch_size)
+        except Exception as e:
+            if _is_refused(e):
+                self.failures = 0
+                self.retry_at = 0.0
+                logger.error("Cluster refused %d documents for '%s', dead-lettering them: %s",
+                             len(documents), index_name, e)
+                self._dead_letter(index_name, documents, e)
+                return None
+            self.failures += 1
+            self.retry_at = time.monotonic() + backoff_delay(self.failures)
+            logger.warning("Shipping %d documents to '%s' failed, retrying in %.1fs: %s",
+                           len(documents), index_name, self.retry_at - time.monotonic(), e)
+            return False
+        self.failures = 0
+        self.retry_at = 0.0
+        self._increment("indexed", summary["indexed"])
+        refused = [failure for failure in summary["failures"] if _is_refused_status(failure["status"])]
+        if refused:
+            # Items refused with a client error (e.g. a mapping conflict) would be refused again.
+            logger.error("Cluster refused %d of %d documents for '%s', dead-lettering them: %s",
+                         len(refused), len(documents), index_name, refused[0]["error"])
+            self._dead_letter(index_name, [documents[failure["position"]] for failure in refused],
+                              refused[0]["error"])
+        retryable = [documents[failure["position"]] for failure in summary["failures"]
+                     if not _is_refused_status(failure["status"])]
+        if retryable:
+            # Items still rejected with 429 after the bulk retries, or failed with a 5xx, are accepted
+            # once the cluster recovers: they are spooled and the shipper backs off.
+            self.failures += 1
+            self.retry_at = time.monotonic() + backoff_delay(self.failures)
+            logger.warning("%d of %d documents for '%s' were not indexed, spooling them: %s",
+                           len(retryable), len(documents), index_name, summary["failures"][0]["error"])
+            self._spool(index_name, retryable)
+        return True
+
+    def _spool(self, index_name, documents):
+        if not self.spool_dir:
+            self._increment("failed", len(documents))
+            return
+        self._write_segment("spool", {"index": index_name}, documents)
+        self._increment("spooled", len(documents))
+
+        segments = self._spool_segments()
+        total = sum(size for _, size in segments)
+        for segment_path, size in segments:
+            if total <= self.max_spool_bytes:
+                break
+            os.remove(segment_path)
+            total -= size
+            self._increment("spool_dropped")
+            logger.warning("Spool over %d bytes, dropped segment '%s'", self.max_spool_bytes, segment_path)
+
+    def _dead_letter(self, index_name, documents, error):
+        """Keep refused documents, with the error, in a "dead-letter-*" file that is never replayed."""
+        self._increment("dead_lettered", len(documents))
+        if not self.spool_dir:
+            self._increment("failed", len(documents))
+            return
+        self._write_segment("dead-letter", {"index": index_name, "error": str(error)}, documents)
+
+    def _write_segment(self, prefix, header, documents):
+        self.spool_sequence += 1
+        name = f"{prefix}-{time.time_ns()}-{self.spool_sequence:06d}.ndjson.gz"
+        path = os.path.join(self.spool_dir, name)
+        with gzip.open(path + ".tmp", "wt", encoding="utf-8") as segment:
+            segment.write(json.dumps(header) + "\n")
+            for document in documents:
+                segment.write(json.dumps(document, default=str) + "\n")
+        # The rename makes a segment visible only once it is complete.
+        os.replace(path + ".tmp", path)
+
+    def _spool_segments(self):
+        """Return (path, size) of the complete spool segments, oldest first."""
+        if not self.spool_dir:
+            return []
+        paths = sorted(glob.glob(os.path.join(self.spool_dir, "spool-*.ndjson.gz")))
+        return [(path, os.path.getsize(path)) for path in paths]
+
+    def _replay_one(self):
+        """Send the oldest spool segment; it is removed only after it was delivered or dead-lettered."""
+        segments = self._spool_segments()
+        if not segments:
+            return
+        path = segments[0][0]
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as segment:
+                index_name = json.loads(segment.readline())["index"]
+                documents = [json.loads(line) for line in segment if line.strip()]
+        except (OSError, ValueError, KeyError) as e:
+            logger.error("Dropping unreadable spool segment '%s': %s", path, e)
+            os.remove(path)
+            return
+        sent = self._send(index_name, documents)
+        if sent is not False:
+            os.remove(path)
+        if sent:
+            self._increment("replayed", len(documents))
+
+
+def _is_refused(error):
+    """True when a bulk request failed with a client error status the cluster would answer again."""
+    cause = error if isinstance(error, ApiError) else error.__cause__
+    if not isinstance(cause, ApiError):
+        return False
+    return _is_refused_status(cause.meta.status)
+
+
+def _is_refused_status(status):
+    """True for a client error status (4xx other than 429); None, 429 and 5xx may succeed later."""
+    return status is not None and 400 <= status < 500 and status not in RETRYABLE_STATUSES
+
+
+class ElasticsearchLogHandler(logging.Handler):
+    def __init__(self, shipper, level=logging.NOTSET, service_name=None):
+        """
+        Logging handler shipping records as ECS-style documents through a BulkShipper.
+        `emit` only queues the record, so logging calls never wait for Elasticsearch; records
+        logged by the shipper thread itself are skipped to avoid feedback loops.
+        :param shipper: The BulkShipper sending the documents.
+        :param level: Minimum level of the shipped records.
+        :param service_name: Value of the `service.name` field.
+        """
+        super().__init__(level)
+        self.shipper = shipper
+        self.service_name = service_name
+        self.host_name = socket.gethostname()
+
+    def emit(self, record):
+        if record.thread == self.shipper.thread.ident:
+            return
+        try:
+            document = {
+                "@timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+                "message": record.getMessage(),
+                "log": {"level": record.levelname, "logger": record.name,
+                        "origin": {"file": {"name": record.filename, "line": record.lineno},
+                                   "function": record.funcName}},
+                "process": {"pid": record.process, "thread": {"name": record.threadName}},
+                "host": {"name": self.host_name},
+            }
+            if self.service_name:
+                document["service"] = {"name": self.service_name}
+            if record.exc_info:
+                document["error"] = {"type": record.exc_info[0].__name__, "message": str(record.exc_info[1]),
+                                     "stack_trace": self.formatter.formatException(record.exc_info)
+                                     if self.formatter else logging.Formatter().formatException(record.exc_info)}
+            self.shipper.submit(document)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.shipper.close()
+        super().close()
+
+
+class FileTailShipper:
+    def __init__(self, shipper, paths="ingest_data/*.log", poll_interval=1.0, registry_path=None, parser=None,
+                 from_beginning=False):
+        """
+        Tail log files into a BulkShipper, like the Filebeat filestream input.
+        Offsets are kept per file (by device and inode, so renamed files are followed) and saved to
+        `registry_path`, so a restart resumes where it stopped. Truncated files are read again.
+        :param shipper: The BulkShipper sending the documents.
+        :param paths: Glob of the files to tail.
+        :param poll_interval: Seconds between polls once every file was read to its end.
+        :param registry_path: JSON file keeping the offsets. None keeps them in memory only.
+        :param parser: Optional callable turning a line into a dict of fields merged into the document,
+            e.g. a LogParser.
+        :param from_beginning: Read files first seen from their start instead of their end.
+        """
+        self.shipper = shipper
+        self.paths = paths
+        self.poll_interval = poll_interval
+        self.registry_path = registry_path
+        self.parser = parser
+        self.from_beginning = from_beginning
+        self.offsets = {}
+        if registry_path and os.path.exists(registry_path):
+            with open(registry_path) as registry:
+                self.offsets = json.load(registry)
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start tailing from a background thread."""
+        self.thread = threading.Thread(target=self._run, name="file-tail-shipper", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self, timeout=10.0):
+        """Stop tailing and save the offsets."""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        self._save_registry()
+
+    def poll(self):
+        """
+        Read the new complete lines of every matching file once.
+
+        Returns:
+            int: Number of lines shipped.
+        """
+        shipped = 0
+        seen = set()
+        for path in sorted(glob.glob(self.paths)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            key = f"{stat.st_dev}:{stat.st_ino}"
+            seen.add(key)
+            offset = self.offsets.get(key, {}).get("offset")
+            if offset is None:
+                offset = 0 if self.from_beginning else stat.st_size
+            if stat.st_size < offset:
+                logger.info("File '%s' was truncated, reading it from the start", path)
+                offset = 0
+            if stat.st_size == offset:
+                self.offsets[key] = {"path": path, "offset": offset}
+                continue
+            with open(path, "rb") as log_file:
+                log_file.seek(offset)
+                for line in log_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    self.shipper.submit(self._document(path, offset, line.rstrip(b"\r\n").decode("utf-8", "replace")),
+                                        block=True)
+                    offset += len(line)
+                    shipped += 1
+            self.offsets[key] = {"path": path, "offset": offset}
+        # Forget files that were removed or rotated out of the glob.
+        for key in set(self.offsets) - seen:
+            del self.offsets[key]
+        return shipped
+
+    def _document(self, path, offset, line):
+        document = {
+            "@timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "message": line,
+            "log": {"file": {"path": path}, "offset": offset},
+        }
+        if self.parser is not None:
+            document.update(self.parser(line) or {})
+        return document
+
+    def _run(self):
+        while not self.stopping.is_set():
+            if not self.poll():
+                self._save_registry()
+                self.stopping.wait(self.poll_interval)
+
+    def _save_registry(self):
+        if not self.registry_path:
+            return
+        with open(self.registry_path + ".tmp", "w") as registry:
+            json.dump(self.offsets, registry)
+        os.replace(self.registry_path + ".tmp", self.registry_path)
@@ -0,0 +1,18 @@
+def mapping_fields(mappings, prefix=""):
+    """
+    Flatten a mapping into its fields, multi-fields included.
+
+    Returns:
+        dict: Dotted field path -> field mapping. Objects are listed with type "object" (or "nested").
+    """
+    fields = {}
+    for name, field_mapping in mappings.get("properties", {}).items():
+        path = f"{prefix}{name}"
+        if "properties" in field_mapping:
+            fields[path] = dict(field_mapping, type=field_mapping.get("type", "object"))
+            fields.update(mapping_fields(field_mapping, f"{path}."))
+            continue
+        fields[path] = field_mapping
+        for sub_name, sub_mapping in field_mapping.get("fields", {}).items():
+            fields[f"{path}.{sub_name}"] = sub_mapping
+    return fields
@@ -0,0 +1,63 @@
+import fnmatch
+import threading
+import time
+
+
+class MetadataCache:
+    def __init__(self, ttl=5.0, max_entries=10000):
+        """
+        Short-lived cache of index existence and metadata, so repeated `exists` checks and
+        metadata lookups for the same indices do not each cost a round trip.
+        :param ttl: Seconds an entry stays valid.
+        :param max_entries: Maximum number of cached names; the oldest entries are dropped first.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def exists(self, index_name):
+        """Return True or False when the existence of an index or alias is cached, otherwise None."""
+        entry = self._entry(index_name)
+        return None if entry is None else entry[0]
+
+    def info(self, index_name):
+        """Return the cached `get_indices_info` entry of an index, or None."""
+        entry = self._entry(index_name)
+        return None if entry is None else entry[1]
+
+    def put(self, index_name, exists, info=None):
+        """Cache whether `index_name` exists, with its metadata when known."""
+        with self.lock:
+            self.entries.pop(index_name, None)
+            self.entries[index_name] = (exists, info, time.monotonic() + self.ttl)
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+
+    def invalidate(self, index_name=None):
+        """Drop the entries matching `index_name` (an index, alias or wildcard expression), or all when None."""
+        with self.lock:
+            if index_name is None:
+                names = list(self.entries)
+            else:
+                patterns = [part.strip() for part in index_name.split(",")]
+                names = [name for name in self.entries
+                         if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+            for name in names:
+                del self.entries[name]
+            self.counters["invalidations"] += len(names)
+
+    def stats(self):
+        """Return the hit, miss and invalidation counts and the number of entries."""
+        with self.lock:
+            return dict(self.counters, entries=len(self.entries))
+
+    def _entry(self, index_name):
+        with self.lock:
+            entry = self.entries.get(index_name)
+            if entry is not None and entry[2] < time.monotonic():
+                del self.entries[index_name]
+                entry = None
+            self.counters["misses" if entry is None else "hits"] += 1
+            return entry
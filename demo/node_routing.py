@@ -0,0 +1,108 @@
+from elastic_transport import NodeSelector, Urllib3HttpNode
+import random
+import threading
+import time
+
+# Node selectors accepted by `ELKConnector(node_selector=...)`, besides a NodeSelector subclass.
+NODE_SELECTORS = ("round_robin", "random", "least_latency")
+
+
+class LatencyTrackingNode(Urllib3HttpNode):
+    """
+    HTTP node keeping an exponentially weighted moving average of its response times,
+    read by LeastLatencySelector.
+    """
+
+    # Weight of the newest sample in the moving average.
+    smoothing = 0.2
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.latency = None
+        self.samples = 0
+        self.failures = 0
+        self.latency_lock = threading.Lock()
+
+    def perform_request(self, method, target, body=None, headers=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = super().perform_request(method, target, body=body, headers=headers, **kwargs)
+        except Exception:
+            with self.latency_lock:
+                self.failures += 1
+            raise
+        elapsed = time.perf_counter() - started
+        with self.latency_lock:
+            self.samples += 1
+            self.latency = elapsed if self.latency is None else \
+                self.latency + self.smoothing * (elapsed - self.latency)
+        return response
+
+
+class LeastLatencySelector(NodeSelector):
+    """
+    Pick the faster of two randomly chosen live nodes, by their moving average latency.
+    Comparing two random nodes instead of always taking the fastest one keeps load spread
+    when the latencies are close; nodes without samples yet count as fastest, so every node
+    gets measured.
+    """
+
+    def select(self, nodes):
+        first, second = random.sample(nodes, 2) if len(nodes) > 1 else (nodes[0], nodes[0])
+        return first if _latency(first) <= _latency(second) else second
+
+
+def node_address(publish_address):
+    """
+    Return the (host, port) candidates of an HTTP publish address: "ip:port", "hostname/ip:port",
+    or with a bracketed IPv6 address such as "[::1]:9200". IPv6 hosts are returned both with and
+    without brackets, as configured hosts drop them and sniffed ones keep them.
+
+    Returns:
+        set: The (host, port) pairs a pool node may be configured with.
+    """
+    name, _, address = publish_address.rpartition("/")
+    ip, _, port = address.rpartition(":")
+    return {(host, int(port)) for host in (name, ip, ip.strip("[]")) if host}
+
+
+def live_node_configs(node_pool):
+    """
+    Return the configs of the live nodes of a node pool. The pool does not expose them publicly,
+    so every node counts as live if its private state is not available.
+    """
+    alive = getattr(node_pool, "_alive_nodes", None)
+    if alive is None:
+        return {node.config for node in node_pool.all()}
+    return set(alive)
+
+
+def node_stats(node_pool):
+    """
+    Report the state of every node of a client's node pool.
+
+    Returns:
+        list: Per node its URL, whether it is live, its consecutive failures (the circuit breaker
+        is open while the node is dead) and, with LatencyTrackingNode, its latency statistics.
+    """
+    alive = live_node_configs(node_pool)
+    consecutive_failures = getattr(node_pool, "_dead_consecutive_failures", {})
+    stats = []
+    for node in node_pool.all():
+        entry = {
+            "node": node.base_url,
+            "alive": node.config in alive,
+            "consecutive_failures": consecutive_failures.get(node.config, 0),
+        }
+        if isinstance(node, LatencyTrackingNode):
+            entry.update({
+                "latency_ms": round(node.latency * 1000, 3) if node.latency is not None else None,
+                "requests": node.samples,
+                "failures": node.failures,
+            })
+        stats.append(entry)
+    return stats
+
+
+def _latency(node):
+    return getattr(node, "latency", None) or 0.0
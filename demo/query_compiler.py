@@ -0,0 +1,267 @@
+from .mappings import mapping_fields
+import copy
+import json
+
+OCCURRENCES = ("must", "filter", "should", "must_not")
+
+# Field types holding exact values: a `match` on them analyzes nothing and is the same as a `term`.
+EXACT_FIELD_TYPES = {
+    "keyword", "constant_keyword", "wildcard", "boolean", "ip", "version", "date", "date_nanos",
+    "long", "integer", "short", "byte", "double", "float", "half_float", "scaled_float", "unsigned_long",
+}
+# Full-text field types, on which a `term` query is scored by term frequency and length.
+TEXT_FIELD_TYPES = {"text", "match_only_text", "search_as_you_type", "annotated_text"}
+# Queries giving every matching document the same score, so moving them from `must` to `filter`
+# shifts all scores by the same amount and leaves the ranking unchanged.
+CONSTANT_SCORE_QUERIES = {"match_all", "constant_score", "range", "exists", "ids", "prefix", "wildcard",
+                          "regexp", "terms", "term"}
+
+
+def field_types_from_mapping(mappings):
+    """
+    Return the type of every field of an index mapping, as used by `compile_query`.
+
+    Args:
+        mappings (dict): Index mappings with "properties", e.g. `index_mappings_example["mappings"]`.
+
+    Returns:
+        dict: Dotted field path -> field type.
+    """
+    return {path: field.get("type", "object") for path, field in mapping_fields(mappings).items()}
+
+
+def sort_uses_score(sort):
+    """Return True when hits are ranked by relevance: no sort at all, or a sort on `_score`."""
+    if not sort:
+        return True
+    entries = sort if isinstance(sort, list) else [sort]
+    return any(entry == "_score" or (isinstance(entry, dict) and "_score" in entry) for entry in entries)
+
+
+def compile_query(query=None, filters=None, field_types=None, scoring=True):
+    """
+    Combine a query and filters into one optimized query.
+
+    The result is equivalent to requiring both `query` and every filter, and:
+    - moves clauses that cannot change the ranking (term-level queries, or every clause when
+      `scoring` is False) from `must` to `filter`, where they skip scoring and can be cached;
+    - rewrites a `match` on an exact-value field into a `term` query;
+    - flattens nested bool queries and drops duplicate filter and must_not clauses;
+    - orders the clauses canonically, so equivalent queries serialize identically.
+
+    Args:
+        query (dict, optional): Main query, of any type. The caller's dict is not modified.
+        filters (list or dict, optional): Filter clauses, or a single clause such as a bool query.
+        field_types (dict, optional): Field path -> mapping type, see `field_types_from_mapping`.
+            Without it, a `match` is only rewritten when its value is a number or a boolean.
+        scoring (bool, optional): False when the scores are not used (size 0, or sorted on fields),
+            which allows every `must` clause into filter context.
+
+    Returns:
+        dict: The compiled query; {"match_all": {}} when there is nothing to match.
+    """
+    if isinstance(filters, dict):
+        filters = [filters]
+    combined = {"bool": {"must": [query] if query else [], "filter": list(filters or [])}}
+    compiled = _compile(combined, field_types or {}, scoring)
+    if not scoring and "bool" not in compiled and "match_all" not in compiled:
+        # A lone clause would be scored at the top level; keep it in (cacheable) filter context.
+        compiled = {"bool": {"filter": [compiled]}}
+    return compiled
+
+
+def canonical_key(body):
+    """
+    Return a string identifying a search body up to key order and the order of bool clauses.
+
+    Returns:
+        str: Compact JSON with sorted keys and sorted clause lists.
+    """
+    return json.dumps(_canonical(body), sort_keys=True, separators=(",", ":"), default=str)
+
+
+class QueryBuilder:
+    def __init__(self):
+        """
+        Build a bool query clause by clause, then compile it with `build`.
+        Every method returns the builder, so calls can be chained.
+        """
+        self.clauses = {occurrence: [] for occurrence in OCCURRENCES}
+        self.options = {}
+
+    def must(self, *clauses):
+        self.clauses["must"].extend(clauses)
+        return self
+
+    def filter(self, *clauses):
+        self.clauses["filter"].extend(clauses)
+        return self
+
+    def should(self, *clauses, minimum_should_match=None):
+        self.clauses["should"].extend(clauses)
+        if minimum_should_match is not None:
+            self.options["minimum_should_match"] = minimum_should_match
+        return self
+
+    def must_not(self, *clauses):
+        self.clauses["must_not"].extend(clauses)
+        return self
+
+    def match(self, field, value):
+        return self.must({"match": {field: value}})
+
+    def term(self, field, value):
+        return self.filter({"term": {field: value}})
+
+    def terms(self, field, values):
+        return self.filter({"terms": {field: list(values)}})
+
+    def range(self, field, **bounds):
+        """Add a range filter, e.g. `range("age", gt=30)`."""
+        return self.filter({"range": {field: bounds}})
+
+    def exists(self, field):
+        return self.filter({"exists": {"field": field}})
+
+    def build(self, field_types=None, scoring=True):
+        """Return the compiled query, see `compile_query`."""
+        query = {"bool": dict({occurrence: list(clauses) for occurrence, clauses in self.clauses.items() if clauses},
+                              **self.options)}
+        return compile_query(query, None, field_types, scoring)
+
+
+def _compile(query, field_types, scoring):
+    """Return the compiled form of one query clause; `scoring` is False in filter context."""
+    if not isinstance(query, dict) or len(query) != 1:
+        return copy.deepcopy(query)
+    kind, body = next(iter(query.items()))
+    if kind == "bool" and isinstance(body, dict):
+        return _compile_bool(body, field_types, scoring)
+    if kind == "match" and isinstance(body, dict):
+        return _rewrite_match(body, field_types) or copy.deepcopy(query)
+    if kind == "term" and isinstance(body, dict) and len(body) == 1:
+        field, value = next(iter(body.items()))
+        if isinstance(value, dict) and set(value) == {"value"}:
+            return {"term": {field: value["value"]}}
+    return copy.deepcopy(query)
+
+
+def _compile_bool(body, field_types, scoring):
+    options = {key: copy.deepcopy(value) for key, value in body.items() if key not in OCCURRENCES}
+    clauses = {
+        occurrence: [_compile(clause, field_types, scoring and occurrence in ("must", "should"))
+                     for clause in _as_list(body.get(occurrence))]
+        for occurrence in OCCURRENCES
+    }
+
+    must, filters, must_not = [], [], list(clauses["must_not"])
+    for occurrence, target in (("must", must), ("filter", filters)):
+        for clause in clauses[occurrence]:
+            if _is_plain_bool(clause):
+                nested = clause["bool"]
+                target.extend(nested.get("must", []))
+                filters.extend(nested.get("filter", []))
+                must_not.extend(nested.get("must_not", []))
+            else:
+                target.append(clause)
+
+    scored = []
+    for clause in must:
+        if not scoring or _is_constant_score(clause, field_types):
+            filters.append(clause)
+        else:
+            scored.append(clause)
+    filters = [clause for clause in filters if clause != {"match_all": {}}]
+
+    compiled = {
+        "must": _sorted(scored),
+        "filter": _sorted(_dedupe(filters)),
+        "should": _sorted(clauses["should"]),
+        "must_not": _sorted(_dedupe(must_not)),
+    }
+    compiled = {occurrence: clauses for occurrence, clauses in compiled.items() if clauses}
+    if "should" in compiled and "must" not in compiled and "filter" not in compiled \
+            and (clauses["must"] or clauses["filter"]) and "minimum_should_match" not in options:
+        # The should clauses were optional next to the dropped must or filter clauses; keep them optional.
+        options["minimum_should_match"] = 0
+    if not options:
+        if not compiled:
+            return {"match_all": {}}
+        if len(compiled) == 1:
+            occurrence, only = next(iter(compiled.items()))
+            if len(only) == 1 and (occurrence in ("must", "should") or (occurrence == "filter" and not scoring)):
+                return only[0]
+    compiled.update(options)
+    return {"bool": compiled}
+
+
+def _rewrite_match(body, field_types):
+    """Return a `term` query equivalent to a `match` on an exact-value field, or None."""
+    if len(body) != 1:
+        return None
+    field, value = next(iter(body.items()))
+    if isinstance(value, dict):
+        if set(value) != {"query"}:
+            return None
+        value = value["query"]
+    field_type = field_types.get(field)
+    if field_type is not None:
+        exact = field_type in EXACT_FIELD_TYPES
+    else:
+        exact = isinstance(value, (bool, int, float))
+    return {"term": {field: value}} if exact else None
+
+
+def _is_constant_score(clause, field_types):
+    if not isinstance(clause, dict) or len(clause) != 1:
+        return False
+    kind, body = next(iter(clause.items()))
+    if kind == "bool":
+        return isinstance(body, dict) and not body.get("must") and not body.get("should")
+    if kind not in CONSTANT_SCORE_QUERIES:
+        return False
+    if kind == "term" and isinstance(body, dict):
+        return not any(field_types.get(field) in TEXT_FIELD_TYPES for field in body)
+    return True
+
+
+def _is_plain_bool(clause):
+    """True for a bool query with only must, filter and must_not clauses, which can be merged into its parent."""
+    return isinstance(clause, dict) and list(clause) == ["bool"] and isinstance(clause["bool"], dict) \
+        and set(clause["bool"]) <= {"must", "filter", "must_not"}
+
+
+def _as_list(clauses):
+    if clauses is None:
+        return []
+    return list(clauses) if isinstance(clauses, list) else [clauses]
+
+
+def _dedupe(clauses):
+    seen = set()
+    unique = []
+    for clause in clauses:
+        key = canonical_key(clause)
+        if key not in seen:
+            seen.add(key)
+            unique.append(clause)
+    return unique
+
+
+def _sorted(clauses):
+    return sorted(clauses, key=canonical_key)
+
+
+def _canonical(value):
+    """Copy of `value` with the clause lists of bool queries sorted."""
+    if isinstance(value, dict):
+        canonical = {key: _canonical(item) for key, item in value.items()}
+        bool_query = canonical.get("bool")
+        if isinstance(bool_query, dict):
+            for occurrence in OCCURRENCES:
+                if isinstance(bool_query.get(occurrence), list):
+                    bool_query[occurrence] = sorted(bool_query[occurrence], key=canonical_key)
+        return canonical
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
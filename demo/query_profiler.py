@@ -0,0 +1,264 @@
+"""
+Search profiling: client-side timings of every search, the `profile` API on a sample of them,
+and the slowest queries kept for analysis.
+
+Summarize a capture file by query shape with:
+
+    python -m demo.query_profiler slow_queries.jsonl --top 20
+"""
+from .query_compiler import canonical_key
+import argparse
+import datetime
+import heapq
+import itertools
+import json
+import random
+import threading
+
+# Keys whose values name fields or set how results are sorted, bucketed or returned, rather than
+# hold the values searched for; query shapes keep them, so e.g. terms aggregations on different
+# fields stay apart.
+STRUCTURAL_KEYS = {"field", "fields", "path", "sort", "order", "_source", "docvalue_fields", "stored_fields",
+                   "calendar_interval", "fixed_interval", "interval"}
+
+
+def query_shape(body):
+    """
+    Return the shape of a search body: its structure with every query value replaced by "?", so
+    searches differing only in their values (ids, dates, terms, page) group together. Values of
+    `STRUCTURAL_KEYS`, such as aggregation fields and sorts, are kept.
+
+    Returns:
+        str: Canonical JSON of the shape.
+    """
+    def strip(value):
+        if isinstance(value, dict):
+            return {key: item if key in STRUCTURAL_KEYS else strip(item)
+                    for key, item in value.items() if key != "profile"}
+        if isinstance(value, list):
+            items = [strip(item) for item in value]
+            return [item for position, item in enumerate(items) if item not in items[:position]]
+        return "?"
+
+    return canonical_key(strip(body))
+
+
+def summarize_profile(profile):
+    """
+    Condense the `profile` section of a search response.
+
+    Returns:
+        dict: Per shard ("shards") the query, rewrite, collector, aggregation and fetch
+        milliseconds, and per component ("components") the self time in milliseconds of every
+        query type (e.g. "TermQuery") and aggregation type (prefixed "agg:") over all shards.
+    """
+    shards = []
+    components = {}
+    for shard in profile.get("shards", []):
+        timings = {"query_ms": 0, "rewrite_ms": 0, "collector_ms": 0, "aggregation_ms": 0, "fetch_ms": 0}
+        for search in shard.get("searches", []):
+            for node in search.get("query", []):
+                timings["query_ms"] += node.get("time_in_nanos", 0)
+                _add_self_times(components, node, "")
+            timings["rewrite_ms"] += search.get("rewrite_time", 0)
+            timings["collector_ms"] += sum(collector.get("time_in_nanos", 0) for collector in search.get("collector", []))
+        for node in shard.get("aggregations", []):
+            timings["aggregation_ms"] += node.get("time_in_nanos", 0)
+            _add_self_times(components, node, "agg:")
+        timings["fetch_ms"] += shard.get("fetch", {}).get("time_in_nanos", 0)
+        shards.append(dict({name: round(nanos / 1e6, 3) for name, nanos in timings.items()}, id=shard.get("id")))
+    return {"shards": shards, "components": {name: round(nanos / 1e6, 3) for name, nanos in components.items()}}
+
+
+def summarize_entries(entries, top=None):
+    """
+    Group captured searches by query shape and find where their time goes.
+
+    Args:
+        entries (iterable of dict): Entries recorded by QueryProfiler.
+        top (int, optional): Keep only the shapes with the largest total time.
+
+    Returns:
+        list of dict: Per shape, sorted by total time: count, profiled count, total, mean and max
+        milliseconds, the mean client (serialize + decode), network and server milliseconds, the
+        dominant part ("client", "network" or "server"), the slowest shard time and the components
+        with the most self time in the profiled samples.
+    """
+    groups = {}
+    for entry in entries:
+        group = groups.setdefault(entry["shape"], {
+            "shape": entry["shape"], "count": 0, "profiled": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "client_ms": 0.0, "network_ms": 0.0, "server_ms": 0.0, "max_shard_ms": 0.0, "components": {},
+        })
+        group["count"] += 1
+        group["total_ms"] += entry["total_ms"]
+        group["max_ms"] = max(group["max_ms"], entry["total_ms"])
+        group["client_ms"] += entry["serialize_ms"] + entry["decode_ms"]
+        group["network_ms"] += entry["network_ms"]
+        group["server_ms"] += entry["server_ms"]
+        if entry.get("profile"):
+            group["profiled"] += 1
+            for shard in entry["profile"]["shards"]:
+                shard_ms = shard["query_ms"] + shard["collector_ms"] + shard["aggregation_ms"] + shard["fetch_ms"]
+                group["max_shard_ms"] = max(group["max_shard_ms"], shard_ms)
+            for component, milliseconds in entry["profile"]["components"].items():
+                group["components"][component] = group["components"].get(component, 0.0) + milliseconds
+
+    summary = []
+    for group in sorted(groups.values(), key=lambda group: group["total_ms"], reverse=True)[:top]:
+        count = group["count"]
+        parts = {part: group[f"{part}_ms"] / count for part in ("client", "network", "server")}
+        components = sorted(group.pop("components").items(), key=lambda item: item[1], reverse=True)
+        summary.append(dict(
+            group,
+            total_ms=round(group["total_ms"], 3),
+            mean_ms=round(group["total_ms"] / count, 3),
+            max_ms=round(group["max_ms"], 3),
+            client_ms=round(parts["client"], 3),
+            network_ms=round(parts["network"], 3),
+            server_ms=round(parts["server"], 3),
+            dominant=max(parts, key=parts.get),
+            top_components=[{"component": name, "ms": round(milliseconds, 3)} for name, milliseconds in components[:3]],
+        ))
+    return summary
+
+
+class QueryProfiler:
+    def __init__(self, sample_rate=0.01, slowest=100, path=None, slow_threshold_ms=None):
+        """
+        Collect search timings for `ELKConnector(profiler=...)`.
+        :param sample_rate: Share of searches sent with `"profile": true`, between 0 and 1.
+            Profiling makes a search noticeably slower on the cluster, so keep it low.
+        :param slowest: Number of slowest searches kept in memory, with their bodies.
+        :param path: Optional JSON lines file every profiled search, and every search slower than
+            `slow_threshold_ms`, is appended to.
+        :param slow_threshold_ms: Total milliseconds from which a search is written to `path` even
+            when it was not profiled. None writes only the profiled ones.
+        """
+        self.sample_rate = sample_rate
+        self.slowest = slowest
+        self.path = path
+        self.slow_threshold_ms = slow_threshold_ms
+        self.entries = []
+        self.sequence = itertools.count()
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.counters = {"searches": 0, "profiled": 0, "written": 0}
+
+    def should_profile(self):
+        """Decide whether the next search is profiled."""
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, index_name, body, serialize_seconds, round_trip_seconds, decode_seconds, took=None,
+               profile=None):
+        """
+        Record one search.
+
+        Args:
+            index_name (str): Index (or index expression) searched.
+            body (dict): The search body, without `profile`.
+            serialize_seconds (float): Time spent serializing the body.
+            round_trip_seconds (float): Time from sending the request to receiving the whole response.
+            decode_seconds (float): Time spent decoding the response.
+            took (int, optional): Server-side milliseconds reported by the cluster.
+            profile (dict, optional): The `profile` section of the response, for sampled searches.
+
+        Returns:
+            dict: The recorded entry.
+        """
+        server_ms = float(took or 0)
+        round_trip_ms = round_trip_seconds * 1000
+        entry = {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "index": index_name,
+            "shape": query_shape(body),
+            "body": body,
+            "total_ms": round((serialize_seconds + round_trip_seconds + decode_seconds) * 1000, 3),
+            "serialize_ms": round(serialize_seconds * 1000, 3),
+            "network_ms": round(max(round_trip_ms - server_ms, 0.0), 3),
+            "server_ms": server_ms,
+            "decode_ms": round(decode_seconds * 1000, 3),
+            "profile": summarize_profile(profile) if profile else None,
+        }
+        with self.lock:
+            self.counters["searches"] += 1
+            if profile:
+                self.counters["profiled"] += 1
+            item = (entry["total_ms"], next(self.sequence), entry)
+            if len(self.entries) < self.slowest:
+                heapq.heappush(self.entries, item)
+            elif item[0] > self.entries[0][0]:
+                heapq.heapreplace(self.entries, item)
+            write = self.path is not None and (profile or (self.slow_threshold_ms is not None
+                                                           and entry["total_ms"] >= self.slow_threshold_ms))
+            if write:
+                self.counters["written"] += 1
+        if write:
+            # Serialized and written outside the counters lock, so other searches are not held up by the disk.
+            line = json.dumps(entry, default=str) + "\n"
+            with self.write_lock:
+                with open(self.path, "a") as output:
+                    output.write(line)
+        return entry
+
+    def slowest_queries(self):
+        """Return the slowest recorded searches, slowest first."""
+        with self.lock:
+            return [entry for _, _, entry in sorted(self.entries, reverse=True)]
+
+    def summary(self, top=None):
+        """Summarize the slowest recorded searches by query shape, see `summarize_entries`."""
+        return summarize_entries(self.slowest_queries(), top)
+
+    def dump(self, path):
+        """Write the slowest recorded searches to `path` as JSON lines, readable by the CLI."""
+        with open(path, "w") as output:
+            for entry in self.slowest_queries():
+                output.write(json.dumps(entry, default=str) + "\n")
+
+    def stats(self):
+        """Return the searches recorded, profiled and written to `path`."""
+        with self.lock:
+            return dict(self.counters, kept=len(self.entries))
+
+
+def _add_self_times(components, node, prefix):
+    """Add the time of a profile tree node, minus that of its children, to its type; then recurse."""
+    children = node.get("children", [])
+    self_time = node.get("time_in_nanos", 0) - sum(child.get("time_in_nanos", 0) for child in children)
+    name = f"{prefix}{node.get('type', 'unknown')}"
+    components[name] = components.get(name, 0) + max(self_time, 0)
+    for child in children:
+        _add_self_times(components, child, prefix)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize captured search profiles by query shape")
+    parser.add_argument("paths", nargs="+", help="JSON lines files written by QueryProfiler")
+    parser.add_argument("--top", type=int, default=10, help="Number of query shapes to show")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    entries = []
+    for path in args.paths:
+        with open(path) as capture:
+            entries.extend(json.loads(line) for line in capture if line.strip())
+    summary = summarize_entries(entries, args.top)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return summary
+    print(f"{len(entries)} searches, {len({entry['shape'] for entry in entries})} query shapes\n")
+    for rank, group in enumerate(summary, 1):
+        print(f"#{rank} {group['count']} searches ({group['profiled']} profiled), total {group['total_ms']} ms, "
+              f"mean {group['mean_ms']} ms, max {group['max_ms']} ms, mostly {group['dominant']}")
+        print(f"   client {group['client_ms']} ms | network {group['network_ms']} ms | server {group['server_ms']} ms"
+              f" | slowest shard {round(group['max_shard_ms'], 3)} ms")
+        if group["top_components"]:
+            print("   hotspots: " + ", ".join(f"{item['component']} {item['ms']} ms" for item in group["top_components"]))
+        print(f"   shape: {group['shape'][:200]}\n")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+from .query_compiler import canonical_key
+from collections import OrderedDict
+import fnmatch
+import json
+import threading
+import time
+
+# Bytes counted for the parts of a search response besides its hits and aggregations.
+RESPONSE_OVERHEAD_BYTES = 256
+
+
+class SearchCache:
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=30.0, generation_check_interval=None,
+                 alias_ttl=60.0):
+        """
+        LRU cache of search responses with a TTL and per-index invalidation.
+        :param max_entries: Maximum number of cached responses.
+        :param max_bytes: Maximum total size of the cached responses, estimated from the serialized
+            size of one hit times the number of hits, plus the aggregations.
+        :param ttl: Seconds a response stays valid. None disables expiry.
+        :param generation_check_interval: Seconds between checks of an index refresh generation.
+            None only invalidates on writes made through the connector.
+        :param alias_ttl: Seconds the concrete indices an alias or pattern resolves to are reused.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.generation_check_interval = generation_check_interval
+        self.alias_ttl = alias_ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generations = {}
+        self.targets = {}
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0, "oversized": 0}
+
+    @staticmethod
+    def make_key(index_name, search_body):
+        """Return the cache key of a search: the index and the canonical form of the body."""
+        return index_name, canonical_key(search_body)
+
+    def get(self, index_name, search_body, refresh_probe=None):
+        """
+        Return the cached response of a search, or None.
+
+        Args:
+            index_name (str): Index (or index expression) searched.
+            search_body (dict): The search request body.
+            refresh_probe (callable, optional): Returns the current refresh generation of `index_name`;
+                called at most every `generation_check_interval` seconds.
+        """
+        if refresh_probe is not None and self.generation_check_interval is not None:
+            self._check_generation(index_name, refresh_probe)
+        key = self.make_key(index_name, search_body)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.counters["misses"] += 1
+                return None
+            response, size, expires, _ = entry
+            if expires is not None and expires < time.monotonic():
+                self._remove(key)
+                self.counters["expirations"] += 1
+                self.counters["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return response
+
+    def put(self, index_name, search_body, response, resolve=None):
+        """
+        Cache a search response, evicting the least recently used entries beyond the bounds.
+
+        Args:
+            index_name (str): Index (or index expression) searched.
+            search_body (dict): The search request body.
+            response (dict): The search response.
+            resolve (callable, optional): Returns the concrete indices of an index name, alias or
+                pattern, so that writes to those indices invalidate the response.
+        """
+        key = self.make_key(index_name, search_body)
+        size = len(key[1]) + estimate_response_size(response)
+        if size > self.max_bytes:
+            self.counters["oversized"] += 1
+            return
+        indices = self._concrete_indices(index_name, resolve)
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = (response, size, expires, indices)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+                self.counters["evictions"] += 1
+
+    def invalidate(self, index_name=None, resolve=None):
+        """
+        Drop the cached responses of searches touching `index_name`, or every entry when None.
+
+        Index expressions in the keys are matched against `index_name`, so searches over
+        wildcards and comma separated lists are invalidated as well. Searches over an alias are
+        dropped through the concrete indices recorded by `put`, and a write to an alias drops
+        the searches of the indices it resolves to.
+
+        Args:
+            index_name (str, optional): Index, alias or pattern written to.
+            resolve (callable, optional): Returns the concrete indices of `index_name`, see `put`.
+        """
+        if not self.entries:
+            return
+        written = self._concrete_indices(index_name, resolve) if index_name is not None else frozenset()
+        with self.lock:
+            if index_name is None:
+                keys = list(self.entries)
+            else:
+                names = written | {index_name}
+                keys = [key for key, (_, _, _, indices) in self.entries.items()
+                        if any(_expression_matches(key[0], name) or _expression_matches(name, key[0])
+                               for name in names)
+                        or any(_expression_matches(index_name, concrete) for concrete in indices)
+                        or not written.isdisjoint(indices)]
+            for key in keys:
+                self._remove(key)
+            self.counters["invalidations"] += len(keys)
+
+    def forget_aliases(self):
+        """Forget the resolved alias targets, e.g. after aliases were added or indices created or deleted."""
+        with self.lock:
+            self.targets.clear()
+
+    def stats(self):
+        """
+        Return the cache counters.
+
+        Returns:
+            dict: Hits, misses, hit ratio, evictions, expirations, invalidations, entries and bytes.
+        """
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(self.counters, entries=len(self.entries), bytes=self.size, max_entries=self.max_entries,
+                        max_bytes=self.max_bytes, hit_ratio=round(self.counters["hits"] / lookups, 4) if lookups else 0.0)
+
+    def _remove(self, key):
+        _, size, _, _ = self.entries.pop(key)
+        self.size -= size
+
+    def _concrete_indices(self, index_name, resolve):
+        """Return the concrete indices of an index expression, resolving it at most every `alias_ttl` seconds."""
+        if resolve is None:
+            return frozenset()
+        now = time.monotonic()
+        with self.lock:
+            indices, expires = self.targets.get(index_name, (None, 0.0))
+        if indices is None or expires < now:
+            indices = frozenset(resolve(index_name))
+            with self.lock:
+                self.targets[index_name] = (indices, now + self.alias_ttl)
+        return indices
+
+    def _check_generation(self, index_name, refresh_probe):
+        now = time.monotonic()
+        with self.lock:
+            generation, checked = self.generations.get(index_name, (None, None))
+            if checked is not None and now - checked < self.generation_check_interval:
+                return
+            # Claim the check, so concurrent lookups of the index do not all probe it.
+            self.generations[index_name] = (generation, now)
+        # The probe is a request to the cluster; it runs without holding the lock.
+        current = refresh_probe(index_name)
+        with self.lock:
+            self.generations[index_name] = (current, now)
+        if generation is not None and current != generation:
+            self.invalidate(index_name)
+
+
+def estimate_response_size(response):
+    """
+    Estimate the memory a cached search response takes, without serializing all of it: the
+    serialized size of its first hit times the number of hits, plus its aggregations.
+    """
+    if not isinstance(response, dict):
+        return len(json.dumps(response, default=str))
+    size = RESPONSE_OVERHEAD_BYTES
+    hits = response.get("hits", {}).get("hits") or []
+    if hits:
+        size += len(json.dumps(hits[0], default=str)) * len(hits)
+    if response.get("aggregations"):
+        size += len(json.dumps(response["aggregations"], default=str))
+    return size
+
+
+def _expression_matches(expression, index_name):
+    """Return True if the index expression of a search (e.g. "logs-*,other") covers `index_name`."""
+    return any(fnmatch.fnmatchcase(index_name, part.strip()) for part in expression.split(","))
@@ -0,0 +1,62 @@
+import threading
+
+
+class SearchCoalescer:
+    def __init__(self, send_batch, window_ms=5, max_batch=50):
+        """
+        Collect concurrent requests for a short window and send them as one batch.
+        :param send_batch: Function receiving a list of requests and returning their results in order.
+        :param window_ms: Milliseconds the first request of a batch waits for others to join.
+        :param max_batch: Batch size that triggers an immediate send.
+        """
+        self.send_batch = send_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.lock = threading.Lock()
+        self.pending = []
+        self.full = threading.Event()
+        self.counters = {"requests": 0, "batches": 0}
+
+    def submit(self, request):
+        """
+        Add a request to the current batch and block until its result is available.
+
+        The first caller of a batch becomes its leader: it waits for the window (or until the
+        batch is full), sends the batch and hands every caller its own result.
+        """
+        slot = {"request": request, "done": threading.Event(), "result": None, "error": None}
+        with self.lock:
+            self.pending.append(slot)
+            self.counters["requests"] += 1
+            leader = len(self.pending) == 1
+            if len(self.pending) >= self.max_batch:
+                self.full.set()
+
+        if leader:
+            self.full.wait(self.window)
+            with self.lock:
+                batch = self.pending
+                self.pending = []
+                self.full.clear()
+                self.counters["batches"] += 1
+            try:
+                results = self.send_batch([queued["request"] for queued in batch])
+                for queued, result in zip(batch, results):
+                    queued["result"] = result
+            except Exception as e:
+                for queued in batch:
+                    queued["error"] = e
+            finally:
+                for queued in batch:
+                    queued["done"].set()
+
+        slot["done"].wait()
+        if slot["error"] is not None:
+            raise slot["error"]
+        return slot["result"]
+
+    def stats(self):
+        """Return the number of requests, batches sent and the average batch size."""
+        with self.lock:
+            batches = self.counters["batches"]
+            return dict(self.counters, avg_batch_size=round(self.counters["requests"] / batches, 2) if batches else 0.0)
@@ -0,0 +1,202 @@
+from elasticsearch.serializer import (
+    CompatibilityModeJsonSerializer,
+    CompatibilityModeNdjsonSerializer,
+    JsonSerializer,
+    NdjsonSerializer,
+)
+import gzip
+import json
+import threading
+import time
+import zlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def stdlib_dumps(data):
+    """Serialize `data` to compact JSON bytes with the standard library."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8", "surrogatepass")
+
+
+def orjson_dumps(data):
+    """Serialize `data` to JSON bytes with orjson, falling back to str() for unknown types."""
+    return orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class PreencodedNdjsonSerializer(NdjsonSerializer):
+    """NDJSON serializer sending bytes bodies unchanged, so pre-built and compressed bodies stay intact."""
+
+    def dumps(self, data):
+        if isinstance(data, bytes):
+            return data
+        return super().dumps(data)
+
+
+class PreencodedCompatibilityNdjsonSerializer(PreencodedNdjsonSerializer):
+    mimetype = CompatibilityModeNdjsonSerializer.mimetype
+
+
+class OrjsonJsonSerializer(JsonSerializer):
+    def json_dumps(self, data):
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+
+    def json_loads(self, data):
+        return orjson.loads(data)
+
+
+class OrjsonNdjsonSerializer(PreencodedNdjsonSerializer):
+    def json_dumps(self, data):
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+
+    def json_loads(self, data):
+        return orjson.loads(data)
+
+
+class OrjsonCompatibilityJsonSerializer(OrjsonJsonSerializer):
+    mimetype = CompatibilityModeJsonSerializer.mimetype
+
+
+class OrjsonCompatibilityNdjsonSerializer(OrjsonNdjsonSerializer):
+    mimetype = CompatibilityModeNdjsonSerializer.mimetype
+
+
+class RequestCompressor:
+    def __init__(self, encoding="gzip", level=6, min_bytes=1024):
+        """
+        Compress request bodies and keep count of the bytes saved and the CPU time spent.
+        Elasticsearch decodes gzip and deflate request bodies; zstd is not accepted for requests.
+        :param encoding: "gzip" or "deflate".
+        :param level: Compression level, 1 (fastest) to 9 (smallest).
+        :param min_bytes: Bodies smaller than this are sent uncompressed.
+        """
+        if encoding not in ("gzip", "deflate"):
+            raise ValueError(f"Unsupported request encoding '{encoding}', expected 'gzip' or 'deflate'")
+        self.encoding = encoding
+        self.level = level
+        self.min_bytes = min_bytes
+        self.lock = threading.Lock()
+        self.counters = {"compressed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+
+    def compress(self, body):
+        """
+        Compress a request body if it is large enough.
+
+        Returns:
+            tuple: (body to send, headers to add), the headers empty when the body was left as is.
+        """
+        if len(body) < self.min_bytes:
+            with self.lock:
+                self.counters["skipped"] += 1
+            return body, {}
+        started = time.thread_time()
+        if self.encoding == "gzip":
+            compressed = gzip.compress(body, compresslevel=self.level, mtime=0)
+        else:
+            compressed = zlib.compress(body, self.level)
+        cpu = time.thread_time() - started
+        with self.lock:
+            self.counters["compressed"] += 1
+            self.counters["bytes_in"] += len(body)
+            self.counters["bytes_out"] += len(compressed)
+            self.counters["cpu_seconds"] += cpu
+        return compressed, {"content-encoding": self.encoding}
+
+    def stats(self):
+        """
+        Return the compression counters.
+
+        Returns:
+            dict: Bodies compressed and skipped, bytes in and out, bytes saved, ratio, CPU seconds
+            spent and bytes saved per CPU millisecond.
+        """
+        with self.lock:
+            counters = dict(self.counters)
+        saved = counters["bytes_in"] - counters["bytes_out"]
+        return dict(
+            counters,
+            encoding=self.encoding,
+            level=self.level,
+            bytes_saved=saved,
+            ratio=round(counters["bytes_in"] / counters["bytes_out"], 2) if counters["bytes_out"] else 0.0,
+            bytes_saved_per_cpu_ms=round(saved / (counters["cpu_seconds"] * 1000), 1) if counters["cpu_seconds"] else 0.0,
+        )
+
+
+def resolve_serializer(name="json"):
+    """
+    Resolve a serializer name to the functions and transport serializers used by the connectors.
+
+    Args:
+        name (str): "json" for the standard library (default), "orjson" for the fast path, or
+            "auto" to use orjson when it is installed. orjson writes datetimes in ISO 8601 ("T"
+            separated), NaN and infinity as null, and raises TypeError on integers beyond 64 bits,
+            where the standard library writes str(datetime), bare NaN and any integer, so it is opt-in.
+
+    Returns:
+        tuple: (dumps, loads, serializers) where `serializers` maps mimetypes to transport serializers.
+
+    Raises:
+        ImportError: If "orjson" is requested but not installed.
+        ValueError: If the name is unknown.
+    """
+    if name == "auto":
+        name = "orjson" if orjson is not None else "json"
+    if name == "json":
+        serializers = {serializer.mimetype: serializer() for serializer in (
+            PreencodedNdjsonSerializer, PreencodedCompatibilityNdjsonSerializer)}
+        return stdlib_dumps, json.loads, serializers
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("The 'orjson' serializer requires the orjson package")
+        serializers = {serializer.mimetype: serializer() for serializer in (
+            OrjsonJsonSerializer, OrjsonNdjsonSerializer,
+            OrjsonCompatibilityJsonSerializer, OrjsonCompatibilityNdjsonSerializer)}
+        return orjson_dumps, orjson.loads, serializers
+    raise ValueError(f"Unknown serializer '{name}', expected 'auto', 'json' or 'orjson'")
+
+
+class LazySearchResponse:
+    def __init__(self, raw, loads=json.loads):
+        """
+        Search response kept as raw bytes and only decoded when its content is first accessed.
+        :param raw: Raw response body.
+        :param loads: Function decoding JSON bytes.
+        """
+        self.raw = raw
+        self._loads = loads
+        self._body = None
+
+    @property
+    def body(self):
+        """The decoded response, decoded once on first access."""
+        if self._body is None:
+            self._body = self._loads(self.raw)
+        return self._body
+
+    def __getitem__(self, key):
+        return self.body[key]
+
+    def __contains__(self, key):
+        return key in self.body
+
+    def get(self, key, default=None):
+        return self.body.get(key, default)
+
+    @property
+    def hits(self):
+        return self.body["hits"]["hits"]
+
+    @property
+    def aggregations(self):
+        return self.body.get("aggregations", {})
+
+    def sources(self, fields=None):
+        """
+        Yield the `_source` of every hit, reduced to the top-level `fields` when given.
+        """
+        for hit in self.hits:
+            source = hit.get("_source", {})
+            yield {field: source[field] for field in fields if field in source} if fields else source
@@ -1,8 +1,11 @@
 from demo import ELKConnector, KibanaClient, DataGenerator
 from demo import search_queries, search_filters, aggregations, sortings
 from demo import index_name_example_1, index_name_example_2, alias_name_example, index_mappings_example
+import logging
 import os
 
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 elk_credentials = {
     "host": os.getenv("ELK_HOSTE"),
     "user": os.getenv("ELK_USERNAME"),
@@ -23,13 +26,11 @@ connector.info()
 
 
 
-connector.create_index(index_name=index_name_example_1, index_body=index_mappings_example)
-connector.put_alias_for_index(index_name=index_name_example_1, alias_name=alias_name_example)
-
 data_gen = DataGenerator()
-for doc in range(900):
-    random_data = data_gen.generate_random_data()
-    connector.index_document(index_name=index_name_example_1, document_body=random_data)
+documents = (data_gen.generate_random_data() for _ in range(900))
+with connector.bulk_load_mode(index_name=index_name_example_1, index_body=index_mappings_example):
+    summary = connector.bulk_index(index_name=index_name_example_1, docs_iterable=documents, id_field="id")
+connector.put_alias_for_index(index_name=index_name_example_1, alias_name=alias_name_example)
 
 info = connector.get_index_info(index_name=index_name_example_1)
 
@@ -0,0 +1,75 @@
+import json
+import urllib.request
+
+import pytest
+
+from benchmarks.stub_cluster import start_stub_cluster
+from demo import ELKConnector
+
+
+@pytest.fixture(scope="session")
+def stub_url():
+    """Base URL of a stub cluster shared by the whole test session."""
+    url, process = start_stub_cluster()
+    yield url
+    process.terminate()
+    process.join()
+
+
+@pytest.fixture
+def stub(stub_url):
+    """The stub cluster, emptied before the test; `stub.inject(**faults)` queues failures."""
+    cluster = StubControl(stub_url)
+    cluster.reset()
+    return cluster
+
+
+@pytest.fixture
+def connect(stub):
+    """Factory of ELKConnectors connected to the stub, closed after the test."""
+    connectors = []
+
+    def factory(**options):
+        connector = ELKConnector(host=stub.url, user="elastic", cert=None, **dict({"pass": ""}, **options))
+        connector.connect()
+        connectors.append(connector)
+        return connector
+
+    yield factory
+    for connector in connectors:
+        connector.close()
+
+
+class StubControl:
+    def __init__(self, url):
+        self.url = url
+
+    def reset(self):
+        self._request("DELETE", "/_stub")
+
+    def open_pits(self):
+        return self._request("GET", "/_stub")["open_pits"]
+
+    def refreshes(self, index_name):
+        return self._request("GET", "/_stub")["refreshes"].get(index_name, 0)
+
+    def request_encodings(self):
+        return self._request("GET", "/_stub")["request_encodings"]
+
+    def inject(self, bulk_statuses=(), bulk_item_rejections=0, bulk_item_statuses=(), health_timeouts=0):
+        """
+        Answer the next bulk requests with `bulk_statuses`, reject the next bulk items with 429,
+        fail the items after them with `bulk_item_statuses` and time out the next
+        `health_timeouts` cluster health requests.
+        """
+        self._request("PUT", "/_stub/faults", {"bulk_statuses": list(bulk_statuses),
+                                               "bulk_item_rejections": bulk_item_rejections,
+                                               "bulk_item_statuses": list(bulk_item_statuses),
+                                               "health_timeouts": health_timeouts})
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return json.load(response)
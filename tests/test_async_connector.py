@@ -0,0 +1,78 @@
+import asyncio
+
+from demo import AsyncELKConnector, DataGenerator, index_mappings_example
+
+INDEX = "async_test"
+
+
+def run(stub, scenario):
+    """Run `scenario(connector)` on a fresh event loop with an AsyncELKConnector connected to the stub."""
+    async def main():
+        connector = AsyncELKConnector(host=stub.url, user="elastic", cert=None, **{"pass": ""})
+        await connector.connect()
+        try:
+            return await scenario(connector)
+        finally:
+            await connector.close()
+
+    return asyncio.run(main())
+
+
+def test_index_search_and_info(stub):
+    async def scenario(connector):
+        assert await connector.create_index(INDEX, index_mappings_example) is True
+        await connector.index_document(INDEX, {"id": "1", "name": "x"})
+        response = await connector.search(INDEX, query={"match": {"name": "x"}})
+        info = await connector.get_index_info(INDEX)
+        missing = await connector.search("async_missing")
+        return response, info, missing
+
+    response, info, missing = run(stub, scenario)
+
+    assert response["hits"]["hits"][0]["_source"]["name"] == "x"
+    assert info["exists"] and info["doc_count"] == 1
+    assert missing == {"error": "index does not exist"}
+
+
+def test_search_many_keeps_the_order_of_searches(stub):
+    async def scenario(connector):
+        await connector.bulk_index(INDEX, [{"n": number} for number in range(5)])
+        return await connector.search_many([{"index_name": INDEX, "limit": 1, "offset": offset} for offset in range(5)],
+                                           max_concurrency=2)
+
+    responses = run(stub, scenario)
+
+    assert [response["hits"]["hits"][0]["_source"]["n"] for response in responses] == list(range(5))
+
+
+def test_parallel_bulk_index_retries_rejected_items(stub):
+    documents = DataGenerator(seed=5).generate_batch(200)
+    stub.inject(bulk_item_rejections=4)
+
+    async def generate():
+        for document in documents:
+            yield document
+
+    async def scenario(connector):
+        summary = await connector.parallel_bulk_index(INDEX, generate(), max_in_flight=3, id_field="id",
+                                                      initial_batch_docs=50)
+        return summary, await connector.get_index_total_docs(INDEX)
+
+    summary, count = run(stub, scenario)
+
+    assert summary["indexed"] == count == len(documents)
+    assert summary["retried"] == 4
+    assert summary["resume_position"] == len(documents)
+
+
+def test_bulk_index_stops_on_a_refused_request(stub):
+    stub.inject(bulk_statuses=[400])
+
+    async def scenario(connector):
+        return await connector.bulk_index(INDEX, [{"n": number} for number in range(10)])
+
+    summary = run(stub, scenario)
+
+    assert summary["aborted"]
+    assert summary["resume_position"] == 0
+    assert summary["failed"] == 10
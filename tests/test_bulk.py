@@ -0,0 +1,68 @@
+import pytest
+
+from demo import DataGenerator
+from demo.bulk import AdaptiveBatchSizer
+
+INDEX = "bulk_test"
+
+
+@pytest.fixture
+def documents():
+    return DataGenerator(seed=7).generate_batch(120)
+
+
+def test_bulk_index_retries_only_rejected_items(stub, connect, documents):
+    connector = connect()
+    stub.inject(bulk_item_rejections=5)
+
+    summary = connector.bulk_index(INDEX, documents, id_field="id", initial_batch_docs=50)
+
+    assert summary["indexed"] == len(documents)
+    assert summary["failed"] == 0
+    assert summary["retried"] == 5
+    assert summary["rejections"] == 1
+    assert connector.get_index_total_docs(INDEX) == len(documents)
+
+
+def test_bulk_index_retries_a_rejected_request(stub, connect, documents):
+    connector = connect()
+    stub.inject(bulk_statuses=[429])
+
+    summary = connector.bulk_index(INDEX, documents, id_field="id", initial_batch_docs=200)
+
+    assert summary["indexed"] == len(documents)
+    assert summary["retried"] == len(documents)
+    assert connector.get_index_total_docs(INDEX) == len(documents)
+
+
+def test_bulk_index_reports_items_once_retries_are_exhausted(stub, connect, documents):
+    connector = connect()
+    stub.inject(bulk_item_rejections=10)
+
+    summary = connector.bulk_index(INDEX, documents[:5], max_item_retries=1)
+
+    assert summary["indexed"] == 0
+    assert [failure["position"] for failure in summary["failures"]] == [0, 1, 2, 3, 4]
+    assert {failure["status"] for failure in summary["failures"]} == {429}
+
+
+def test_bulk_index_raises_on_a_refused_request(stub, connect, documents):
+    connector = connect()
+    stub.inject(bulk_statuses=[400])
+
+    with pytest.raises(Exception, match="Error bulk indexing documents") as raised:
+        connector.bulk_index(INDEX, documents)
+    assert raised.value.__cause__.meta.status == 400
+
+
+def test_adaptive_batch_sizer_halves_on_rejection_and_grows_when_fast():
+    sizer = AdaptiveBatchSizer(initial_docs=400, min_docs=50, max_docs=1000, target_latency=1.0)
+
+    sizer.record(0.1, rejected=True)
+    assert sizer.batch_docs == 200
+    sizer.record(0.1)
+    assert sizer.batch_docs == 301
+    sizer.record(2.0)
+    assert sizer.batch_docs == 225
+    assert sizer.is_full(225, 0)
+    assert sizer.is_full(1, sizer.max_bytes)
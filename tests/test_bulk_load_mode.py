@@ -0,0 +1,60 @@
+import pytest
+
+from demo import DataGenerator
+from demo.elk_connector import BULK_LOAD_SETTINGS
+
+INDEX = "load_test"
+
+
+def settings_of(connector, index_name):
+    return connector.get_client().indices.get_settings(index=index_name, flat_settings=True).body[index_name]["settings"]
+
+
+def segments_of(connector, index_name):
+    stats = connector.get_client().indices.stats(index=index_name, metric="segments")
+    return stats["indices"][index_name]["primaries"]["segments"]["count"]
+
+
+def test_new_index_is_loaded_with_bulk_settings_then_restored(stub, connect):
+    connector = connect()
+    body = {"settings": {"number_of_shards": 2, "number_of_replicas": 1, "refresh_interval": "5s"}}
+
+    with connector.bulk_load_mode(INDEX, body):
+        during = settings_of(connector, INDEX)
+        connector.bulk_index(INDEX, DataGenerator(seed=1).generate_batch(50))
+        assert stub.refreshes(INDEX) == 0
+
+    assert {key: during[key] for key in BULK_LOAD_SETTINGS} == BULK_LOAD_SETTINGS
+    after = settings_of(connector, INDEX)
+    assert after["index.number_of_replicas"] == 1
+    assert after["index.refresh_interval"] == "5s"
+    assert "index.translog.durability" not in after
+    assert after["index.number_of_shards"] == 2
+    assert stub.refreshes(INDEX) == 1
+    assert connector.get_index_total_docs(INDEX) == 50
+
+
+def test_existing_index_is_restored_after_a_failed_load(stub, connect):
+    connector = connect()
+    connector.create_index(INDEX, {"settings": {"number_of_replicas": 2}})
+
+    with pytest.raises(RuntimeError, match="load failed"):
+        with connector.bulk_load_mode(INDEX, force_merge=True):
+            assert settings_of(connector, INDEX)["index.number_of_replicas"] == 0
+            raise RuntimeError("load failed")
+
+    after = settings_of(connector, INDEX)
+    assert after["index.number_of_replicas"] == 2
+    assert "index.refresh_interval" not in after
+    assert stub.refreshes(INDEX) == 1
+    # The force-merge only follows a successful load.
+    assert segments_of(connector, INDEX) == 10
+
+
+def test_force_merge_after_a_successful_load(stub, connect):
+    connector = connect()
+
+    with connector.bulk_load_mode(INDEX, {"settings": {"number_of_shards": 3}}, force_merge=True, max_num_segments=2):
+        connector.bulk_index(INDEX, DataGenerator(seed=2).generate_batch(30))
+
+    assert segments_of(connector, INDEX) == 6
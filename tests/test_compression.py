@@ -0,0 +1,60 @@
+import gzip
+import zlib
+
+import pytest
+
+from demo import DataGenerator
+from demo.serializers import RequestCompressor
+
+INDEX = "compression_test"
+
+
+@pytest.mark.parametrize("encoding, decompress", [("gzip", gzip.decompress), ("deflate", zlib.decompress)])
+def test_request_compressor_round_trip(encoding, decompress):
+    compressor = RequestCompressor(encoding, level=6, min_bytes=100)
+    body = b'{"message": "repeated log line"}\n' * 50
+
+    compressed, headers = compressor.compress(body)
+    small, small_headers = compressor.compress(b"{}")
+
+    assert headers == {"content-encoding": encoding}
+    assert decompress(compressed) == body
+    assert (small, small_headers) == (b"{}", {})
+    stats = compressor.stats()
+    assert (stats["compressed"], stats["skipped"], stats["bytes_in"]) == (1, 1, len(body))
+    assert stats["bytes_saved"] == len(body) - len(compressed)
+    assert stats["ratio"] > 1
+
+
+def test_request_compressor_rejects_unknown_encodings():
+    with pytest.raises(ValueError, match="zstd"):
+        RequestCompressor("zstd")
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+def test_bulk_and_msearch_bodies_are_sent_compressed(stub, connect, encoding):
+    connector = connect(compression=encoding, compression_min_bytes=512)
+    documents = DataGenerator(seed=3).generate_batch(200)
+
+    summary = connector.bulk_index(INDEX, documents)
+    results = connector.multi_search([{"index_name": INDEX, "limit": 5}] * 20)
+
+    assert summary["indexed"] == len(documents)
+    assert connector.get_index_total_docs(INDEX) == len(documents)
+    assert all(len(result["hits"]["hits"]) == 5 for result in results)
+    assert stub.request_encodings() == {encoding: summary["batches"] + 1}
+    stats = connector.compression_stats()
+    assert stats["enabled"] and stats["encoding"] == encoding
+    assert stats["compressed"] == summary["batches"] + 1
+    assert 0 < stats["bytes_saved"] < stats["bytes_in"]
+
+
+def test_small_bodies_and_disabled_compression_are_sent_as_is(stub, connect):
+    small = connect(compression="gzip", compression_min_bytes=1024 * 1024)
+    small.bulk_index(INDEX, DataGenerator(seed=4).generate_batch(10))
+    plain = connect()
+    plain.bulk_index(INDEX, DataGenerator(seed=5).generate_batch(10))
+
+    assert stub.request_encodings() == {}
+    assert small.compression_stats()["skipped"] == 1
+    assert plain.compression_stats() == {"enabled": False}
@@ -0,0 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
+
+INDEX = "connection_test"
+
+
+def test_searches_reuse_one_client(stub, connect):
+    connector = connect()
+    connector.bulk_index(INDEX, [{"n": 1}])
+
+    for _ in range(5):
+        assert connector.search(INDEX)["hits"]["hits"]
+
+    counters = connector.connection_stats()
+    assert counters["connects"] == 1
+    assert counters["reuses"] >= 5
+
+
+def test_idle_client_is_replaced_without_breaking_concurrent_requests(stub, connect):
+    connector = connect(keep_alive=0.0)
+    connector.bulk_index(INDEX, [{"n": 1}])
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        responses = list(executor.map(lambda _: connector.search(INDEX), range(60)))
+
+    assert all(response is not None and response["hits"]["hits"] for response in responses)
+    assert connector.connection_stats()["connects"] > 1
+
+
+def test_search_reconnects_after_a_connection_error(stub, connect):
+    connector = connect()
+    connector.bulk_index(INDEX, [{"n": 1}])
+    connector.client.close()
+
+    assert connector.search(INDEX)["hits"]["hits"]
+    assert connector.connection_stats()["verifications"] == 1
+    assert connector.connection_stats()["connects"] == 2
@@ -0,0 +1,78 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from demo import DataGenerator, SearchExporter, index_mappings_example
+
+INDEX = "export_test"
+DOCUMENTS = 250
+
+
+@pytest.fixture
+def connector(stub, connect):
+    connector = connect()
+    connector.create_index(INDEX, index_mappings_example)
+    connector.bulk_index(INDEX, DataGenerator(seed=3).generate_batch(DOCUMENTS), id_field="id")
+    return connector
+
+
+def test_ndjson_export(connector, tmp_path):
+    path = str(tmp_path / "export.ndjson.gz")
+
+    summary = SearchExporter(connector, page_size=40, chunk_rows=30).export(INDEX, path)
+
+    with gzip.open(path, "rt") as exported:
+        rows = [json.loads(line) for line in exported]
+    assert summary["rows"] == len(rows) == DOCUMENTS
+    assert summary["format"] == "ndjson"
+    assert {"_id", "name", "metadata"} <= set(rows[0])
+
+
+def test_csv_export_flattens_mapped_fields(connector, tmp_path):
+    path = str(tmp_path / "export.csv")
+
+    summary = SearchExporter(connector, page_size=40, slices=3).export(INDEX, path)
+
+    with open(path, newline="") as exported:
+        header, *rows = list(csv.reader(exported))
+    assert header[0] == "_id"
+    assert "metadata.attributes.attributes.value" in header
+    assert summary["rows"] == len(rows) == DOCUMENTS
+    assert len({row[0] for row in rows}) == DOCUMENTS
+
+
+def test_parquet_export_uses_mapped_types(connector, tmp_path):
+    pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "export.parquet")
+
+    summary = SearchExporter(connector, page_size=40, chunk_rows=100).export(INDEX, path, fields=["age", "score", "active"])
+
+    table = pyarrow_parquet.read_table(path)
+    assert table.num_rows == summary["rows"] == DOCUMENTS
+    assert [str(field.type) for field in table.schema] == ["string", "int64", "double", "bool"]
+    assert summary["coerced_values"] == 0
+
+
+def test_unknown_format_is_refused(connector, tmp_path):
+    with pytest.raises(ValueError):
+        SearchExporter(connector).export(INDEX, str(tmp_path / "export.xlsx"))
+
+
+def test_search_is_closed_when_a_write_fails(connector, tmp_path, monkeypatch):
+    closed = []
+    iter_search = connector.iter_search
+
+    def tracked_iter_search(*args, **kwargs):
+        try:
+            yield from iter_search(*args, **kwargs)
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(connector, "iter_search", tracked_iter_search)
+    monkeypatch.setattr(connector, "json_dumps", lambda document: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        SearchExporter(connector).export(INDEX, str(tmp_path / "export.ndjson"))
+    assert closed == [True]
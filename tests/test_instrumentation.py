@@ -0,0 +1,83 @@
+import urllib.request
+
+import pytest
+from elastic_transport import JsonSerializer
+
+from demo import Instrumentation, LatencyTrackingNode, start_metrics_server
+
+INDEX = "instrumentation_test"
+
+
+@pytest.fixture
+def instrumented(stub, connect):
+    instrumentation = Instrumentation()
+    return instrumentation, connect(instrumentation=instrumentation)
+
+
+def test_search_records_latency_and_the_bytes_sent(instrumented, monkeypatch):
+    instrumentation, connector = instrumented
+    connector.bulk_index(INDEX, [{"n": 1}])
+    sent = []
+    perform_request = LatencyTrackingNode.perform_request
+
+    def recording_perform_request(node, method, target, body=None, **kwargs):
+        sent.append(body)
+        return perform_request(node, method, target, body=body, **kwargs)
+
+    monkeypatch.setattr(LatencyTrackingNode, "perform_request", recording_perform_request)
+    encodings = []
+    dumps = connector.json_dumps
+    json_dumps = JsonSerializer.json_dumps
+    monkeypatch.setattr(connector, "json_dumps", lambda body: encodings.append(body) or dumps(body))
+    monkeypatch.setattr(JsonSerializer, "json_dumps",
+                        lambda serializer, body: encodings.append(body) or json_dumps(serializer, body))
+
+    assert connector.search(INDEX, query={"match": {"n": 1}})["hits"]["hits"]
+
+    search = instrumentation.snapshot()["operations"]["search"]
+    assert len(sent) == 1
+    # The body is encoded once, and the byte count is the length of what was sent.
+    assert len(encodings) == 1
+    assert search["request_bytes"] == len(sent[0])
+    assert search["response_bytes"] > 0
+    assert search["count"] == 1 and search["errors"] == 0
+
+
+def test_bulk_items_and_errors_are_counted(instrumented, stub):
+    instrumentation, connector = instrumented
+    stub.inject(bulk_statuses=[429])
+    connector.bulk_index(INDEX, [{"n": number} for number in range(10)])
+    connector.search("instrumentation_missing")
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["counters"]["bulk_items_indexed"] == 10
+    assert snapshot["counters"]["bulk_items_retried"] == 10
+    assert snapshot["counters"]["bulk_rejections"] == 1
+    assert snapshot["operations"]["bulk"]["errors"] == 1
+    assert snapshot["operations"]["search"]["errors"] == 1
+    assert snapshot["gauges"]["connection_connects"] == 1
+
+
+def test_hooks_receive_every_operation(instrumented):
+    instrumentation, connector = instrumented
+    events = []
+    instrumentation.add_hook(events.append)
+
+    connector.index_document(INDEX, {"n": 1})
+
+    assert [event["operation"] for event in events] == ["index_document"]
+    assert events[0]["error"] is None
+
+
+def test_metrics_are_served_in_prometheus_format(instrumented):
+    instrumentation, connector = instrumented
+    connector.bulk_index(INDEX, [{"n": 1}])
+    server = start_metrics_server(instrumentation, port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics", timeout=5) as response:
+            metrics = response.read().decode()
+    finally:
+        server.shutdown()
+
+    assert 'elk_connector_operation_seconds_count{operation="bulk"} 1' in metrics
+    assert "elk_connector_bulk_items_indexed_total 1" in metrics
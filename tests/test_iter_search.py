@@ -0,0 +1,57 @@
+import itertools
+
+INDEX = "iter_search_test"
+DOCUMENTS = 1050
+
+
+def load(connect):
+    connector = connect()
+    connector.bulk_index(INDEX, ({"n": number} for number in range(DOCUMENTS)))
+    return connector
+
+
+def test_iter_search_pages_through_every_hit(stub, connect):
+    connector = load(connect)
+
+    numbers = [hit["_source"]["n"] for hit in connector.iter_search(INDEX, page_size=100)]
+
+    assert numbers == list(range(DOCUMENTS))
+    assert stub.open_pits() == 0
+
+
+def test_sliced_iter_search_reads_every_hit_once(stub, connect):
+    connector = load(connect)
+
+    numbers = [hit["_source"]["n"] for hit in connector.iter_search(INDEX, page_size=64, slices=4)]
+
+    assert sorted(numbers) == list(range(DOCUMENTS))
+    assert stub.open_pits() == 0
+
+
+def test_point_in_time_is_closed_when_iteration_stops_early(stub, connect):
+    connector = load(connect)
+
+    hits = connector.iter_search(INDEX, page_size=10)
+    assert len(list(itertools.islice(hits, 15))) == 15
+    assert stub.open_pits() == 1
+    hits.close()
+
+    assert stub.open_pits() == 0
+
+
+def test_iter_search_sends_search_after_with_a_tiebreaker(stub, connect, monkeypatch):
+    connector = load(connect)
+    bodies = []
+    client = connector.get_client()
+    search = client.search
+
+    def recording_search(**kwargs):
+        bodies.append(dict(kwargs["body"]))
+        return search(**kwargs)
+
+    monkeypatch.setattr(client, "search", recording_search)
+    list(connector.iter_search(INDEX, sort=[{"n": "asc"}], page_size=500))
+
+    assert [body.get("search_after") for body in bodies] == [None, [499], [999]]
+    assert bodies[0]["sort"] == [{"n": "asc"}, {"_shard_doc": "asc"}]
+    assert "from" not in bodies[0] and bodies[0]["track_total_hits"] is False
@@ -0,0 +1,128 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import json
+import threading
+
+import pytest
+
+from demo import KibanaClient
+
+
+class FakeKibana(BaseHTTPRequestHandler):
+    """Spaces, data views and the `_find` API, which refuses pages beyond the 10000 result window."""
+    spaces = {}
+    requests = []
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        space = "default"
+        if parts[0] == "s":
+            space, parts = parts[1], parts[2:]
+        self.requests.append(("/" + "/".join(parts), space, params))
+
+        if parts == ["api", "spaces", "space"]:
+            return self.respond(200, [{"id": space_id} for space_id in self.spaces])
+        if parts == ["api", "data_views"]:
+            return self.respond(200, {"data_view": [{"id": view_id} for view_id in self.spaces[space]["data_views"]]})
+        if parts == ["api", "saved_objects", "_find"]:
+            objects = self.spaces[space]["objects"].get(params["type"], [])
+            per_page, page = int(params["per_page"]), int(params.get("page", 1))
+            if page * per_page > 10000:
+                return self.respond(400, {"statusCode": 400, "message": "Result window is too large"})
+            start = (page - 1) * per_page
+            return self.respond(200, {"total": len(objects), "page": page, "per_page": per_page,
+                                      "saved_objects": objects[start:start + per_page]})
+        return self.respond(404, {"statusCode": 404})
+
+    def respond(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def kibana_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeKibana)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def kibana(kibana_url):
+    """Factory of KibanaClients on an emptied fake Kibana, closed after the test."""
+    clients = []
+    FakeKibana.spaces = {}
+    FakeKibana.requests = []
+
+    def factory(**options):
+        client = KibanaClient(kibana_host=kibana_url, user="elastic", **dict({"pass": ""}, **options))
+        clients.append(client)
+        return client
+
+    yield factory
+    for client in clients:
+        client.close()
+
+
+def space(dashboards=0, data_views=()):
+    objects = [{"type": "dashboard", "id": f"dashboard-{number}"} for number in range(dashboards)]
+    return {"objects": {"dashboard": objects}, "data_views": list(data_views)}
+
+
+@pytest.mark.parametrize("page_size, requests", [(3000, 4), (3333, 4), (7, 1429)])
+def test_find_stops_at_the_result_window_without_skipping_objects(kibana, page_size, requests):
+    FakeKibana.spaces = {"default": space(dashboards=12000)}
+    client = kibana(page_size=page_size, cache_ttl=None)
+
+    ids = [saved_object["id"] for saved_object in client.iter_saved_objects("dashboard")]
+
+    assert ids == [f"dashboard-{number}" for number in range(10000)]
+    assert len(FakeKibana.requests) == requests
+    last = FakeKibana.requests[-1][2]
+    assert int(last["page"]) * int(last["per_page"]) == 10000
+
+
+def test_find_reads_every_page_below_the_result_window(kibana):
+    FakeKibana.spaces = {"default": space(dashboards=25), "ops": space(dashboards=3)}
+    client = kibana(page_size=10)
+
+    assert len(list(client.iter_saved_objects("dashboard"))) == 25
+    assert [page[2]["page"] for page in FakeKibana.requests] == ["1", "2", "3"]
+    assert [(space_id, saved_object["id"]) for space_id, saved_object in client.iter_all_saved_objects("dashboard")
+            if space_id == "ops"] == [("ops", "dashboard-0"), ("ops", "dashboard-1"), ("ops", "dashboard-2")]
+
+
+def test_kibana_data_counts_shared_data_views_once_and_is_cached(kibana):
+    FakeKibana.spaces = {"default": space(dashboards=4, data_views=["logs", "metrics"]),
+                         "marketing": space(dashboards=2, data_views=["logs", "campaigns"]),
+                         "ops": space(data_views=["metrics"])}
+    client = kibana(cache_ttl=60.0)
+
+    data = client.get_kibana_data()
+    requests = len(FakeKibana.requests)
+
+    assert (data["dashboards"], data["spaces"], data["dataViews"]) == (6, 3, 3)
+    assert data["per_space"]["marketing"] == {"dashboards": 2, "dataViews": 2}
+    assert client.get_kibana_data() == data
+    assert len(FakeKibana.requests) == requests
+    client.invalidate_cache()
+    client.get_kibana_data()
+    assert len(FakeKibana.requests) == 2 * requests
+
+
+def test_kibana_data_is_empty_when_kibana_is_unreachable():
+    client = KibanaClient(kibana_host="http://127.0.0.1:9", user="elastic", **{"pass": ""})
+    try:
+        assert client.get_kibana_data() == {"dashboards": 0, "spaces": 0, "dataViews": 0, "per_space": {}}
+    finally:
+        client.close()
@@ -0,0 +1,129 @@
+import datetime
+import zlib
+
+from demo import IndexLifecycleManager, LifecyclePolicy
+from demo.lifecycle import parse_index_name, parse_size
+
+NOW = datetime.datetime.now(datetime.timezone.utc)
+
+
+def dated(days_ago):
+    return f"logs-{NOW - datetime.timedelta(days=days_ago):%Y.%m.%d}"
+
+
+def ids_on_shard(shard, shards, count):
+    """`count` document ids the stub routes to `shard` of an index with `shards` primaries."""
+    ids, candidate = [], 0
+    while len(ids) < count:
+        if zlib.crc32(str(candidate).encode()) % shards == shard:
+            ids.append(str(candidate))
+        candidate += 1
+    return ids
+
+
+def create(connector, index_name, shards=2, replicas=1, docs=4):
+    client = connector.get_client()
+    client.indices.create(index=index_name, settings={"number_of_shards": shards, "number_of_replicas": replicas})
+    connector.bulk_index(index_name, [{"id": str(i), "message": "event"} for i in range(docs)], id_field="id")
+
+
+def test_parse_helpers():
+    assert parse_size("2kb") == 2048
+    assert parse_size(10) == 10
+    parts = parse_index_name("logs-2024.05.01-000003-shrunk")
+    assert parts["prefix"] == "logs"
+    assert parts["date"] == datetime.date(2024, 5, 1)
+    assert parts["generation"] == 3
+    assert parts["shrunk"]
+
+
+def test_bootstrap_creates_the_write_index_once(stub, connect):
+    connector = connect()
+    manager = IndexLifecycleManager(connector, {"logs": LifecyclePolicy(write_alias="logs-write")})
+
+    first = manager.bootstrap("logs", {"settings": {"number_of_shards": 2}})
+    second = manager.bootstrap("logs")
+
+    assert first == second == f"logs-{NOW:%Y.%m.%d}-000001"
+    state = manager.gather("logs")[first]
+    assert state["write_index"] and state["aliases"] == ["logs-write"]
+    assert state["primaries"] == 2
+
+
+def test_rollover_on_the_largest_primary_shard(stub, connect):
+    connector = connect()
+    policy = LifecyclePolicy(write_alias="logs-write", rollover_max_primary_shard_size=1000, rollover_max_age=None)
+    manager = IndexLifecycleManager(connector, {"logs": policy})
+    write_index = manager.bootstrap("logs", {"settings": {"number_of_shards": 4}})
+    # Four documents of 300 bytes on a single shard: 1200 bytes there, 300 on average per shard.
+    connector.bulk_index("logs-write", [{"id": doc_id} for doc_id in ids_on_shard(0, 4, 4)], id_field="id")
+
+    state = manager.gather("logs")[write_index]
+    assert state["largest_primary_bytes"] == 1200
+    assert state["primary_bytes"] // state["primaries"] < policy.rollover_max_primary_shard_size
+
+    actions = manager.plan()
+    assert [(action["action"], action["reason"]) for action in actions] == [
+        ("rollover", "largest primary shard holds 1200 bytes")]
+    assert actions[0]["new_index"] == f"logs-{NOW:%Y.%m.%d}-000002"
+
+    results = manager.apply(actions)
+    assert results[0]["status"] == "done"
+    states = manager.gather("logs")
+    assert states[actions[0]["new_index"]]["write_index"]
+    assert not states[write_index]["aliases"]
+    assert manager.plan() == []
+
+
+def test_plan_deletes_and_force_merges_by_the_date_in_the_name(stub, connect):
+    connector = connect()
+    create(connector, dated(40))
+    create(connector, dated(5))
+    create(connector, dated(0))
+    manager = IndexLifecycleManager(connector, {"logs": LifecyclePolicy(force_merge_after="2d", delete_after="30d")})
+
+    actions = manager.plan()
+    assert [(action["action"], action["index"]) for action in actions] == [
+        ("delete", dated(40)), ("force_merge", dated(5))]
+
+    assert {result["status"] for result in manager.apply(actions)} == {"done"}
+    assert manager.plan() == []
+    assert sorted(manager.gather("logs")) == [dated(5), dated(0)]
+
+
+def test_shrink_moves_documents_and_aliases(stub, connect):
+    connector = connect()
+    create(connector, dated(10))
+    connector.get_client().indices.put_alias(index=dated(10), name="logs-read")
+    manager = IndexLifecycleManager(connector, {"logs": LifecyclePolicy(shrink_after="7d", force_merge_after=None)})
+    manager.shrink_poll_interval = 0.0
+
+    results = manager.apply(manager.plan())
+
+    assert [(result["action"], result["status"]) for result in results] == [("shrink", "done")]
+    states = manager.gather("logs")
+    target = states[f"{dated(10)}-shrunk"]
+    assert list(states) == [f"{dated(10)}-shrunk"]
+    assert (target["primaries"], target["docs"], target["aliases"]) == (1, 4, ["logs-read"])
+
+
+def test_failed_shrink_removes_the_target_and_restores_the_source(stub, connect):
+    connector = connect()
+    client = connector.get_client()
+    create(connector, dated(10))
+    manager = IndexLifecycleManager(connector, {"logs": LifecyclePolicy(shrink_after="7d", force_merge_after=None)})
+    manager.shrink_poll_interval = 0.0
+    stub.inject(health_timeouts=1)
+
+    results = manager.apply(manager.plan())
+
+    assert results[0]["status"] == "failed"
+    assert "did not become yellow" in results[0]["error"]
+    assert not client.indices.exists(index=f"{dated(10)}-shrunk")
+    settings = client.indices.get_settings(index=dated(10), flat_settings=True).body[dated(10)]["settings"]
+    assert "index.blocks.write" not in settings
+    assert "index.routing.allocation.require._name" not in settings
+    assert settings["index.number_of_replicas"] == 1
+
+    # Nothing is left behind, so the next run shrinks the index.
+    assert [result["status"] for result in manager.apply(manager.plan())] == ["done"]
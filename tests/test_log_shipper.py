@@ -0,0 +1,134 @@
+import datetime
+import glob
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from demo import BulkShipper, route_index
+
+PATTERN = "ship-%{+yyyy.MM.dd}"
+TIMESTAMP = "2024-05-01T10:00:00Z"
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+@pytest.fixture
+def shipper(connect, tmp_path):
+    shippers = []
+
+    def factory(**options):
+        created = BulkShipper(connect(), index_pattern=PATTERN, spool_dir=str(tmp_path), flush_interval=0.05,
+                              **options)
+        shippers.append(created)
+        return created
+
+    yield factory
+    for created in shippers:
+        created.close()
+
+
+def test_route_index():
+    assert route_index(PATTERN, TIMESTAMP) == "ship-2024.05.01"
+    assert route_index(PATTERN, "2024-05-01T23:30:00-02:00") == "ship-2024.05.02"
+    assert route_index(PATTERN, 1714557600000) == "ship-2024.05.01"
+    assert route_index("logstash-%{+YYYY.MM}", datetime.datetime(2024, 5, 1)) == "logstash-2024.05"
+    with pytest.raises(TypeError):
+        route_index(PATTERN, True)
+
+
+def test_documents_are_shipped_to_daily_indices(stub, shipper):
+    shipping = shipper()
+    for number in range(30):
+        shipping.submit({"@timestamp": TIMESTAMP, "number": number})
+    shipping.submit({"@timestamp": "not a date"})
+    shipping.flush(timeout=10)
+
+    stats = shipping.stats()
+    assert stats["indexed"] == 31
+    assert stats["unroutable"] == 1
+    assert shipping.connector.get_index_total_docs("ship-2024.05.01") == 30
+
+
+def test_undelivered_batches_are_spooled_and_replayed(stub, shipper, tmp_path):
+    stub.inject(bulk_statuses=[503])
+    shipping = shipper()
+    for number in range(20):
+        shipping.submit({"@timestamp": TIMESTAMP, "number": number})
+    shipping.flush(timeout=10)
+    assert shipping.stats()["spooled"] == 20
+
+    wait_for(lambda: shipping.stats()["replayed"] == 20)
+
+    assert shipping.stats()["spool_bytes"] == 0
+    assert not glob.glob(os.path.join(tmp_path, "spool-*"))
+    assert shipping.connector.get_index_total_docs("ship-2024.05.01") == 20
+
+
+def test_refused_batches_are_dead_lettered_and_not_replayed(stub, shipper, tmp_path):
+    stub.inject(bulk_statuses=[400])
+    shipping = shipper()
+    for number in range(5):
+        shipping.submit({"@timestamp": TIMESTAMP, "number": number})
+    shipping.flush(timeout=10)
+
+    stats = shipping.stats()
+    assert stats["dead_lettered"] == 5
+    assert stats["spooled"] == stats["replayed"] == 0
+    [dead_letter] = glob.glob(os.path.join(tmp_path, "dead-letter-*.ndjson.gz"))
+    with gzip.open(dead_letter, "rt") as segment:
+        header, *documents = [json.loads(line) for line in segment]
+    assert header["index"] == "ship-2024.05.01"
+    assert "400" in header["error"]
+    assert [document["number"] for document in documents] == list(range(5))
+
+
+def test_spool_is_replayed_by_a_new_shipper(stub, shipper, tmp_path):
+    stub.inject(bulk_statuses=[503] * 100)
+    first = shipper()
+    first.submit({"@timestamp": TIMESTAMP})
+    first.close()
+    assert first.stats()["spool_bytes"] > 0
+    stub.reset()
+
+    second = shipper()
+    wait_for(lambda: second.stats()["replayed"] == 1)
+    assert second.connector.get_index_total_docs("ship-2024.05.01") == 1
+
+
+def test_failed_items_are_spooled_or_dead_lettered_by_status(stub, shipper, tmp_path):
+    stub.inject(bulk_item_statuses=[400, 503, 400])
+    shipping = shipper()
+    for number in range(6):
+        shipping.submit({"@timestamp": TIMESTAMP, "number": number})
+    shipping.flush(timeout=10)
+
+    stats = shipping.stats()
+    assert (stats["indexed"], stats["dead_lettered"], stats["spooled"], stats["failed"]) == (3, 2, 1, 0)
+    [dead_letter] = glob.glob(os.path.join(tmp_path, "dead-letter-*.ndjson.gz"))
+    with gzip.open(dead_letter, "rt") as segment:
+        header, *documents = [json.loads(line) for line in segment]
+    assert "injected 400" in header["error"]
+    assert [document["number"] for document in documents] == [0, 2]
+
+    wait_for(lambda: shipping.stats()["replayed"] == 1)
+    assert shipping.connector.get_index_total_docs("ship-2024.05.01") == 4
+
+
+def test_items_rejected_after_the_bulk_retries_are_spooled(stub, shipper):
+    # The first attempt and the three retries of bulk_index are all rejected with 429.
+    stub.inject(bulk_item_rejections=4)
+    shipping = shipper()
+    shipping.submit({"@timestamp": TIMESTAMP})
+    shipping.flush(timeout=10)
+
+    assert shipping.stats()["spooled"] == 1
+    wait_for(lambda: shipping.stats()["replayed"] == 1)
+    assert shipping.connector.get_index_total_docs("ship-2024.05.01") == 1
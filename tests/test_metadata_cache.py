@@ -0,0 +1,89 @@
+import pytest
+
+from demo import MetadataCache
+
+
+@pytest.fixture
+def requests_made(monkeypatch):
+    """Patch a connector's client to record the paths it requests."""
+    def record(connector):
+        client = connector.get_client()
+        paths = []
+        perform_request = client.perform_request
+
+        def recording(method, path, **kwargs):
+            paths.append(path)
+            return perform_request(method, path, **kwargs)
+
+        monkeypatch.setattr(client, "perform_request", recording)
+        return paths
+    return record
+
+
+def load(connector, index_name, docs, aliases=None):
+    connector.create_index(index_name, {"aliases": aliases or {}, "mappings": {"properties": {"level": {"type": "keyword"}}},
+                                        "settings": {"number_of_shards": 1}})
+    connector.bulk_index(index_name, [{"level": "info"} for _ in range(docs)])
+
+
+def test_get_indices_info_covers_every_matching_index(stub, connect):
+    connector = connect()
+    load(connector, "logs-2024.05.01", 3, {"logs-read": {}})
+    load(connector, "logs-2024.05.02", 5)
+    load(connector, "metrics-2024.05.01", 1)
+
+    infos = connector.get_indices_info(["logs-*", "missing"])
+
+    assert sorted(infos) == ["logs-2024.05.01", "logs-2024.05.02"]
+    first = infos["logs-2024.05.01"]
+    assert first["exists"] and first["doc_count"] == 3
+    assert first["aliases"] == {"logs-2024.05.01": {"aliases": {"logs-read": {}}}}
+    assert first["mappings"]["logs-2024.05.01"]["mappings"]["properties"]["level"] == {"type": "keyword"}
+    assert infos["logs-2024.05.02"]["doc_count"] == 5
+
+
+def test_cached_metadata_answers_without_requests(stub, connect, requests_made):
+    cache = MetadataCache(ttl=60.0)
+    connector = connect(metadata_cache=cache)
+    load(connector, "logs-2024.05.01", 3, {"logs-read": {}})
+    connector.get_indices_info(["logs-2024.05.01", "missing"])
+    paths = requests_made(connector)
+
+    assert connector.get_indices_info("logs-2024.05.01")["logs-2024.05.01"]["doc_count"] == 3
+    assert connector.index_exists("logs-read")
+    assert not connector.index_exists("missing")
+    assert connector.search("missing") == {"error": "index does not exist"}
+    assert paths == []
+    assert cache.stats()["hits"] >= 4
+
+    # Wildcards are never answered from the cache.
+    connector.get_indices_info("logs-*")
+    assert paths
+
+
+def test_writes_invalidate_the_cached_metadata(stub, connect):
+    connector = connect(metadata_cache=MetadataCache(ttl=60.0))
+    assert not connector.index_exists("logs-2024.05.01")
+
+    load(connector, "logs-2024.05.01", 2)
+    assert connector.index_exists("logs-2024.05.01")
+
+    connector.delete_index("logs-2024.05.01")
+    assert not connector.index_exists("logs-2024.05.01")
+
+
+def test_metadata_cache_expiry_eviction_and_wildcard_invalidation():
+    cache = MetadataCache(ttl=60.0, max_entries=3)
+    for name in ("logs-1", "logs-2", "metrics-1", "metrics-2"):
+        cache.put(name, True)
+
+    assert cache.exists("logs-1") is None
+    cache.invalidate("logs-*")
+    assert cache.exists("logs-2") is None
+    assert cache.exists("metrics-2") is True
+    assert cache.stats() == {"hits": 1, "misses": 2, "invalidations": 1, "entries": 2}
+
+    expired = MetadataCache(ttl=-1.0)
+    expired.put("logs-1", True, {"doc_count": 1})
+    assert expired.info("logs-1") is None
+    assert expired.stats()["entries"] == 0
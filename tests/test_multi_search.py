@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from demo import SearchCache
+
+INDEX = "msearch_test"
+
+
+def test_multi_search_returns_results_in_order_with_per_query_errors(stub, connect):
+    connector = connect()
+    connector.bulk_index(INDEX, [{"n": number} for number in range(5)])
+
+    results = connector.multi_search([
+        {"index_name": INDEX, "limit": 1, "offset": 3},
+        {"index_name": "msearch_missing"},
+        {"index_name": INDEX, "limit": 2},
+    ])
+
+    assert results[0]["hits"]["hits"][0]["_source"] == {"n": 3}
+    assert results[1]["status"] == 404 and "error" in results[1]
+    assert [hit["_source"]["n"] for hit in results[2]["hits"]["hits"]] == [0, 1]
+
+
+def test_multi_search_serves_cached_queries_and_sends_only_the_others(stub, connect, monkeypatch):
+    connector = connect(search_cache=SearchCache())
+    connector.bulk_index(INDEX, [{"n": number} for number in range(5)])
+    connector.multi_search([{"index_name": INDEX, "limit": 1}])
+    sent = []
+    msearch = connector._msearch
+    monkeypatch.setattr(connector, "_msearch", lambda requests: sent.append(len(requests)) or msearch(requests))
+
+    results = connector.multi_search([{"index_name": INDEX, "limit": 1}, {"index_name": INDEX, "limit": 2}])
+
+    assert sent == [1]
+    assert len(results[1]["hits"]["hits"]) == 2
+
+
+def test_concurrent_searches_are_coalesced_into_msearch_requests(stub, connect):
+    connector = connect(coalesce_window_ms=50)
+    connector.bulk_index(INDEX, [{"n": number} for number in range(20)])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda offset: connector.search(INDEX, limit=1, offset=offset), range(16)))
+
+    assert [result["hits"]["hits"][0]["_source"]["n"] for result in results] == list(range(16))
+    stats = connector.search_coalescer.stats()
+    assert stats["requests"] == 16
+    assert stats["batches"] < 16
+    assert connector.search("msearch_missing") == {"error": "index does not exist"}
@@ -0,0 +1,63 @@
+import socket
+
+import pytest
+
+from benchmarks.stub_cluster import start_stub_cluster
+from demo import ELKConnector
+
+
+@pytest.fixture(scope="module")
+def cluster_url():
+    """First node of a three-node stub cluster; every node serves the same data."""
+    url, process = start_stub_cluster(nodes=3)
+    yield url
+    process.terminate()
+    process.join()
+
+
+@pytest.fixture
+def dead_url():
+    """URL of a local port nothing listens on."""
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        port = listener.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def connector_for(host, **options):
+    connector = ELKConnector(host=host, user="elastic", cert=None, **dict({"pass": ""}, **options))
+    connector.connect()
+    return connector
+
+
+@pytest.mark.parametrize("node_selector", ["round_robin", "random", "least_latency"])
+def test_sniffing_spreads_requests_over_every_node(cluster_url, node_selector):
+    connector = connector_for(cluster_url, sniff=True, node_selector=node_selector)
+    try:
+        connector.index_document("routing_test", {"message": "event"})
+        for _ in range(60):
+            assert "error" not in connector.search("routing_test")
+        stats = connector.node_stats()
+    finally:
+        connector.close()
+
+    assert (stats["live_nodes"], stats["dead_nodes"]) == (3, 0)
+    assert all(node["requests"] > 0 for node in stats["nodes"])
+
+
+def test_a_dead_node_is_taken_out_of_rotation(stub, dead_url):
+    connector = connector_for(f"{dead_url},{stub.url}", dead_node_backoff=60.0)
+    try:
+        connector.index_document("routing_test", {"message": "event"})
+        for _ in range(20):
+            assert "error" not in connector.search("routing_test")
+        stats = connector.node_stats()
+    finally:
+        connector.close()
+
+    nodes = {node["node"]: node for node in stats["nodes"]}
+    assert (stats["live_nodes"], stats["dead_nodes"]) == (1, 1)
+    assert not nodes[dead_url]["alive"]
+    assert nodes[dead_url]["consecutive_failures"] == 1
+    assert nodes[dead_url]["requests"] == 0
+    assert nodes[stub.url]["requests"] >= 21
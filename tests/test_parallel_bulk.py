@@ -0,0 +1,73 @@
+import threading
+
+import pytest
+
+from demo import DataGenerator
+
+INDEX = "parallel_bulk_test"
+
+
+@pytest.fixture
+def documents():
+    return DataGenerator(seed=11).generate_batch(400)
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_parallel_bulk_index_indexes_every_document(stub, connect, documents, executor):
+    connector = connect()
+
+    summary = connector.parallel_bulk_index(INDEX, documents, workers=3, executor=executor, id_field="id",
+                                            initial_batch_docs=50, max_batch_docs=50)
+
+    assert summary["indexed"] == summary["total"] == len(documents)
+    assert not summary["aborted"]
+    assert summary["resume_position"] == len(documents)
+    assert sum(worker["indexed"] for worker in summary["workers"].values()) == len(documents)
+    assert connector.get_index_total_docs(INDEX) == len(documents)
+
+
+def test_parallel_bulk_index_bounds_the_batches_in_flight(stub, connect, documents, monkeypatch):
+    connector = connect()
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+    flush = connector._flush_bulk_batch
+
+    def counting_flush(*args, **kwargs):
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        try:
+            return flush(*args, **kwargs)
+        finally:
+            with lock:
+                in_flight.pop()
+
+    monkeypatch.setattr(connector, "_flush_bulk_batch", counting_flush)
+
+    summary = connector.parallel_bulk_index(INDEX, iter(documents), workers=4, max_in_flight=2,
+                                            initial_batch_docs=50, max_batch_docs=50)
+
+    assert summary["indexed"] == len(documents)
+    assert max(peak) <= 2
+
+
+def test_parallel_bulk_index_resumes_after_an_aborted_load(stub, connect, documents):
+    connector = connect()
+    stub.inject(bulk_statuses=[503])
+
+    summary = connector.parallel_bulk_index(INDEX, documents, workers=1, max_in_flight=1, id_field="id",
+                                            initial_batch_docs=50)
+
+    assert summary["aborted"]
+    assert summary["resume_position"] == 0
+    assert summary["failures"][0]["status"] == 503
+
+    resumed = connector.parallel_bulk_index(INDEX, documents[summary["resume_position"]:], workers=2,
+                                            id_field="id", initial_batch_docs=50)
+
+    assert not resumed["aborted"]
+    assert resumed["failed"] == 0
+    assert resumed["resume_position"] == len(documents)
+    # Documents indexed by the aborted load are replaced by their _id, not duplicated.
+    assert connector.get_index_total_docs(INDEX) == len(documents)
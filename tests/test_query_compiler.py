@@ -0,0 +1,88 @@
+import copy
+
+from demo import QueryBuilder, canonical_key, compile_query, field_types_from_mapping, index_mappings_example
+from demo.mappings import mapping_fields
+
+FIELD_TYPES = field_types_from_mapping(index_mappings_example["mappings"])
+
+
+def test_mapping_fields_lists_objects_and_multi_fields():
+    fields = mapping_fields({"properties": {
+        "user": {"properties": {"name": {"type": "text", "fields": {"raw": {"type": "keyword"}}}}},
+        "tags": {"type": "nested", "properties": {"key": {"type": "keyword"}}},
+    }})
+
+    assert {path: field["type"] for path, field in fields.items()} == {
+        "user": "object", "user.name": "text", "user.name.raw": "keyword", "tags": "nested", "tags.key": "keyword"}
+
+
+def test_field_types_from_mapping():
+    assert FIELD_TYPES["email"] == "keyword"
+    assert FIELD_TYPES["metadata.attributes.attributes.value"] == "text"
+
+
+def test_match_on_an_exact_value_field_becomes_a_term_filter():
+    assert compile_query({"match": {"email": "a@b.c"}}, field_types=FIELD_TYPES) == \
+        {"bool": {"filter": [{"term": {"email": "a@b.c"}}]}}
+    assert compile_query({"match": {"name": "bob"}}, field_types=FIELD_TYPES) == {"match": {"name": "bob"}}
+
+
+def test_match_on_a_number_is_rewritten_without_field_types():
+    assert compile_query({"match": {"age": 5}}) == {"bool": {"filter": [{"term": {"age": 5}}]}}
+
+
+def test_constant_score_clauses_move_to_filter_context():
+    query = {"bool": {"must": [{"match": {"name": "x"}}, {"range": {"age": {"gt": 3}}}]}}
+
+    assert compile_query(query, field_types=FIELD_TYPES) == \
+        {"bool": {"must": [{"match": {"name": "x"}}], "filter": [{"range": {"age": {"gt": 3}}}]}}
+
+
+def test_every_clause_moves_to_filter_context_without_scoring():
+    assert compile_query({"match": {"name": "bob"}}, scoring=False) == \
+        {"bool": {"filter": [{"match": {"name": "bob"}}]}}
+
+
+def test_nested_bools_are_flattened_and_duplicate_filters_dropped():
+    query = {"bool": {"must": [{"bool": {"must": [{"match": {"name": "x"}}]}}]}}
+    filters = [{"term": {"active": True}}, {"term": {"active": True}}]
+
+    assert compile_query(query, filters, FIELD_TYPES) == \
+        {"bool": {"must": [{"match": {"name": "x"}}], "filter": [{"term": {"active": True}}]}}
+
+
+def test_caller_query_is_not_modified():
+    query = {"bool": {"must": [{"match": {"email": "a@b.c"}}]}}
+    original = copy.deepcopy(query)
+
+    compile_query(query, [{"term": {"active": True}}], FIELD_TYPES)
+
+    assert query == original
+
+
+def test_empty_query_matches_everything():
+    assert compile_query() == {"match_all": {}}
+
+
+def test_equivalent_queries_compile_to_the_same_key():
+    first = compile_query(None, [{"term": {"email": "a"}}, {"range": {"age": {"gt": 1}}}])
+    second = compile_query(None, [{"range": {"age": {"gt": 1}}}, {"term": {"email": "a"}}])
+
+    assert canonical_key({"query": first, "size": 10}) == canonical_key({"size": 10, "query": second})
+
+
+def test_query_builder():
+    query = QueryBuilder().match("email", "a@b.c").range("age", gt=1).must_not({"term": {"active": False}}) \
+        .build(FIELD_TYPES)
+
+    assert query == {"bool": {"filter": [{"range": {"age": {"gt": 1}}}, {"term": {"email": "a@b.c"}}],
+                              "must_not": [{"term": {"active": False}}]}}
+
+
+def test_search_sends_the_compiled_query(stub, connect):
+    connector = connect()
+    connector.bulk_index("compiled", [{"email": "a@b.c"}])
+
+    response = connector.search("compiled", query={"match": {"email": "a@b.c"}}, field_types=FIELD_TYPES)
+
+    assert len(response["hits"]["hits"]) == 1
@@ -0,0 +1,78 @@
+import json
+
+from demo import QueryProfiler, query_shape
+from demo.query_profiler import main, summarize_profile
+
+INDEX = "profile_test"
+
+
+def test_query_shape_keeps_structure_and_drops_values():
+    first = {"query": {"bool": {"filter": [{"term": {"user": "alice"}}, {"range": {"age": {"gte": 30}}}]}},
+             "sort": [{"age": "desc"}], "from": 0, "size": 10, "profile": True}
+    second = {"query": {"bool": {"filter": [{"term": {"user": "bob"}}, {"range": {"age": {"gte": 41}}}]}},
+              "sort": [{"age": "desc"}], "from": 20, "size": 10}
+
+    assert query_shape(first) == query_shape(second)
+    assert query_shape(dict(second, sort=[{"age": "asc"}])) != query_shape(second)
+    assert query_shape({"aggs": {"top": {"terms": {"field": "user"}}}}) \
+        != query_shape({"aggs": {"top": {"terms": {"field": "country"}}}})
+    assert query_shape({"query": {"terms": {"user": ["a", "b", "c"]}}}) \
+        == query_shape({"query": {"terms": {"user": ["d"]}}})
+
+
+def test_summarize_profile_splits_self_time_by_component():
+    profile = {"shards": [{"id": "[node][index][0]", "searches": [{
+        "query": [{"type": "BooleanQuery", "time_in_nanos": 3000000,
+                   "children": [{"type": "TermQuery", "time_in_nanos": 1000000},
+                                {"type": "TermQuery", "time_in_nanos": 500000}]}],
+        "rewrite_time": 200000,
+        "collector": [{"time_in_nanos": 400000}],
+    }], "aggregations": [{"type": "GlobalOrdinalsStringTermsAggregator", "time_in_nanos": 700000}],
+        "fetch": {"time_in_nanos": 100000}}]}
+
+    summary = summarize_profile(profile)
+
+    assert summary["shards"] == [{"id": "[node][index][0]", "query_ms": 3.0, "rewrite_ms": 0.2, "collector_ms": 0.4,
+                                  "aggregation_ms": 0.7, "fetch_ms": 0.1}]
+    assert summary["components"] == {"BooleanQuery": 1.5, "TermQuery": 1.5,
+                                     "agg:GlobalOrdinalsStringTermsAggregator": 0.7}
+
+
+def test_profiled_searches_are_recorded_and_written(stub, connect, tmp_path):
+    capture = tmp_path / "slow_queries.jsonl"
+    profiler = QueryProfiler(sample_rate=1.0, slowest=3, path=str(capture))
+    connector = connect(profiler=profiler)
+    connector.bulk_index(INDEX, [{"user": f"user-{number}"} for number in range(20)])
+
+    for number in range(5):
+        response = connector.search(INDEX, filters={"term": {"user": f"user-{number}"}})
+        assert "profile" not in response and response["hits"]["hits"]
+    filtered = connector.search(INDEX, filter_path="hits.hits._id")
+
+    assert set(filtered) == {"hits"}
+    assert profiler.stats() == {"searches": 6, "profiled": 6, "written": 6, "kept": 3}
+    slowest = profiler.slowest_queries()
+    assert [entry["total_ms"] for entry in slowest] == sorted((entry["total_ms"] for entry in slowest), reverse=True)
+    assert all(entry["profile"]["components"]["TermQuery"] > 0 for entry in slowest)
+
+    entries = [json.loads(line) for line in capture.read_text().splitlines()]
+    assert len(entries) == 6
+    assert len({entry["shape"] for entry in entries}) == 2
+    assert all(entry["server_ms"] == 1.0 for entry in entries)
+    summary = main([str(capture), "--json"])
+    assert sorted(group["count"] for group in summary) == [1, 5]
+    assert all(group["profiled"] == group["count"] for group in summary)
+
+
+def test_unsampled_searches_are_only_written_when_slow(stub, connect, tmp_path):
+    capture = tmp_path / "slow_queries.jsonl"
+    connector = connect(profiler=QueryProfiler(sample_rate=0.0, path=str(capture), slow_threshold_ms=0))
+    connector.bulk_index(INDEX, [{"user": "alice"}])
+
+    connector.search(INDEX)
+    connector.profiler.slow_threshold_ms = 60000
+    connector.search(INDEX)
+
+    [entry] = [json.loads(line) for line in capture.read_text().splitlines()]
+    assert entry["profile"] is None
+    assert connector.profiler.stats() == {"searches": 2, "profiled": 0, "written": 1, "kept": 2}
@@ -0,0 +1,84 @@
+from demo import SearchCache, index_mappings_example
+
+
+def test_write_to_an_index_invalidates_its_searches(stub, connect):
+    cache = SearchCache()
+    connector = connect(search_cache=cache)
+    connector.create_index("cache_a", index_mappings_example)
+    connector.index_document("cache_a", {"id": "1"})
+
+    first = connector.search("cache_a")
+    assert connector.search("cache_a") is first
+    assert cache.stats()["hits"] == 1
+
+    connector.index_document("cache_a", {"id": "2"})
+
+    assert len(connector.search("cache_a")["hits"]["hits"]) == 2
+
+
+def test_write_to_an_index_invalidates_searches_through_its_alias(stub, connect):
+    cache = SearchCache()
+    connector = connect(search_cache=cache)
+    connector.create_index("cache_b-000001", index_mappings_example)
+    connector.put_alias_for_index("cache_b-000001", "cache_b")
+    connector.bulk_index("cache_b-000001", [{"id": "1"}])
+
+    assert len(connector.search("cache_b")["hits"]["hits"]) == 1
+    connector.bulk_index("cache_b-000001", [{"id": "2"}])
+
+    assert len(connector.search("cache_b")["hits"]["hits"]) == 2
+    assert cache.stats()["hits"] == 0
+
+
+def test_write_through_an_alias_invalidates_searches_of_the_index(stub, connect):
+    cache = SearchCache()
+    connector = connect(search_cache=cache)
+    connector.create_index("cache_c-000001", index_mappings_example)
+    connector.put_alias_for_index("cache_c-000001", "cache_c")
+    connector.search("cache_c-000001")
+
+    connector.bulk_index("cache_c", [{"id": "1"}])
+
+    assert len(connector.search("cache_c-000001")["hits"]["hits"]) == 1
+
+
+def test_write_invalidates_wildcard_searches_only(stub, connect):
+    cache = SearchCache()
+    connector = connect(search_cache=cache)
+    for name in ("logs-1", "metrics-1"):
+        connector.create_index(name, index_mappings_example)
+    connector.search("logs-*")
+    connector.search("metrics-1")
+
+    connector.index_document("logs-1", {"id": "1"})
+
+    assert [index_name for index_name, _ in cache.entries] == ["metrics-1"]
+
+
+def test_cache_bounds_and_expiry():
+    cache = SearchCache(max_entries=2, ttl=None)
+    response = {"hits": {"hits": [{"_id": "1", "_source": {"name": "x"}}]}}
+    for name in ("a", "b", "c"):
+        cache.put(name, {}, response)
+
+    assert cache.get("a", {}) is None
+    assert cache.get("c", {}) is response
+    assert cache.stats()["evictions"] == 1
+
+    expiring = SearchCache(ttl=-1)
+    expiring.put("a", {}, response)
+    assert expiring.get("a", {}) is None
+    assert expiring.stats()["expirations"] == 1
+
+
+def test_refresh_generation_change_invalidates_searches(stub, connect):
+    cache = SearchCache(generation_check_interval=0)
+    connector = connect(search_cache=cache)
+    connector.bulk_index("cache_d", [{"id": "1"}])
+    assert len(connector.search("cache_d")["hits"]["hits"]) == 1
+
+    # Written behind the connector's back, so only the refresh generation reveals it.
+    connector.get_client().index(index="cache_d", document={"id": "2"})
+
+    assert len(connector.search("cache_d")["hits"]["hits"]) == 2
+    assert cache.stats()["invalidations"] == 1
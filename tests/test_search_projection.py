@@ -0,0 +1,60 @@
+import pytest
+
+from demo import DataGenerator, index_mappings_example
+
+INDEX = "projection_test"
+
+
+@pytest.fixture
+def connector(stub, connect):
+    connector = connect()
+    connector.create_index(INDEX, index_mappings_example)
+    connector.bulk_index(INDEX, DataGenerator(seed=9).generate_batch(20))
+    return connector
+
+
+def test_source_excludes_drops_nested_attributes(connector):
+    response = connector.search(INDEX, source_excludes=["metadata.attributes"])
+
+    source = response["hits"]["hits"][0]["_source"]
+    assert source["metadata"].keys() == {"name"}
+    assert {"id", "name", "age"} <= source.keys()
+
+
+def test_source_includes_and_docvalue_fields(connector):
+    full = connector.search(INDEX)["hits"]["hits"][0]["_source"]
+    response = connector.search(INDEX, source_includes=["id", "metadata.name"], docvalue_fields=["age"])
+
+    hit = response["hits"]["hits"][0]
+    assert hit["_source"] == {"id": full["id"], "metadata": {"name": full["metadata"]["name"]}}
+    assert hit["fields"] == {"age": [full["age"]]}
+
+
+def test_no_source_and_no_total(connector):
+    response = connector.search(INDEX, source_includes=False, track_total_hits=False, limit=3)
+
+    assert len(response["hits"]["hits"]) == 3
+    assert all("_source" not in hit for hit in response["hits"]["hits"])
+    assert "total" not in response["hits"]
+
+
+def test_filter_path_trims_the_response(connector):
+    full = connector.search(INDEX, limit=2)
+    response = connector.search(INDEX, filter_path=["hits.hits._source.id", "hits.total"], limit=2)
+
+    assert response == {"hits": {"total": full["hits"]["total"],
+                                 "hits": [{"_source": {"id": hit["_source"]["id"]}} for hit in full["hits"]["hits"]]}}
+
+
+def test_aggregations_only_returns_no_hits(connector, monkeypatch):
+    bodies = []
+    client = connector.get_client()
+    perform_request = client.perform_request
+    monkeypatch.setattr(client, "perform_request",
+                        lambda *args, **kwargs: bodies.append(kwargs.get("body")) or perform_request(*args, **kwargs))
+
+    response = connector.search(INDEX, aggregations={"by_age": {"terms": {"field": "age"}}}, aggregations_only=True)
+
+    assert response["hits"]["hits"] == []
+    assert "by_age" in response["aggregations"]
+    assert b'"size":0' in bodies[0] and b'"from":0' in bodies[0]
@@ -0,0 +1,38 @@
+import datetime
+
+import pytest
+
+from demo import LazySearchResponse, resolve_serializer
+
+INDEX = "serializer_test"
+
+
+def test_json_is_the_default_serializer():
+    dumps, loads, _ = resolve_serializer()
+
+    assert dumps({"when": datetime.date(2024, 5, 1), 1: "x"}) == b'{"when":"2024-05-01","1":"x"}'
+    assert loads(b'{"a":1}') == {"a": 1}
+    with pytest.raises(ValueError):
+        resolve_serializer("simplejson")
+
+
+def test_orjson_serializer_round_trips_through_the_cluster(stub, connect):
+    orjson = pytest.importorskip("orjson")
+    connector = connect(serializer="orjson")
+
+    connector.bulk_index(INDEX, [{"n": 1, "when": datetime.datetime(2024, 5, 1, 10), 2: "x"}])
+
+    assert connector.json_loads is orjson.loads
+    assert connector.search(INDEX)["hits"]["hits"][0]["_source"] == {"n": 1, "when": "2024-05-01T10:00:00", "2": "x"}
+
+
+def test_raw_and_lazy_search_responses(stub, connect):
+    connector = connect()
+    connector.bulk_index(INDEX, [{"n": number} for number in range(3)])
+
+    raw = connector.search(INDEX, response_format="raw")
+    lazy = connector.search(INDEX, response_format="lazy")
+
+    assert isinstance(raw, bytes) and b'"_id": "2"' in raw
+    assert isinstance(lazy, LazySearchResponse)
+    assert [hit["_source"]["n"] for hit in lazy["hits"]["hits"]] == [0, 1, 2]